@@ -7,98 +7,45 @@ Focus: Absensi, Check-in/out, Offline sync
 # pyright: reportOptionalMemberAccess=false
 # type: ignore
 
-from fastapi import FastAPI, HTTPException, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
+import gzip
 import sys
 import os
 from pathlib import Path
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, create_engine
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
-from datetime import datetime
-from typing import Optional
+from sqlalchemy.orm import Session, sessionmaker
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+# Model bersama dari backend (satu MetaData dengan main ERP)
+from app.models.database import User, Customer, Product, SalesVisit, Order, build_engine
+from app.core.streaming import stream_json
+from app.services.rollup_service import sales_rollups, salesman_scope
+from app.services.sync_service import sync_service
+from app.services.sync_upload_service import sync_uploads
+from app.services.data_pack_service import data_packs
+from app.services.visit_archive_service import visit_archive, visit_dict
+
+try:
+    import msgpack  # Opsional, payload sync lebih kecil dari JSON
+except ImportError:
+    msgpack = None
 
 # Database setup
-DATABASE_URL = "sqlite:///./erp_antifraud.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./erp_antifraud.db")
+engine = build_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-class Base(DeclarativeBase):
-    pass
-
-# Simplified models for attendance (reference existing tables)
-class User(Base):
-    __tablename__ = "users"
-    __table_args__ = {'extend_existing': True}
-    
-    id: Mapped[str] = mapped_column(primary_key=True)
-    username: Mapped[Optional[str]]
-    full_name: Mapped[Optional[str]]
-    area: Mapped[Optional[str]]
-
-class Customer(Base):
-    __tablename__ = "customers"
-    __table_args__ = {'extend_existing': True}
-    
-    id: Mapped[str] = mapped_column(primary_key=True)
-    name: Mapped[Optional[str]]
-    address: Mapped[Optional[str]]
-    phone: Mapped[Optional[str]]
-    area: Mapped[Optional[str]]
-    latitude: Mapped[Optional[float]]
-    longitude: Mapped[Optional[float]]
-    credit_limit: Mapped[Optional[float]]
-
-class Product(Base):
-    __tablename__ = "products"
-    __table_args__ = {'extend_existing': True}
-    
-    id: Mapped[str] = mapped_column(primary_key=True)
-    name: Mapped[Optional[str]]
-    sku: Mapped[Optional[str]]
-    price: Mapped[Optional[float]]
-    stock_warehouse: Mapped[Optional[int]]
-    stock_vehicle: Mapped[Optional[int]]
-    unit: Mapped[Optional[str]]
-
-class SalesVisit(Base):
-    __tablename__ = "sales_visits"
-    __table_args__ = {'extend_existing': True}
-    
-    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    salesman_id: Mapped[Optional[str]]
-    customer_id: Mapped[Optional[str]]
-    check_in: Mapped[Optional[datetime]]
-    check_out: Mapped[Optional[datetime]]
-    latitude: Mapped[Optional[float]]
-    longitude: Mapped[Optional[float]]
-    photo_url: Mapped[Optional[str]]
-    notes: Mapped[Optional[str]]
-    location_valid: Mapped[Optional[bool]]
-    duration_minutes: Mapped[Optional[int]]
-
-class Order(Base):
-    __tablename__ = "orders"
-    __table_args__ = {'extend_existing': True}
-    
-    id: Mapped[str] = mapped_column(primary_key=True)
-    salesman_id: Mapped[Optional[str]]
-    customer_id: Mapped[Optional[str]]
-    total_amount: Mapped[Optional[float]]
-    status: Mapped[Optional[str]]
-    created_at: Mapped[Optional[datetime]]
-
-class OrderItem(Base):
-    __tablename__ = "order_items"
-    __table_args__ = {'extend_existing': True}
-    
-    id: Mapped[int] = mapped_column(primary_key=True)
-    order_id: Mapped[Optional[str]]
-    product_id: Mapped[Optional[str]]
-    quantity: Mapped[Optional[int]]
+def salesman_areas(salesman: User) -> List[str]:
+    """Area salesman dari area_detail {"location": [...]}"""
+    detail = salesman.area_detail or {}
+    locations = detail.get("location", []) if isinstance(detail, dict) else []
+    return [locations] if isinstance(locations, str) else list(locations)
 
 def get_db():
     db = SessionLocal()
@@ -107,10 +54,25 @@ def get_db():
     finally:
         db.close()
 
+def stream_session() -> Session:
+    """
+    Session khusus untuk response streaming. fastapi==0.116 menutup dependency
+    get_db sebelum body di-stream, jadi session ini ditutup oleh stream (close=db.close).
+    """
+    return SessionLocal()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Data pack per area dibangun ulang di background (DATA_PACK_INTERVAL detik)
+    data_packs.start(session_factory=SessionLocal)
+    yield
+    data_packs.shutdown()
+
 app = FastAPI(
     title="GAJAH NUSA - Attendance Microservice",
     description="Aplikasi Absensi Salesman dengan Offline-First Support",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -121,6 +83,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # ==================== MODELS ====================
 
@@ -138,12 +101,15 @@ class CheckOutRequest(BaseModel):
 
 class SyncRequest(BaseModel):
     salesman_id: str
-    last_sync: Optional[str] = None
+    last_sync: Optional[str] = None  # Lama, diabaikan; pakai sync_token
+    sync_token: Optional[str] = None
+    page_size: Optional[int] = None
 
 class OfflineAction(BaseModel):
-    action_type: str  # "check_in", "check_out", "order"
+    action_type: str  # "check_in", "check_out", "order", "update_customer"
     timestamp: str
-    data: Dict
+    data: Dict  # check_out: visit_id, atau visit_key = idempotency_key check-in offline
+    idempotency_key: Optional[str] = None  # dibuat device per action, dikirim ulang saat retry
 
 # ==================== ENDPOINTS ====================
 
@@ -180,15 +146,17 @@ async def check_in(request: CheckInRequest, db: Session = Depends(get_db)):
     visit = SalesVisit(
         salesman_id=request.salesman_id,
         customer_id=request.customer_id,
+        visit_type="regular",
         check_in=datetime.now(),
-        latitude=request.latitude,
-        longitude=request.longitude,
-        photo_url=request.photo_url,
+        gps_latitude=request.latitude,
+        gps_longitude=request.longitude,
+        selfie_url=request.photo_url,
         notes=request.notes,
         location_valid=True  # You can add GPS validation here
     )
     
     db.add(visit)
+    sales_rollups.record_visit(db, salesman_scope(salesman), visit.check_in)
     db.commit()
     db.refresh(visit)
     
@@ -230,222 +198,179 @@ async def check_out(request: CheckOutRequest, db: Session = Depends(get_db)):
 @app.get("/api/attendance/history/{salesman_id}")
 async def get_attendance_history(
     salesman_id: str,
+    request: Request,
     days: int = 7,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """Get attendance history salesman"""
+    """
+    Get attendance history salesman (termasuk kunjungan yang sudah diarsip).
+    Dengan limit/cursor: satu halaman + next_cursor. Tanpa: seluruh rentang di-stream.
+    """
     
     start_date = datetime.now() - timedelta(days=days)
     
-    visits = db.query(SalesVisit).filter(
-        and_(
-            SalesVisit.salesman_id == salesman_id,
-            SalesVisit.check_in >= start_date
-        )
-    ).order_by(SalesVisit.check_in.desc()).all()
+    if cursor or limit:
+        try:
+            visits, next_cursor = visit_archive.history_page(db, salesman_id, start_date, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {
+            "salesman_id": salesman_id,
+            "period_days": days,
+            "visits": [visit_dict(v) for v in visits],
+            "next_cursor": next_cursor
+        }
     
-    return {
-        "salesman_id": salesman_id,
-        "period_days": days,
-        "total_visits": len(visits),
-        "visits": [
-            {
-                "visit_id": v.id,
-                "customer_id": v.customer_id,
-                "check_in": v.check_in.isoformat(),
-                "check_out": v.check_out.isoformat() if v.check_out else None,
-                "duration_minutes": v.duration_minutes,
-                "notes": v.notes
-            }
-            for v in visits
-        ]
-    }
+    # total_visits di akhir: jumlahnya baru diketahui setelah semua halaman terkirim
+    stream_db = stream_session()
+    return stream_json(
+        visit_archive.iter_history(stream_db, salesman_id, start_date),
+        visit_dict,
+        request=request,
+        key="visits",
+        head={"salesman_id": salesman_id, "period_days": days},
+        tail=lambda count: {"total_visits": count},
+        close=stream_db.close
+    )
 
 # ==================== OFFLINE SYNC ====================
 
 @app.post("/api/sync/download")
-async def sync_download(request: SyncRequest, db: Session = Depends(get_db)):
-    """Download data untuk offline storage (filtered by area)"""
+async def sync_download(request: SyncRequest, http_request: Request, db: Session = Depends(get_db)):
+    """
+    Delta sync untuk offline storage (filtered by area).
+    Tanpa sync_token: snapshot berhalaman. Dengan sync_token: hanya perubahan
+    (upsert di "data", id yang dihapus di "deleted") sejak token itu.
+    Ulangi dengan sync_token baru selama has_more = true.
+    """
     
     salesman = db.query(User).filter(User.id == request.salesman_id).first()
     if not salesman:
         raise HTTPException(status_code=404, detail="Salesman not found")
     
-    # Get salesman's area/territory
-    salesman_area = salesman.area if hasattr(salesman, 'area') else None
-    
-    # Get customers in salesman's area
-    customers_query = db.query(Customer)
-    if salesman_area:
-        customers_query = customers_query.filter(Customer.area == salesman_area)
-    
-    customers = customers_query.limit(100).all()  # Limit for performance
-    
-    # Get active products with stock
-    products = db.query(Product).filter(
-        Product.stock_warehouse > 0
-    ).limit(200).all()
-    
-    # Get recent orders for reference
-    recent_orders = db.query(Order).filter(
-        and_(
-            Order.salesman_id == request.salesman_id,
-            Order.created_at >= datetime.now() - timedelta(days=30)
+    try:
+        result = sync_service.download(
+            db, request.salesman_id, salesman_areas(salesman),
+            sync_token=request.sync_token, page_size=request.page_size
         )
-    ).order_by(Order.created_at.desc()).limit(50).all()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {
+    payload = {
         "sync_time": datetime.now().isoformat(),
         "salesman_id": request.salesman_id,
-        "data": {
-            "customers": [
-                {
-                    "id": c.id,
-                    "name": c.name,
-                    "address": c.address,
-                    "phone": c.phone,
-                    "area": c.area if hasattr(c, 'area') else None,
-                    "latitude": c.latitude if hasattr(c, 'latitude') else None,
-                    "longitude": c.longitude if hasattr(c, 'longitude') else None,
-                    "credit_limit": float(c.credit_limit or 0)
-                }
-                for c in customers
-            ],
-            "products": [
-                {
-                    "id": p.id,
-                    "name": p.name,
-                    "sku": p.sku,
-                    "price": float(p.price or 0),
-                    "stock_warehouse": p.stock_warehouse,
-                    "stock_vehicle": p.stock_vehicle if hasattr(p, 'stock_vehicle') else 0,
-                    "unit": p.unit if hasattr(p, 'unit') else "pcs"
-                }
-                for p in products
-            ],
-            "recent_orders": [
-                {
-                    "id": o.id,
-                    "customer_id": o.customer_id,
-                    "total_amount": float(o.total_amount or 0),
-                    "status": str(o.status or ""),
-                    "created_at": o.created_at.isoformat() if o.created_at else None
-                }
-                for o in recent_orders
-            ]
-        },
-        "stats": {
-            "customers_count": len(customers),
-            "products_count": len(products),
-            "orders_count": len(recent_orders)
-        }
+        **result
     }
+    if msgpack is not None and "msgpack" in http_request.headers.get("accept", ""):
+        return Response(msgpack.packb(payload, default=str), media_type="application/x-msgpack")
+    return payload
 
-@app.post("/api/sync/upload")
-async def sync_upload(actions: List[OfflineAction], db: Session = Depends(get_db)):
-    """Upload offline actions yang tersimpan di local storage"""
+@app.get("/api/sync/packs/{salesman_id}")
+async def sync_packs(salesman_id: str, db: Session = Depends(get_db)):
+    """
+    Manifest data pack untuk sync pagi: katalog + customer per area salesman.
+    Download tiap pack (pakai If-None-Match), lalu /api/sync/download dengan sync_token manifest.
+    """
     
-    results = []
+    salesman = db.query(User).filter(User.id == salesman_id).first()
+    if not salesman:
+        raise HTTPException(status_code=404, detail="Salesman not found")
     
-    for action in actions:
-        try:
-            if action.action_type == "check_in":
-                # Process check-in
-                visit = SalesVisit(
-                    salesman_id=action.data["salesman_id"],
-                    customer_id=action.data["customer_id"],
-                    check_in=datetime.fromisoformat(action.timestamp),
-                    latitude=action.data.get("latitude"),
-                    longitude=action.data.get("longitude"),
-                    notes=action.data.get("notes"),
-                    location_valid=True
-                )
-                db.add(visit)
-                db.commit()
-                results.append({"action": "check_in", "status": "success"})
-                
-            elif action.action_type == "check_out":
-                # Process check-out
-                visit = db.query(SalesVisit).filter(
-                    SalesVisit.id == action.data["visit_id"]
-                ).first()
-                if visit:
-                    visit.check_out = datetime.fromisoformat(action.timestamp)
-                    if visit.check_in and visit.check_out:
-                        check_in_time: datetime = visit.check_in  # type: ignore
-                        check_out_time: datetime = visit.check_out  # type: ignore
-                        visit.duration_minutes = int((check_out_time - check_in_time).total_seconds() / 60)
-                    db.commit()
-                    results.append({"action": "check_out", "status": "success"})
-                else:
-                    results.append({"action": "check_out", "status": "failed", "reason": "visit not found"})
-                    
-            elif action.action_type == "order":
-                # Process order - implement based on your Order model
-                results.append({"action": "order", "status": "pending"})
-                
-        except Exception as e:
-            results.append({"action": action.action_type, "status": "error", "error": str(e)})
+    return {"salesman_id": salesman_id, **data_packs.packs_for(db, salesman_areas(salesman))}
+
+@app.get("/api/sync/packs/file/{file_name}")
+async def sync_pack_file(file_name: str, request: Request):
+    """File pack gzip, immutable (nama = hash isi); tanpa akses database"""
+    
+    content = data_packs.read(file_name)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Data pack not found")
+    
+    etag = f'"{file_name[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    if "gzip" not in request.headers.get("accept-encoding", ""):
+        return Response(gzip.decompress(content), media_type="application/json", headers=headers)
+    return Response(content, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+
+@app.post("/api/sync/upload")
+async def sync_upload(actions: List[OfflineAction], http_request: Request, db: Session = Depends(get_db)):
+    """
+    Upload offline actions yang tersimpan di local storage.
+    Satu transaksi untuk seluruh batch, diterapkan urut timestamp device; action yang
+    pernah diproses (idempotency_key sama) tidak dijalankan lagi, jadi retry aman.
+    update_customer di-merge per field; field yang kalah ada di "conflicts".
+    """
+    results = sync_uploads.apply(db, actions, device_id=http_request.headers.get("x-device-id"))
     
     return {
         "sync_time": datetime.now().isoformat(),
         "total_actions": len(actions),
         "results": results,
-        "success_count": len([r for r in results if r["status"] == "success"])
+        "success_count": len([r for r in results if r["status"] == "success"]),
+        "duplicate_count": len([r for r in results if r["status"] == "duplicate"]),
+        "failed_count": len([r for r in results if r["status"] in ("failed", "error")]),
+        "conflict_count": len([r for r in results if r.get("conflicts")])
     }
 
 # ==================== DATA QUERIES ====================
 
 @app.get("/api/data/customers/{salesman_id}")
-async def get_customers_by_salesman(salesman_id: str, db: Session = Depends(get_db)):
-    """Get customers for specific salesman (filtered by area)"""
+async def get_customers_by_salesman(salesman_id: str, request: Request, db: Session = Depends(get_db)):
+    """Get customers for specific salesman (filtered by area), di-stream per chunk"""
     
     salesman = db.query(User).filter(User.id == salesman_id).first()
     if not salesman:
         raise HTTPException(status_code=404, detail="Salesman not found")
     
-    area = salesman.area if hasattr(salesman, 'area') else None
+    areas = salesman_areas(salesman)
     
-    customers = db.query(Customer)
-    if area:
-        customers = customers.filter(Customer.area == area)
+    stream_db = stream_session()
+    customers = stream_db.query(Customer.id, Customer.name, Customer.address, Customer.phone_store, Customer.phone_owner)
+    if areas:
+        customers = customers.filter(Customer.area_code.in_(areas))
     
-    customers = customers.all()
-    
-    return {
-        "salesman_id": salesman_id,
-        "area": area,
-        "count": len(customers),
-        "customers": [
-            {
-                "id": c.id,
-                "name": c.name,
-                "address": c.address,
-                "phone": c.phone
-            }
-            for c in customers
-        ]
-    }
+    return stream_json(
+        customers,
+        lambda c: {
+            "id": c.id,
+            "name": c.name,
+            "address": c.address,
+            "phone": c.phone_store or c.phone_owner
+        },
+        request=request,
+        key="customers",
+        head={"salesman_id": salesman_id, "area": ", ".join(areas) or None},
+        tail=lambda count: {"count": count},
+        close=stream_db.close
+    )
 
 @app.get("/api/data/products")
-async def get_products(db: Session = Depends(get_db)):
-    """Get available products with stock"""
-    
-    products = db.query(Product).filter(Product.stock_warehouse > 0).all()
-    
-    return {
-        "count": len(products),
-        "products": [
-            {
-                "id": p.id,
-                "name": p.name,
-                "sku": p.sku,
-                "price": float(p.price or 0),
-                "stock": p.stock_warehouse
-            }
-            for p in products
-        ]
-    }
+async def get_products(request: Request):
+    """Get available products with stock, di-stream per chunk"""
+    
+    db = stream_session()
+    products = db.query(
+        Product.id, Product.name, Product.product_code, Product.selling_price, Product.stock_quantity
+    ).filter(Product.stock_quantity > 0)
+    
+    return stream_json(
+        products,
+        lambda p: {
+            "id": p.id,
+            "name": p.name,
+            "sku": p.product_code,
+            "price": float(p.selling_price or 0),
+            "stock": p.stock_quantity
+        },
+        request=request,
+        key="products",
+        tail=lambda count: {"count": count},
+        close=db.close
+    )
 
 # ==================== MAIN ====================
 
@@ -0,0 +1 @@
+# Core utilities package
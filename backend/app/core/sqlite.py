@@ -0,0 +1,208 @@
+# backend/app/core/sqlite.py
+"""
+SQLite Tuning - koneksi dengan pragma WAL untuk deployment single-node
+Hanya stdlib, supaya bisa dipakai juga oleh attendance service dan
+backend team4/team5 (sqlite3 langsung).
+"""
+
+import asyncio
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+# ============= PRAGMAS =============
+SQLITE_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",        # Pembaca tidak diblok penulis
+    "synchronous": "NORMAL",      # Aman dengan WAL, fsync hanya saat checkpoint
+    "busy_timeout": 5000,         # ms menunggu lock sebelum "database is locked"
+    "mmap_size": 268435456,       # 256 MB
+    "cache_size": -65536,         # 64 MB (negatif = KiB)
+    "temp_store": "MEMORY",
+}
+# foreign_keys sengaja tidak ikut: skema lama (attendance team4, guest checkout
+# team5) masih menyimpan referensi ke baris yang tidak ada. Opt-in per pemanggil:
+# connect(path, pragmas={**SQLITE_PRAGMAS, **FOREIGN_KEYS})
+FOREIGN_KEYS: Dict[str, Any] = {"foreign_keys": "ON"}
+
+def apply_pragmas(conn, pragmas: Optional[Dict[str, Any]] = None):
+    """Terapkan pragma ke satu koneksi DB-API sqlite3"""
+    cursor = conn.cursor()
+    for name, value in (pragmas or SQLITE_PRAGMAS).items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def connect(path: str, row_factory=sqlite3.Row, pragmas: Optional[Dict[str, Any]] = None,
+            **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect dengan pragma; dipakai sebagai pengganti get_db lama"""
+    kwargs.setdefault("check_same_thread", False)
+    kwargs.setdefault("timeout", SQLITE_PRAGMAS["busy_timeout"] / 1000)
+    conn = sqlite3.connect(path, **kwargs)
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    apply_pragmas(conn, pragmas)
+    return conn
+
+def install_pragmas(engine):
+    """
+    Pasang pragma di setiap koneksi baru engine SQLAlchemy (hanya SQLite).
+
+    Engine ERP tidak lewat SQLiteWriter: pysqlite baru mengirim BEGIN tepat sebelum
+    INSERT/UPDATE/DELETE pertama, jadi SELECT di awal request tidak membuka snapshot
+    yang nanti harus di-upgrade ke write lock (upgrade itu gagal langsung dengan
+    "database is locked", busy_timeout tidak membantu). Write lock dipegang dari DML
+    pertama sampai commit; penulis lain menunggu busy_timeout, sehingga transaksi
+    tulis tetap berurutan seperti single writer. Syaratnya:
+    - transaksi tulis pendek (jauh di bawah busy_timeout), tanpa I/O lambat di tengahnya
+    - counter diubah dengan SQL atomik (upsert / UPDATE bersyarat), bukan baca-ubah-tulis
+    - session lain yang menulis (mis. sequence_allocator) dipanggil sebelum DML pertama,
+      bukan setelahnya, karena akan menunggu lock milik request itu sendiri
+    Dicek oleh test_sqlite_writer.py (check-in + order paralel).
+    """
+    if engine.dialect.name != "sqlite":
+        return engine
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection)
+
+    return engine
+
+# ============= SINGLE WRITER =============
+class SQLiteWriter:
+    """
+    Semua tulis ke satu file DB lewat satu thread dan satu koneksi.
+    Tidak ada dua penulis yang berebut lock, pembaca tetap jalan (WAL).
+    """
+
+    def __init__(self, path: str, pragmas: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.pragmas = pragmas
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        conn = connect(self.path, isolation_level=None, pragmas=self.pragmas)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                fn, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    result = fn(conn)
+                    conn.execute("COMMIT")
+                    future.set_result(result)
+                except BaseException as e:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    future.set_exception(e)
+        finally:
+            conn.close()
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Jadwalkan fn(conn) sebagai satu transaksi; exception di fn = rollback"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def run(self, fn: Callable[[sqlite3.Connection], Any], timeout: Optional[float] = 30) -> Any:
+        """Blocking; untuk handler/route def biasa"""
+        return self.submit(fn).result(timeout)
+
+    async def run_async(self, fn: Callable[[sqlite3.Connection], Any], timeout: Optional[float] = 30) -> Any:
+        """Untuk handler async def: menunggu writer tanpa memblok event loop"""
+        return await asyncio.wait_for(asyncio.wrap_future(self.submit(fn)), timeout)
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+if __name__ == "__main__":
+    # Benchmark: rollback journal vs WAL + single writer
+    import os
+    import tempfile
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    WRITES, READS, THREADS = 2000, 4000, 16
+
+    def setup(path):
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE visits (id INTEGER PRIMARY KEY, salesman TEXT, at REAL)")
+        conn.executemany("INSERT INTO visits (salesman, at) VALUES (?, ?)", [(f"s{i % 50}", i) for i in range(5000)])
+        conn.commit()
+        conn.close()
+
+    def bench(label, write, read_conn_factory):
+        errors = []
+
+        def do_write(i):
+            try:
+                write(i)
+            except Exception as e:
+                errors.append(str(e))
+
+        def do_read(i):
+            conn = read_conn_factory()
+            try:
+                conn.execute("SELECT COUNT(*) FROM visits WHERE salesman = ?", (f"s{i % 50}",)).fetchone()
+            except Exception as e:
+                errors.append(str(e))
+            finally:
+                conn.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(THREADS) as executor:
+            for i in range(max(WRITES, READS)):
+                if i < WRITES:
+                    executor.submit(do_write, i)
+                if i < READS:
+                    executor.submit(do_read, i)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<22} {(WRITES + READS) / elapsed:8.0f} ops/s, errors {len(errors)}")
+
+    base_dir = tempfile.mkdtemp()
+
+    default_path = os.path.join(base_dir, "default.db")
+    setup(default_path)
+
+    def default_write(i):
+        conn = sqlite3.connect(default_path, timeout=5)
+        try:
+            conn.execute("INSERT INTO visits (salesman, at) VALUES (?, ?)", (f"s{i % 50}", time.time()))
+            conn.commit()
+        finally:
+            conn.close()
+
+    bench("rollback journal", default_write, lambda: sqlite3.connect(default_path, timeout=5))
+
+    wal_path = os.path.join(base_dir, "wal.db")
+    setup(wal_path)
+    writer = SQLiteWriter(wal_path)
+
+    def wal_write(i):
+        writer.run(lambda conn: conn.execute(
+            "INSERT INTO visits (salesman, at) VALUES (?, ?)", (f"s{i % 50}", time.time())
+        ).lastrowid)
+
+    bench("WAL + single writer", wal_write, lambda: connect(wal_path))
+    writer.close()
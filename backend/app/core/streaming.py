@@ -0,0 +1,93 @@
+# backend/app/core/streaming.py
+"""
+Streaming JSON - response list besar tanpa memuat seluruh hasil ke memory
+Baris dibaca dari cursor DB per chunk (fetchmany / yield_per) lalu dikirim
+sebagai array JSON bertahap, atau NDJSON jika client meminta. Dipakai
+attendance service dan backend team4/team5, jadi cukup stdlib + Starlette.
+"""
+
+import json
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+CHUNK_SIZE = 500
+NDJSON = "application/x-ndjson"
+
+# ============= ROWS =============
+def iter_rows(source, chunk_size: int = CHUNK_SIZE) -> Iterator:
+    """Baris dari Query/Result SQLAlchemy (yield_per), cursor DB-API (fetchmany), atau iterable biasa"""
+    if hasattr(source, "yield_per"):
+        yield from source.yield_per(chunk_size)
+    elif hasattr(source, "fetchmany"):
+        while True:
+            rows = source.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+    else:
+        yield from source
+
+def iter_chunks(rows: Iterable, chunk_size: int = CHUNK_SIZE) -> Iterator[List]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+# ============= ENCODERS =============
+def json_array(rows, serialize: Callable[[Any], Any] = dict, key: Optional[str] = None,
+               head: Optional[Dict] = None, tail: Optional[Callable[[int], Dict]] = None,
+               chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Array JSON bertahap, satu potongan teks per chunk baris.
+    Tanpa key: array top-level. Dengan key: {**head, key: [...], **tail(jumlah baris)};
+    tail dihitung setelah baris terakhir (mis. "count").
+    """
+    if key is None:
+        yield "["
+    else:
+        opening = json.dumps(head, default=str)[:-1] + ", " if head else "{"
+        yield f"{opening}{json.dumps(key)}: ["
+
+    count = 0
+    for chunk in iter_chunks(iter_rows(rows, chunk_size), chunk_size):
+        yield ("," if count else "") + ",".join(json.dumps(serialize(row), default=str) for row in chunk)
+        count += len(chunk)
+
+    if key is None:
+        yield "]"
+    else:
+        extra = tail(count) if tail else None
+        yield "], " + json.dumps(extra, default=str)[1:] if extra else "]}"
+
+def ndjson(rows, serialize: Callable[[Any], Any] = dict, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Satu objek JSON per baris"""
+    for chunk in iter_chunks(iter_rows(rows, chunk_size), chunk_size):
+        yield "".join(json.dumps(serialize(row), default=str) + "\n" for row in chunk)
+
+# ============= RESPONSE =============
+def stream_json(rows, serialize: Callable[[Any], Any] = dict, request: Optional[Request] = None,
+                key: Optional[str] = None, head: Optional[Dict] = None,
+                tail: Optional[Callable[[int], Dict]] = None,
+                close: Optional[Callable[[], None]] = None, chunk_size: int = CHUNK_SIZE) -> StreamingResponse:
+    """
+    StreamingResponse dari baris DB. Bentuk JSON sama dengan list/dict biasa;
+    Accept: application/x-ndjson -> NDJSON (hanya baris, tanpa head/tail).
+    close dipanggil setelah baris terakhir terkirim atau client putus (mis. conn.close).
+    """
+    wants_ndjson = request is not None and NDJSON in request.headers.get("accept", "")
+    body = (ndjson(rows, serialize, chunk_size) if wants_ndjson
+            else json_array(rows, serialize, key, head, tail, chunk_size))
+
+    def guarded():
+        try:
+            yield from body
+        finally:
+            if close is not None:
+                close()
+
+    return StreamingResponse(guarded(), media_type=NDJSON if wants_ndjson else "application/json")
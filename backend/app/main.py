@@ -4,29 +4,45 @@ Main FastAPI Application - ERP Anti-Fraud System
 Menghubungkan semua services dengan API endpoints
 """
 
-from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, BackgroundTasks, Request
+from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, BackgroundTasks, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, cast
+from typing import List, Optional, Dict, Set, cast
 import jwt
+import json
+import asyncio
+import os
 from datetime import datetime, timedelta
 import logging
 from contextlib import asynccontextmanager
 
 # Import dari file-file sebelumnya
 from app.models.database import (
-    SessionLocal, get_db, create_tables,
+    SessionLocal, get_db, get_read_db, create_tables,
     User, Customer, Nota, Payment, FraudDetectionLog,
     UserRole, PaymentStatus, NotaStatus, AreaType,
-    SalesVisit, Order, OrderItem, OrderStatus
+    SalesVisit, SalesVisitArchive, Order, OrderItem, OrderStatus, new_id
 )
 from app.services.auth_service import (
     AuthService, PaymentAntifraudService, MLFraudDetector,
     UserRegister, LoginRequest, PaymentRequest, NotaVerification,
     Config
 )
+from app.services.qr_service import QR_FORMATS
+from app.services.nota_service import NotaIssuanceService, BulkNotaRequest
+from app.services.order_service import order_ingestion, OrderInput, OrderItemInput
+from app.services.sequence_service import sequence_allocator
+from app.services.rollup_service import sales_rollups, salesman_scope
+from app.services.team_index import team_index
+from app.services.fraud_alert_service import (
+    fraud_alert_feed, fraud_alert_counters, alert_scope
+)
+from app.services.alert_broker import alert_broker
+from app.services.fraud_log_writer import fraud_log_writer
+from app.services.geofence_service import geofence_index, GeofenceCheck
+from app.services.blob_store import blob_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,6 +57,9 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     logger.info("Shutting down...")
+    payment_service.qr_renderer.shutdown()
+    fraud_log_writer.shutdown()
+    blob_store.shutdown()
 
 app = FastAPI(
     title="ERP Anti-Fraud System",
@@ -102,6 +121,7 @@ def check_role(allowed_roles: List[UserRole]):
 auth_service = AuthService()
 payment_service = PaymentAntifraudService()
 ml_detector = MLFraudDetector()
+nota_issuance_service = NotaIssuanceService(payment_service)
 
 # ============= AUTH ENDPOINTS =============
 @app.post("/api/auth/register")
@@ -169,15 +189,15 @@ async def register_customer(
     """Register new customer/toko dengan approval workflow"""
     try:
         # Generate unique QR for customer
-        import uuid
         import hashlib
-        customer_id = str(uuid.uuid4())
+        customer_id = new_id()
         qr_data = f"{customer_id}|{store_name}|{datetime.utcnow().isoformat()}"
         qr_code = hashlib.sha256(qr_data.encode()).hexdigest()
         
         # Create customer record
         new_customer = Customer(
             id=customer_id,
+            customer_code=sequence_allocator.next_number("CS", width=4),
             store_name=store_name,
             owner_name=owner_name,
             ktp_number=ktp_number,
@@ -221,18 +241,21 @@ async def get_customers(
     """Get customers based on user role and area"""
     query = db.query(Customer)
     
-    # Filter based on user role
-    if current_user.role.value == UserRole.SALES_TOKO.value:
+    # Filter based on user role (area dari team index, tanpa query users)
+    role = team_index.role_of(current_user.id) or current_user.role.value
+    if role == UserRole.SALES_TOKO.value:
         # Only show customers in salesman's area
-        user_areas = current_user.area_detail.get("location", [])
-        query = query.filter(Customer.area.in_(user_areas))
-    elif current_user.role.value == UserRole.SALES_PROJECT.value:
-        query = query.filter(Customer.customer_type == "project")
+        query = query.filter(Customer.area_code.in_(team_index.areas_of(current_user.id)))
+    elif role == UserRole.SUPERVISOR_TOKO.value:
+        # Area supervisor + area semua salesman di timnya
+        query = query.filter(Customer.area_code.in_(team_index.team_areas(current_user.id)))
+    elif role == UserRole.SALES_PROJECT.value:
+        query = query.filter(Customer.type == "project")
     
     if status:
         query = query.filter(Customer.status == status)
     if area:
-        query = query.filter(Customer.area == area)
+        query = query.filter(Customer.area_code == area)
     
     customers = query.all()
     return customers
@@ -281,7 +304,7 @@ async def sales_checkin(
         
         if customer.qr_code != qr_code:
             # Log fraud attempt
-            fraud_log = FraudDetectionLog(
+            fraud_log_writer.log(
                 entity_type="visit",
                 entity_id=customer_id,
                 user_id=current_user.id,
@@ -293,30 +316,16 @@ async def sales_checkin(
                     "location": {"lat": latitude, "lng": longitude}
                 }
             )
-            db.add(fraud_log)
-            db.commit()
             
             raise HTTPException(status_code=400, detail="Invalid QR code")
         
-        # Validate location (within 100 meters of customer)
-        from math import radians, cos, sin, asin, sqrt
-        def haversine(lon1, lat1, lon2, lat2):
-            lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-            dlon = lon2 - lon1
-            dlat = lat2 - lat1
-            a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-            c = 2 * asin(sqrt(a))
-            r = 6371  # Radius of earth in kilometers
-            return c * r * 1000  # Convert to meters
-        
-        distance = haversine(longitude, latitude, customer.longitude, customer.latitude)
-        location_valid = distance <= 100  # Within 100 meters
+        # Simpan selfie (stream ke blob store, thumbnail di background)
+        selfie_ref = (await blob_store.save_upload(selfie))["ref"] if selfie else None
         
-        if not location_valid:
-            # Flag potential fraud
-            qr_fraud_attempt = True
-        else:
-            qr_fraud_attempt = False
+        # Validate location (within 100 meters of customer)
+        geofence = geofence_index.validate_customer(customer, latitude, longitude)
+        location_valid = geofence["location_valid"]
+        distance = geofence["distance_m"]
         
         # Create visit record
         visit = SalesVisit(
@@ -324,29 +333,47 @@ async def sales_checkin(
             customer_id=customer_id,
             visit_type=visit_type,
             qr_scan_time=datetime.utcnow(),
-            qr_valid=not qr_fraud_attempt,
+            qr_valid=True,
             gps_latitude=latitude,
             gps_longitude=longitude,
             gps_accuracy=distance,
             check_in=datetime.utcnow(),
             location_valid=location_valid,
-            qr_fraud_attempt=qr_fraud_attempt
+            selfie_url=selfie_ref,
+            qr_fraud_attempt=False,
+            location_fraud_attempt=not location_valid
         )
         
         db.add(visit)
+        sales_rollups.record_visit(db, salesman_scope(current_user), visit.check_in)
         db.commit()
         
         return {
             "visit_id": visit.id,
             "status": "checked_in",
             "location_valid": location_valid,
-            "distance_from_store": round(distance, 2)
+            "distance_from_store": distance,
+            "selfie_ref": selfie_ref,
+            "nearest_customers": geofence.get("nearest", [])
         }
         
     except Exception as e:
         logger.error(f"Check-in error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/api/visits/validate-bulk")
+async def validate_visits_bulk(
+    checks: List[GeofenceCheck],
+    current_user: User = Depends(check_role([UserRole.SALES_TOKO, UserRole.SALES_PROJECT, UserRole.SUPERVISOR_TOKO, UserRole.SUPERVISOR_PROJECT, UserRole.MANAGER])),
+):
+    """Validasi lokasi kunjungan offline (upload dari mobile) sekaligus"""
+    results = geofence_index.validate_bulk(checks)
+    return {
+        "total": len(results),
+        "invalid": sum(1 for r in results if not r["location_valid"]),
+        "results": results
+    }
+
 @app.post("/api/visits/{visit_id}/checkout")
 async def sales_checkout(
     visit_id: str,
@@ -374,11 +401,54 @@ async def sales_checkout(
     
     return {"message": "Checked out successfully", "duration": visit.duration_minutes}
 
+BLOB_ADMIN_ROLES = [UserRole.ADMIN, UserRole.MANAGER, UserRole.OWNER]
+
+def blob_owner_ids(db: Session, ref: str) -> Set[str]:
+    """User yang mengunggah blob: salesman pemilik selfie kunjungan, user pemilik foto wajah"""
+    owners = {row.id for row in db.query(User.id).filter(User.face_photo_ref == ref)}
+    for visit_model in (SalesVisit, SalesVisitArchive):
+        owners.update(row.salesman_id for row in
+                      db.query(visit_model.salesman_id).filter(visit_model.selfie_url == ref))
+    return owners
+
+def can_read_blob(db: Session, user: User, ref: str) -> bool:
+    """Uploader, supervisor uploader, atau role admin"""
+    if user.role in BLOB_ADMIN_ROLES:
+        return True
+    owners = blob_owner_ids(db, ref)
+    if user.id in owners:
+        return True
+    if user.role in [UserRole.SUPERVISOR_TOKO, UserRole.SUPERVISOR_PROJECT]:
+        return not owners.isdisjoint(team_index.team_of(user.id))
+    return False
+
+@app.get("/api/blobs/{ref}")
+async def get_blob(
+    ref: str,
+    thumbnail: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ambil selfie / foto wajah dari blob store (thumbnail jika tersedia)"""
+    try:
+        path = blob_store.path_for(ref)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Blob milik orang lain diperlakukan sama dengan blob yang tidak ada
+    if not os.path.exists(path) or not can_read_blob(db, current_user, ref):
+        raise HTTPException(status_code=404, detail="Blob not found")
+    if thumbnail:
+        thumb_path = blob_store.thumbnail_path_for(ref)
+        if os.path.exists(thumb_path):
+            return FileResponse(thumb_path, media_type="image/jpeg")
+    return FileResponse(path)
+
 # ============= NOTA & PAYMENT ANTI-FRAUD =============
 @app.post("/api/nota/create")
 async def create_nota(
     order_id: str,
     due_days: int = 60,
+    qr_format: str = "png",
     current_user: User = Depends(check_role([UserRole.ADMIN])),
     db: Session = Depends(get_db)
 ):
@@ -388,20 +458,24 @@ async def create_nota(
         raise HTTPException(status_code=404, detail="Order not found")
     
     # Generate nota number
-    import random
-    nota_number = f"NT{datetime.now().strftime('%Y%m%d')}{random.randint(1000, 9999)}"
+    nota_number = sequence_allocator.next_number("NT")
     
     # Generate unique QR
     # Get the actual value from the order object - cast to avoid type checker issues
     total_amount_value = cast(float, order.total_amount) or 0.0
-    qr_hash, qr_image = payment_service.generate_nota_qr(order_id, nota_number, total_amount_value)
+    try:
+        qr_hash, qr_image = payment_service.generate_nota_qr(order_id, nota_number, total_amount_value, qr_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Create nota
     nota = Nota(
         nota_number=nota_number,
         customer_id=order.customer_id,
+        salesman_id=order.salesman_id,
         order_id=order_id,
         amount=order.total_amount,
+        total_amount=order.total_amount,
         qr_code=qr_hash,
         due_date=datetime.utcnow() + timedelta(days=due_days),
         original_hash=qr_hash
@@ -418,6 +492,67 @@ async def create_nota(
         "due_date": nota.due_date.isoformat()
     }
 
+@app.post("/api/nota/create-batch")
+async def create_notas(
+    order_ids: List[str],
+    due_days: int = 60,
+    qr_format: str = "png",
+    current_user: User = Depends(check_role([UserRole.ADMIN])),
+    db: Session = Depends(get_db)
+):
+    """Create banyak nota sekaligus, QR dirender paralel dan di-stream (NDJSON)"""
+    if qr_format not in QR_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown QR format: {qr_format}")
+    
+    request = BulkNotaRequest(order_ids=order_ids, due_days=due_days, qr_format=qr_format)
+    rows = nota_issuance_service.prepare_rows(
+        nota_issuance_service.find_orders(db, request), due_days
+    )
+    failed = nota_issuance_service.insert_chunked(db, rows, request.chunk_size)
+    created = {row["qr_code"]: row for row in rows if row["order_id"] not in failed}
+    found_ids = {row["order_id"] for row in rows}
+    
+    async def stream_notas():
+        for order_id in order_ids:
+            if order_id not in found_ids:
+                yield json.dumps({"order_id": order_id, "error": "Order not found or nota already issued"}) + "\n"
+            elif order_id in failed:
+                yield json.dumps({"order_id": order_id, "error": failed[order_id]}) + "\n"
+        
+        async for qr_hash, qr_image in payment_service.qr_renderer.render_many(
+            ((qr_hash, qr_hash) for qr_hash in created), qr_format
+        ):
+            row = created[qr_hash]
+            yield json.dumps({
+                "nota_id": row["id"],
+                "order_id": row["order_id"],
+                "nota_number": row["nota_number"],
+                "qr_code": qr_image,
+                "amount": row["amount"],
+                "due_date": row["due_date"].isoformat()
+            }) + "\n"
+    
+    return StreamingResponse(stream_notas(), media_type="application/x-ndjson")
+
+@app.post("/api/nota/issue-bulk")
+async def issue_notas_bulk(
+    request: BulkNotaRequest,
+    current_user: User = Depends(check_role([UserRole.ADMIN])),
+    db: Session = Depends(get_db)
+):
+    """Month-end billing: terbitkan nota untuk daftar/filter order sekaligus"""
+    if request.qr_format not in QR_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown QR format: {request.qr_format}")
+    if request.order_ids is None and not (request.customer_id or request.created_from or request.created_to):
+        raise HTTPException(status_code=400, detail="Provide order_ids or at least one filter")
+    
+    result = await nota_issuance_service.issue_bulk(db, request)
+    logger.info(
+        f"Bulk nota issuance: {result['created']}/{result['total_orders']} created "
+        f"in {result['elapsed_seconds']}s ({result['notas_per_second']} notas/s)"
+    )
+    return result
+
 @app.post("/api/payment/initiate")
 async def initiate_payment(
     payment_data: PaymentRequest,
@@ -468,9 +603,14 @@ async def confirm_deposit(
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
 
-    # Update payment attributes - direct assignment works for SQLAlchemy instances
-    payment.deposited_at = datetime.utcnow()  # type: ignore
-    payment.status = PaymentStatus.COMPLETED  # type: ignore
+    # Klaim atomik: konfirmasi kedua (double click / retry) tidak mencatat rollup
+    # dan penalti fraud score dua kali
+    claimed = db.query(Payment).filter(
+        Payment.id == payment_id, Payment.status != PaymentStatus.COMPLETED
+    ).update({Payment.deposited_at: datetime.utcnow(), Payment.status: PaymentStatus.COMPLETED},
+             synchronize_session="fetch")
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Payment already confirmed")
     
     # Calculate delay
     created_at = cast(datetime, payment.created_at)
@@ -484,13 +624,15 @@ async def confirm_deposit(
         nota.status = NotaStatus.PAID  # type: ignore
         nota.payment_date = datetime.utcnow()  # type: ignore
     
+    salesman = db.query(User).filter(User.id == payment.salesman_id).first()
+    if salesman:
+        sales_rollups.record_payment(db, salesman_scope(salesman), cast(float, payment.amount), created_at)
+    
     # Update salesman fraud score if late
     late_deposit_hours = cast(float, payment.late_deposit_hours)
-    if late_deposit_hours > 0:
-        salesman = db.query(User).filter(User.id == payment.salesman_id).first()
-        if salesman:
-            current_fraud_score = cast(float, salesman.fraud_score)
-            salesman.fraud_score = min(current_fraud_score + 0.05, 1.0)  # type: ignore
+    if late_deposit_hours > 0 and salesman:
+        current_fraud_score = cast(float, salesman.fraud_score)
+        salesman.fraud_score = min(current_fraud_score + 0.05, 1.0)  # type: ignore
     
     db.commit()
     
@@ -507,79 +649,41 @@ async def create_order(
     current_user: User = Depends(check_role([UserRole.SALES_TOKO, UserRole.SALES_PROJECT])),
     db: Session = Depends(get_db)
 ):
-    """Create new order"""
+    """Create new order (harga divalidasi ke price list, item di-insert bulk)"""
     try:
-        # Check customer credit limit
-        customer = db.query(Customer).filter(Customer.id == customer_id).first()
-        if not customer:
-            raise HTTPException(status_code=404, detail="Customer not found")
-        
-        # Calculate total
-        total_amount = sum(item["quantity"] * item["unit_price"] for item in items)
-        
-        # Check credit limit - cast to avoid type checker issues
-        credit_used = cast(float, customer.credit_used)
-        credit_limit = cast(float, customer.credit_limit)
-        if credit_used + total_amount > credit_limit:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Order exceeds credit limit. Available: {credit_limit - credit_used}"
-            )
-        
-        # Generate order number
-        import random
-        order_number = f"ORD{datetime.now().strftime('%Y%m%d')}{random.randint(1000, 9999)}"
-        
-        # Create order
-        order = Order(
-            order_number=order_number,
+        order_input = OrderInput(
             customer_id=customer_id,
-            salesman_id=current_user.id,
-            total_amount=total_amount,
-            status=OrderStatus.ORDER
+            items=[OrderItemInput(**item) for item in items]
         )
+        return order_ingestion.create_order(db, current_user, order_input)
         
-        db.add(order)
-        db.flush()
-        
-        # Add order items
-        for item in items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item["product_id"],
-                quantity=item["quantity"],
-                unit_price=item["unit_price"],
-                total_price=item["quantity"] * item["unit_price"]
-            )
-            db.add(order_item)
-        
-        # Update customer credit
-        customer.credit_used += total_amount  # type: ignore
-        
-        db.commit()
-        
-        return {
-            "order_id": order.id,
-            "order_number": order_number,
-            "total_amount": total_amount,
-            "status": "created"
-        }
-        
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        db.rollback()
         logger.error(f"Order creation error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/api/orders/create-batch")
+async def create_orders_batch(
+    orders: List[OrderInput],
+    current_user: User = Depends(check_role([UserRole.SALES_TOKO, UserRole.SALES_PROJECT])),
+    db: Session = Depends(get_db)
+):
+    """Create banyak order sekaligus (sync dari mobile app), hasil per order"""
+    try:
+        return order_ingestion.create_orders(db, current_user, orders)
+    except Exception as e:
+        logger.error(f"Batch order creation error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
 # ============= DASHBOARD & ANALYTICS =============
 @app.get("/api/dashboard/sales")
 async def sales_dashboard(
     period: str = "daily",  # daily, weekly, monthly
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get sales dashboard based on user role"""
-    from sqlalchemy import func
-    
+    """Get sales dashboard based on user role (dari tabel rollup)"""
     # Calculate date range
     end_date = datetime.utcnow()
     if period == "daily":
@@ -589,97 +693,69 @@ async def sales_dashboard(
     else:
         start_date = end_date - timedelta(days=30)
     
-    # Base query
-    query = db.query(
-        func.count(Order.id).label("total_orders"),
-        func.sum(Order.total_amount).label("total_sales"),
-        func.avg(Order.total_amount).label("avg_order_value")
-    ).filter(Order.created_at.between(start_date, end_date))
-    
     # Filter based on role
+    salesman_ids = None
     if current_user.role in [UserRole.SALES_TOKO, UserRole.SALES_PROJECT]:
-        query = query.filter(Order.salesman_id == current_user.id)
-    elif current_user.role.value == UserRole.SUPERVISOR_TOKO.value:
-        # Get all sales in toko areas
-        sales_users = db.query(User).filter(User.role == UserRole.SALES_TOKO).all()
-        sales_ids = [u.id for u in sales_users]
-        query = query.filter(Order.salesman_id.in_(sales_ids))
-    
-    result = query.first()
-    
-    # Get visits data
-    visits_query = db.query(func.count(SalesVisit.id)).filter(
-        SalesVisit.check_in.between(start_date, end_date)
-    )
-    
-    if current_user.role in [UserRole.SALES_TOKO, UserRole.SALES_PROJECT]:
-        visits_query = visits_query.filter(SalesVisit.salesman_id == current_user.id)
-    
-    total_visits = visits_query.scalar()
-    
-    # Get payment collections
-    payments_query = db.query(
-        func.count(Payment.id).label("total_payments"),
-        func.sum(Payment.amount).label("total_collected")
-    ).filter(
-        Payment.created_at.between(start_date, end_date),
-        Payment.status == PaymentStatus.COMPLETED
-    )
-    
-    if current_user.role in [UserRole.SALES_TOKO, UserRole.SALES_PROJECT]:
-        payments_query = payments_query.filter(Payment.salesman_id == current_user.id)
+        salesman_ids = [current_user.id]
+    elif current_user.role in [UserRole.SUPERVISOR_TOKO, UserRole.SUPERVISOR_PROJECT]:
+        # Sales di tim supervisor (dari team index, tanpa query users)
+        salesman_ids = team_index.team_of(current_user.id)
     
-    payment_result = payments_query.first()
+    totals = sales_rollups.summarize(db, start_date, end_date, salesman_ids=salesman_ids)
+    total_orders = int(totals["orders_count"])
+    total_sales = float(totals["sales_amount"])
+    total_visits = int(totals["visits_count"])
     
     return {
         "period": period,
         "sales": {
-            "total_orders": getattr(result, 'total_orders', 0) or 0,
-            "total_sales": float(getattr(result, 'total_sales', 0) or 0),
-            "avg_order_value": float(getattr(result, 'avg_order_value', 0) or 0)
+            "total_orders": total_orders,
+            "total_sales": total_sales,
+            "avg_order_value": total_sales / total_orders if total_orders else 0.0
         },
         "visits": {
-            "total": total_visits or 0,
+            "total": total_visits,
             "avg_per_day": total_visits / (1 if period == "daily" else 7 if period == "weekly" else 30)
         },
         "collections": {
-            "total_payments": getattr(payment_result, 'total_payments', 0) or 0,
-            "total_amount": float(getattr(payment_result, 'total_collected', 0) or 0)
+            "total_payments": int(totals["payments_count"]),
+            "total_amount": float(totals["payments_amount"])
         }
     }
 
 @app.get("/api/dashboard/fraud-alerts")
 async def fraud_alerts(
     current_user: User = Depends(check_role([UserRole.SUPERVISOR_TOKO, UserRole.SUPERVISOR_PROJECT, UserRole.MANAGER, UserRole.OWNER])),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get fraud alerts and suspicious activities"""
+    """Get fraud alerts and suspicious activities (bounded; use /feed for paging)"""
     # Get recent fraud logs
-    fraud_logs = db.query(FraudDetectionLog).order_by(
-        FraudDetectionLog.created_at.desc()
-    ).limit(50).all()
+    feed = fraud_alert_feed.fetch(db, limit=50, scope_user_ids=alert_scope(current_user))
     
     # Get high-risk users
-    high_risk_users = db.query(User).filter(
+    high_risk_users = db.query(User.id, User.name, User.role, User.fraud_score).filter(
         User.fraud_score > Config.FRAUD_THRESHOLD
-    ).all()
+    ).order_by(User.fraud_score.desc()).limit(50).all()
     
     # Get late deposits
-    late_payments = db.query(Payment).filter(
+    late_payments = db.query(
+        Payment.id, Payment.salesman_id, Payment.amount, Payment.late_deposit_hours
+    ).filter(
         Payment.late_deposit_hours > 0,
         Payment.deposited_at == None
-    ).all()
+    ).order_by(Payment.late_deposit_hours.desc()).limit(50).all()
     
     return {
         "fraud_logs": [
             {
-                "id": log.id,
-                "type": log.fraud_type,
-                "entity": log.entity_type,
-                "score": log.fraud_score,
-                "timestamp": log.created_at.isoformat()
-            } for log in fraud_logs
+                "id": log["id"],
+                "type": log["type"],
+                "entity": log["entity"],
+                "score": log["score"],
+                "timestamp": log["timestamp"]
+            } for log in feed["alerts"]
         ],
+        "next_cursor": feed["next_cursor"],
         "high_risk_users": [
             {
                 "id": user.id,
@@ -698,6 +774,141 @@ async def fraud_alerts(
         ]
     }
 
+@app.get("/api/dashboard/fraud-alerts/feed")
+async def fraud_alert_feed_page(
+    cursor: Optional[str] = None,
+    direction: str = "older",
+    limit: int = 50,
+    fraud_type: Optional[List[str]] = Query(None),
+    user_id: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: User = Depends(check_role([UserRole.SUPERVISOR_TOKO, UserRole.SUPERVISOR_PROJECT, UserRole.MANAGER, UserRole.OWNER])),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Keyset-paginated fraud alert feed.
+    direction=older pages back in time; direction=newer returns deltas since the cursor.
+    """
+    try:
+        return fraud_alert_feed.fetch(
+            db,
+            cursor=cursor,
+            direction=direction,
+            limit=limit,
+            fraud_types=fraud_type,
+            user_id=user_id,
+            min_score=min_score,
+            max_score=max_score,
+            since=since,
+            until=until,
+            scope_user_ids=alert_scope(current_user)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/dashboard/fraud-alerts/summary")
+async def fraud_alert_summary(
+    current_user: User = Depends(check_role([UserRole.SUPERVISOR_TOKO, UserRole.SUPERVISOR_PROJECT, UserRole.MANAGER, UserRole.OWNER])),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Fraud alert counters plus high-risk and late-deposit counts.
+    Manager/owner: counter in-memory global. Supervisor: hanya salesman di timnya.
+    """
+    from sqlalchemy import func
+    
+    scope_user_ids = alert_scope(current_user)
+    high_risk_query = db.query(func.count(User.id)).filter(User.fraud_score > Config.FRAUD_THRESHOLD)
+    pending_deposit_query = db.query(func.count(Payment.id)).filter(
+        Payment.late_deposit_hours > 0,
+        Payment.deposited_at == None
+    )
+    if scope_user_ids is None:
+        alerts = fraud_alert_counters.snapshot()
+        # Log yang dibuang writer tidak masuk counter; tampilkan supaya tidak diam-diam hilang
+        alerts["log_writer"] = fraud_log_writer.stats()
+    else:
+        alerts = fraud_alert_counters.snapshot_for(db, scope_user_ids)
+        high_risk_query = high_risk_query.filter(User.id.in_(scope_user_ids))
+        pending_deposit_query = pending_deposit_query.filter(Payment.salesman_id.in_(scope_user_ids))
+    high_risk_count = high_risk_query.scalar()
+    pending_deposit_count = pending_deposit_query.scalar()
+    
+    return {
+        "alerts": alerts,
+        "high_risk_users": high_risk_count or 0,
+        "pending_deposits": pending_deposit_count or 0
+    }
+
+@app.get("/api/dashboard/fraud-alerts/stream")
+async def fraud_alert_stream(
+    request: Request,
+    cursor: Optional[str] = None,
+    current_user: User = Depends(check_role([UserRole.SUPERVISOR_TOKO, UserRole.SUPERVISOR_PROJECT, UserRole.MANAGER, UserRole.OWNER])),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Server-Sent Events: alert di-push segera setelah commit.
+    Jika cursor dikirim, alert yang terlewat sejak cursor dikirim dulu.
+    Event 'resync' berarti client tertinggal dan harus mengambil ulang lewat /feed.
+    """
+    subscription = alert_broker.subscribe(current_user.id, alert_scope(current_user))
+    try:
+        backlog = fraud_alert_feed.fetch(
+            db, cursor=cursor, direction="newer", limit=fraud_alert_feed.MAX_LIMIT,
+            scope_user_ids=alert_scope(current_user)
+        ) if cursor else None
+    except ValueError as e:
+        alert_broker.unsubscribe(subscription)
+        raise HTTPException(status_code=400, detail=str(e))
+    db.close()
+
+    def sse(event: str, data: Dict, event_id: Optional[str] = None) -> str:
+        lines = [f"event: {event}"]
+        if event_id:
+            lines.append(f"id: {event_id}")
+        lines.append(f"data: {json.dumps(data)}")
+        return "\n".join(lines) + "\n\n"
+
+    async def stream_alerts():
+        try:
+            sent_ids = set()
+            if backlog:
+                for alert in backlog["alerts"]:
+                    sent_ids.add(alert["id"])
+                    yield sse("alert", alert, alert["id"])
+                if backlog["has_more"]:
+                    yield sse("resync", {"cursor": backlog["next_cursor"]})
+
+            while not await request.is_disconnected():
+                try:
+                    alert = await asyncio.wait_for(subscription.queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Keepalive + refresh scope tim supervisor
+                    scope = alert_scope(current_user)
+                    subscription.scope = set(scope) if scope is not None else None
+                    yield ": keepalive\n\n"
+                    continue
+                dropped = subscription.take_dropped()
+                if dropped:
+                    yield sse("resync", {"dropped": dropped})
+                if alert["id"] in sent_ids:
+                    # Sudah terkirim lewat backlog
+                    sent_ids.discard(alert["id"])
+                    continue
+                yield sse("alert", alert, alert["id"])
+        finally:
+            alert_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream_alerts(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ============= BACKGROUND TASKS =============
 async def train_fraud_model_for_user(employee_id: str):
     """Background task to train ML model for new user"""
@@ -712,7 +923,7 @@ async def analyze_payment_pattern(salesman_id: str, nota_id: str):
         
         if fraud_score > Config.FRAUD_THRESHOLD:
             # Create alert
-            fraud_log = FraudDetectionLog(
+            fraud_log_writer.log(
                 entity_type="payment_pattern",
                 entity_id=nota_id,
                 user_id=salesman_id,
@@ -721,8 +932,6 @@ async def analyze_payment_pattern(salesman_id: str, nota_id: str):
                 detection_method="ml_analysis",
                 action_taken="flagged_for_review"
             )
-            db.add(fraud_log)
-            db.commit()
     finally:
         db.close()
 
@@ -1,12 +1,15 @@
 # backend/app/models/__init__.py
-from .database import (
-    User, Customer, Nota, Payment, FraudDetectionLog,
-    UserRole, AreaType, NotaStatus, PaymentStatus,
-    SessionLocal, get_db, create_tables
-)
+# Satu registry model: app.models.database (satu Base, satu MetaData).
+# Di-import lazy, jadi `import app.models` belum membuat engine atau mapper.
+import importlib
 
 __all__ = [
     "User", "Customer", "Nota", "Payment", "FraudDetectionLog",
-    "UserRole", "AreaType", "NotaStatus", "PaymentStatus", 
+    "UserRole", "AreaType", "NotaStatus", "PaymentStatus",
     "SessionLocal", "get_db", "create_tables"
 ]
+
+def __getattr__(name):
+    if name in __all__:
+        return getattr(importlib.import_module(f"{__name__}.database"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
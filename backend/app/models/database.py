@@ -3,19 +3,129 @@
 Database Models untuk GAJAH NUSA ERP Anti-Fraud System
 """
 
-from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, Boolean, Text, JSON, ForeignKey, Enum
+from sqlalchemy import create_engine, inspect, text, Table, Index, Column, String, Integer, Float, DateTime, Boolean, Text, JSON, ForeignKey, Enum, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, synonym, deferred
 from datetime import datetime
 import uuid
 import enum
+import json
+import time
+
+from app.core.sqlite import install_pragmas
 
 # Database configuration
 import os
-DATABASE_URL = f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'erp_antifraud.db')}"  # Using SQLite for development
+SQLITE_URL = f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'erp_antifraud.db')}"  # Using SQLite for development
+DATABASE_URL = os.getenv("DATABASE_URL", SQLITE_URL)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")  # Read replica untuk dashboard (opsional)
+
+class PoolConfig:
+    POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+    MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+class KeyConfig:
+    # uuid4: String(36) acak (skema lama)
+    # uuid7: String(36) urut waktu, skema sama, insert append-only di B-tree
+    # uuid7_binary: 16 byte (BLOB / native UUID di PostgreSQL), API tetap string UUID
+    MODE = os.getenv("DB_KEY_MODE", "uuid4")
+
+KEY_MODES = ("uuid4", "uuid7", "uuid7_binary")
+
+def uuid7() -> str:
+    """UUIDv7 (RFC 9562): 48 bit unix ms + 74 bit acak, urut menurut waktu"""
+    ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (ms & 0xFFFFFFFFFFFF) << 80 | 0x7 << 76 | (rand >> 62 & 0xFFF) << 64 | 0b10 << 62 | rand & ((1 << 62) - 1)
+    return str(uuid.UUID(int=value))
+
+def new_id() -> str:
+    """Default primary key sesuai DB_KEY_MODE"""
+    return str(uuid.uuid4()) if KeyConfig.MODE == "uuid4" else uuid7()
+
+class GUID(TypeDecorator):
+    """
+    Kolom id/foreign key. Di Python selalu string UUID; di DB String(36)
+    atau 16 byte tergantung key mode engine (lihat build_engine).
+    """
+    impl = String(36)
+    cache_ok = True
+
+    @staticmethod
+    def _binary(dialect) -> bool:
+        return getattr(dialect, "key_mode", KeyConfig.MODE) == "uuid7_binary"
+
+    def load_dialect_impl(self, dialect):
+        if not self._binary(dialect):
+            return dialect.type_descriptor(String(36))
+        if dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import UUID  # import dialect hanya jika dipakai
+            return dialect.type_descriptor(UUID(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not self._binary(dialect) or dialect.name == "postgresql":
+            return value
+        if isinstance(value, bytes):
+            return value
+        if isinstance(value, uuid.UUID):
+            return value.bytes
+        raw = bytes.fromhex(value.replace("-", ""))  # lebih cepat dari uuid.UUID(value)
+        if len(raw) != 16:
+            raise ValueError(f"Invalid UUID: {value!r}")
+        return raw
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return value
+        if isinstance(value, (bytes, memoryview)):
+            h = bytes(value).hex()
+            return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+        return str(value)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+def compact_json(value) -> str:
+    """Serializer kolom JSON tanpa spasi (details fraud log dll)"""
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+def build_engine(url: str, key_mode: str = None):
+    """Engine dari URL: SQLite untuk development, QueuePool + pre-ping untuk PostgreSQL"""
+    key_mode = key_mode or KeyConfig.MODE
+    if key_mode not in KEY_MODES:
+        raise ValueError(f"Unknown DB_KEY_MODE: {key_mode}")
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("sqlite"):
+        # WAL, busy_timeout dll per koneksi (lihat core/sqlite.py)
+        engine = install_pragmas(
+            create_engine(url, connect_args={"check_same_thread": False}, json_serializer=compact_json)
+        )
+        engine.dialect.key_mode = key_mode
+        return engine
+
+    connect_args = {}
+    if url.startswith("postgresql"):
+        connect_args["options"] = f"-c statement_timeout={PoolConfig.STATEMENT_TIMEOUT_MS}"
+    engine = create_engine(
+        url,
+        pool_size=PoolConfig.POOL_SIZE,
+        max_overflow=PoolConfig.MAX_OVERFLOW,
+        pool_timeout=PoolConfig.POOL_TIMEOUT,
+        pool_recycle=PoolConfig.POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+        json_serializer=compact_json
+    )
+    engine.dialect.key_mode = key_mode  # dibaca GUID per dialect
+    return engine
+
+engine = build_engine(DATABASE_URL)
+read_engine = build_engine(DATABASE_READ_URL) if DATABASE_READ_URL else engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 # Enums
@@ -27,6 +137,8 @@ class UserRole(str, enum.Enum):
     MANAGER = "manager"
     ADMIN = "admin"
     OWNER = "owner"
+    DRIVER = "driver"
+    GUDANG = "gudang"
 
 class AreaType(str, enum.Enum):
     URBAN = "urban"
@@ -64,8 +176,12 @@ class VisitStatus(str, enum.Enum):
 # Models
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_role", "role"),
+        Index("ix_users_fraud_score", "fraud_score"),
+    )
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     employee_id = Column(String(20), unique=True, nullable=False, index=True)
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, nullable=False, index=True)
@@ -78,8 +194,11 @@ class User(Base):
     phone_office = Column(String(20), nullable=True)
     
     # Security fields
-    face_encoding = Column(Text, nullable=True)
+    face_encoding = deferred(Column(Text, nullable=True))  # Legacy base64, tidak ikut di-load
+    face_photo_ref = Column(String(80), nullable=True)  # sha256:<hex> di blob store
     fingerprint_hash = Column(String(255), nullable=True)
+    ktp_photo_url = Column(String(255), nullable=True)
+    profile_photo_url = Column(String(255), nullable=True)
     fraud_score = Column(Float, default=0.0)
     
     # Timestamps
@@ -88,26 +207,47 @@ class User(Base):
     last_login = Column(DateTime, nullable=True)
     is_active = Column(Boolean, default=True)
     
+    # Employment (employee_id_service)
+    hired_date = Column(DateTime, default=datetime.utcnow)
+    departure_date = Column(DateTime, nullable=True)
+    departure_reason = Column(String(100), nullable=True)
+    departure_note = Column(Text, nullable=True)
+    
     # Relationships
     payments = relationship("Payment", back_populates="salesman")
     fraud_logs = relationship("FraudDetectionLog", back_populates="user")
 
 class Customer(Base):
     __tablename__ = "customers"
+    __table_args__ = (
+        Index("ix_customers_area_code", "area_code"),
+    )
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     customer_code = Column(String(20), unique=True, nullable=False, index=True)
     name = Column(String(100), nullable=False)
-    type = Column(String(50), nullable=False)  # toko, warung, supermarket
+    type = Column(String(50), nullable=False)  # toko, warung, supermarket, project
+    owner_name = Column(String(100), nullable=True)
     address = Column(Text, nullable=False)
     phone_store = Column(String(20), nullable=True)
     phone_owner = Column(String(20), nullable=False)
     email = Column(String(100), nullable=True)
     
+    # Registration & KYC
+    ktp_number = Column(String(20), nullable=True)
+    ktp_photo_url = Column(String(255), nullable=True)
+    store_photo_url = Column(String(255), nullable=True)
+    qr_code = Column(String(100), nullable=True)  # QR untuk absensi
+    status = Column(String(20), default="pending")  # pending, approved, rejected
+    approved_by = Column(GUID, ForeignKey("users.id"), nullable=True)
+    approved_at = Column(DateTime, nullable=True)
+    rejection_reason = Column(Text, nullable=True)
+    created_by = Column(GUID, ForeignKey("users.id"), nullable=True)
+    
     # Geographic data
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
-    area_code = Column(String(10), nullable=False)
+    area_code = Column(String(50), nullable=False)
     
     # Business data
     credit_limit = Column(Float, default=0.0)
@@ -119,17 +259,26 @@ class Customer(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = Column(Boolean, default=True)
     
+    # Nama lama dari registrasi toko
+    store_name = synonym("name")
+    customer_type = synonym("type")
+    area = synonym("area_code")
+    
     # Relationships
     notas = relationship("Nota", back_populates="customer")
     payments = relationship("Payment", back_populates="customer")
 
 class Nota(Base):
     __tablename__ = "notas"
+    __table_args__ = (
+        Index("ix_notas_order_id", "order_id"),
+    )
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     nota_number = Column(String(30), unique=True, nullable=False, index=True)
-    customer_id = Column(String(36), ForeignKey("customers.id"), nullable=False)
-    salesman_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    customer_id = Column(GUID, ForeignKey("customers.id"), nullable=False)
+    salesman_id = Column(GUID, ForeignKey("users.id"), nullable=False)
+    order_id = Column(GUID, ForeignKey("orders.id"), nullable=True)
     
     # Financial data
     amount = Column(Float, nullable=False)
@@ -140,6 +289,9 @@ class Nota(Base):
     # Security & tracking
     qr_code = Column(Text, nullable=False)  # Unique hash for QR
     qr_scan_count = Column(Integer, default=0)
+    original_hash = Column(String(255), nullable=True)  # Hash nota asli
+    is_verified = Column(Boolean, default=False)
+    verification_photo_url = Column(String(255), nullable=True)
     status = Column(Enum(NotaStatus), default=NotaStatus.DRAFT)
     
     # Geographic data
@@ -150,6 +302,9 @@ class Nota(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     due_date = Column(DateTime, nullable=False)
+    payment_date = Column(DateTime, nullable=True)
+    overdue_days = Column(Integer, default=0)
+    last_reminder_sent = Column(DateTime, nullable=True)
     
     # Relationships
     customer = relationship("Customer", back_populates="notas")
@@ -158,11 +313,16 @@ class Nota(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_salesman_created", "salesman_id", "created_at"),
+        Index("ix_payments_created_at", "created_at"),
+        Index("ix_payments_pending_deposit", "deposited_at", "late_deposit_hours"),
+    )
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    nota_id = Column(String(36), ForeignKey("notas.id"), nullable=False)
-    customer_id = Column(String(36), ForeignKey("customers.id"), nullable=False)
-    salesman_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    nota_id = Column(GUID, ForeignKey("notas.id"), nullable=False)
+    customer_id = Column(GUID, ForeignKey("customers.id"), nullable=False)
+    salesman_id = Column(GUID, ForeignKey("users.id"), nullable=False)
     
     # Payment data
     amount = Column(Float, nullable=False)
@@ -200,7 +360,7 @@ class Payment(Base):
 class Product(Base):
     __tablename__ = "products"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     product_code = Column(String(20), unique=True, nullable=False, index=True)
     name = Column(String(100), nullable=False)
     description = Column(Text, nullable=True)
@@ -212,7 +372,8 @@ class Product(Base):
     selling_price = Column(Float, nullable=False)
     
     # Stock
-    stock_quantity = Column(Integer, default=0)
+    stock_quantity = Column(Integer, default=0)  # stok gudang
+    stock_vehicle = Column(Integer, default=0)  # stok di kendaraan sales
     min_stock = Column(Integer, default=0)
     
     # Status
@@ -224,11 +385,16 @@ class Product(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_created_at", "created_at"),
+        Index("ix_orders_customer_id", "customer_id"),
+        Index("ix_orders_salesman_created", "salesman_id", "created_at"),
+    )
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     order_number = Column(String(30), unique=True, nullable=False, index=True)
-    customer_id = Column(String(36), ForeignKey("customers.id"), nullable=False)
-    salesman_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    customer_id = Column(GUID, ForeignKey("customers.id"), nullable=False)
+    salesman_id = Column(GUID, ForeignKey("users.id"), nullable=False)
     
     # Order data
     total_amount = Column(Float, nullable=False)
@@ -256,10 +422,13 @@ class Order(Base):
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+    )
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String(36), ForeignKey("orders.id"), nullable=False)
-    product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    order_id = Column(GUID, ForeignKey("orders.id"), nullable=False)
+    product_id = Column(GUID, ForeignKey("products.id"), nullable=False)
     
     # Item data
     quantity = Column(Integer, nullable=False)
@@ -276,10 +445,15 @@ class OrderItem(Base):
 
 class SalesVisit(Base):
     __tablename__ = "sales_visits"
+    __table_args__ = (
+        Index("ix_sales_visits_salesman_check_in", "salesman_id", "check_in"),
+        Index("ix_sales_visits_check_in", "check_in"),
+        Index("ix_sales_visits_selfie_url", "selfie_url"),
+    )
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    salesman_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    customer_id = Column(String(36), ForeignKey("customers.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    salesman_id = Column(GUID, ForeignKey("users.id"), nullable=False)
+    customer_id = Column(GUID, ForeignKey("customers.id"), nullable=False)
     
     # Visit data
     visit_type = Column(String(20), nullable=False)  # regular, follow_up, emergency
@@ -295,6 +469,7 @@ class SalesVisit(Base):
     gps_longitude = Column(Float, nullable=True)
     gps_accuracy = Column(Float, nullable=True)
     location_valid = Column(Boolean, default=False)
+    selfie_url = Column(String(255), nullable=True)  # sha256:<hex> di blob store
     
     # Anti-fraud detection
     qr_fraud_attempt = Column(Boolean, default=False)
@@ -316,12 +491,21 @@ class SalesVisit(Base):
     salesman = relationship("User")
     customer = relationship("Customer")
 
+class SalesVisitArchive(Base):
+    """Kunjungan lama (cold) yang dipindah dari sales_visits oleh visit_archive_service"""
+    __table__ = Table(
+        "sales_visits_archive", Base.metadata,
+        *(column._copy() for column in SalesVisit.__table__.columns),
+        Index("ix_sales_visits_archive_salesman_check_in", "salesman_id", "check_in"),
+        Index("ix_sales_visits_archive_selfie_url", "selfie_url"),
+    )
+
 class Delivery(Base):
     __tablename__ = "deliveries"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String(36), ForeignKey("orders.id"), nullable=False)
-    driver_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=new_id)
+    order_id = Column(GUID, ForeignKey("orders.id"), nullable=False)
+    driver_id = Column(GUID, ForeignKey("users.id"), nullable=False)
     
     # Delivery data
     delivery_date = Column(DateTime, nullable=False)
@@ -352,11 +536,16 @@ class Delivery(Base):
 
 class FraudDetectionLog(Base):
     __tablename__ = "fraud_detection_logs"
+    __table_args__ = (
+        Index("ix_fraud_logs_detected", "detected_at", "id"),
+        Index("ix_fraud_logs_user_detected", "user_id", "detected_at"),
+        Index("ix_fraud_logs_type", "fraud_type"),
+    )
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(GUID, primary_key=True, default=new_id)
     entity_type = Column(String(20), nullable=False)  # payment, nota, login
     entity_id = Column(String(36), nullable=False)
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=True)
+    user_id = Column(GUID, ForeignKey("users.id"), nullable=True)
     
     # Fraud detection data
     fraud_type = Column(String(50), nullable=False)
@@ -372,13 +561,129 @@ class FraudDetectionLog(Base):
     # Timestamps
     detected_at = Column(DateTime, default=datetime.utcnow)
     resolved_at = Column(DateTime, nullable=True)
+    created_at = synonym("detected_at")
     
     # Relationships
     user = relationship("User", back_populates="fraud_logs")
 
+class EmployeeHistory(Base):
+    __tablename__ = "employee_history"
+    
+    id = Column(Integer, primary_key=True)
+    original_employee_id = Column(String(20), nullable=False, index=True)
+    original_name = Column(String(100), nullable=False)
+    replacement_name = Column(String(100), nullable=False)
+    new_employee_name = Column(String(100), nullable=False)
+    reuse_date = Column(DateTime, nullable=False)
+    reason = Column(String(50), nullable=False)  # ID_REUSE, RESTRUCTURE, etc.
+    notes = Column(Text, nullable=True)
+
+class CreditLedgerEntry(Base):
+    __tablename__ = "credit_ledger"
+    
+    id = Column(GUID, primary_key=True, default=new_id)
+    customer_id = Column(GUID, ForeignKey("customers.id"), nullable=False, index=True)
+    order_id = Column(GUID, nullable=True)
+    
+    # Ledger data
+    entry_type = Column(String(20), nullable=False)  # reserve
+    amount = Column(Float, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class DocumentSequence(Base):
+    __tablename__ = "document_sequences"
+    
+    name = Column(String(20), primary_key=True)  # ORD, NT
+    day = Column(String(8), primary_key=True)  # YYYYMMDD
+    last_value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SalesRollup(Base):
+    __tablename__ = "sales_rollups"
+    
+    granularity = Column(String(4), primary_key=True)  # hour, day
+    bucket = Column(DateTime, primary_key=True)  # awal jam / awal hari (UTC)
+    salesman_id = Column(GUID, ForeignKey("users.id"), primary_key=True)
+    role = Column(String(30), nullable=True)
+    area = Column(String(50), nullable=True)
+    
+    # Aggregates
+    orders_count = Column(Integer, default=0)
+    sales_amount = Column(Float, default=0.0)
+    visits_count = Column(Integer, default=0)
+    payments_count = Column(Integer, default=0)
+    payments_amount = Column(Float, default=0.0)
+
+class SyncChange(Base):
+    __tablename__ = "sync_changes"
+    __table_args__ = (
+        Index("ix_sync_changes_scope", "entity", "scope", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)  # token sync, naik terus
+    entity = Column(String(20), nullable=False)  # customers, products, orders
+    entity_id = Column(GUID, nullable=False)
+    op = Column(String(6), nullable=False)  # upsert, delete
+    scope = Column(String(50), nullable=True)  # area_code / salesman_id, NULL = semua device
+    changed_at = Column(DateTime, default=datetime.utcnow)
+
+class ProcessedSyncAction(Base):
+    __tablename__ = "processed_sync_actions"
+    
+    idempotency_key = Column(String(64), primary_key=True)  # dari device, atau hash isi action
+    action_type = Column(String(20), nullable=False)
+    result = Column(JSON, nullable=True)  # hasil yang dikembalikan lagi saat replay
+    processed_at = Column(DateTime, default=datetime.utcnow)
+
+class SyncFieldClock(Base):
+    """Last-writer-wins per field untuk edit offline (waktu edit di device)"""
+    __tablename__ = "sync_field_clocks"
+    
+    entity = Column(String(30), primary_key=True)
+    entity_id = Column(GUID, primary_key=True)
+    field = Column(String(50), primary_key=True)
+    updated_at = Column(DateTime, nullable=False)
+    device_id = Column(String(64), nullable=True)
+
 # Create all tables
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    ensure_indexes()
+
+def add_missing_columns():
+    """create_all tidak mengubah tabel lama: tambahkan kolom nullable baru dengan ALTER TABLE"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable or column.primary_key:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+
+def ensure_indexes(bind=None):
+    """
+    Migrasi index: buat index yang dideklarasikan di model tapi belum ada di DB
+    (create_all tidak menambah index ke tabel yang sudah ada). Return nama index baru.
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=bind)
+                created.append(index.name)
+    return created
 
 # Dependency untuk mendapatkan database session
 def get_db():
@@ -387,3 +692,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Session read-only untuk query dashboard (replica jika DATABASE_READ_URL diset)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
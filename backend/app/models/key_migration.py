@@ -0,0 +1,64 @@
+# backend/app/models/key_migration.py
+"""
+Migrasi Key - salin database lama (String(36) UUID) ke database baru dengan DB_KEY_MODE lain
+ID yang dilihat API tidak berubah: UUID yang sama, hanya format simpannya (mis. 16 byte).
+
+    cd backend
+    python -m app.models.key_migration --target sqlite:///erp_antifraud_v7.db --mode uuid7_binary
+"""
+
+import argparse
+import time
+from typing import Dict
+
+from sqlalchemy import func, inspect, insert, select
+
+from app.models.database import Base, DATABASE_URL, KEY_MODES, build_engine
+
+def migrate_keys(source_engine, target_engine, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Salin semua tabel model (urut foreign key) dari source ke target dalam batch.
+    Konversi id dilakukan tipe GUID di masing-masing engine. Target harus kosong.
+    Return jumlah baris per tabel.
+    """
+    Base.metadata.create_all(bind=target_engine)
+    inspector = inspect(source_engine)
+    copied = {}
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        # DB lama bisa belum punya kolom baru; kolom itu memakai default di target
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        columns = [column for column in table.columns if column.name in existing]
+        count = 0
+        with source_engine.connect() as source, target_engine.begin() as target:
+            result = source.execution_options(yield_per=batch_size).execute(select(*columns))
+            for rows in result.mappings().partitions():
+                target.execute(insert(table), [dict(row) for row in rows])
+                count += len(rows)
+        with target_engine.connect() as target:
+            migrated = target.execute(select(func.count()).select_from(table)).scalar()
+        if migrated != count:
+            raise RuntimeError(f"{table.name}: copied {count} rows but target has {migrated}")
+        copied[table.name] = count
+    return copied
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Salin database ke key mode baru")
+    parser.add_argument("--source", default=DATABASE_URL)
+    parser.add_argument("--source-mode", default="uuid4", choices=KEY_MODES)
+    parser.add_argument("--target", required=True)
+    parser.add_argument("--mode", default="uuid7_binary", choices=KEY_MODES)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    copied = migrate_keys(
+        build_engine(args.source, key_mode=args.source_mode),
+        build_engine(args.target, key_mode=args.mode),
+        batch_size=args.batch_size
+    )
+    for name, count in copied.items():
+        print(f"{name:<24} {count:>10}")
+    print(f"\nSelesai dalam {time.perf_counter() - started:.1f} s")
+    print(f"Set DATABASE_URL={args.target} dan DB_KEY_MODE={args.mode} lalu restart backend")
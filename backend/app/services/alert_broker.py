@@ -0,0 +1,84 @@
+# backend/app/services/alert_broker.py
+"""
+Alert Broker - pub/sub in-process untuk push fraud alert ke supervisor
+Setiap subscriber punya queue terbatas; client lambat kehilangan alert
+terlama dan menerima event resync supaya mengambil ulang lewat feed.
+"""
+
+import asyncio
+import itertools
+import threading
+from typing import Dict, List, Optional, Set
+
+# ============= SUBSCRIPTION =============
+class AlertSubscription:
+    def __init__(self, subscription_id: int, user_id: str, scope: Optional[Set[str]],
+                 loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.id = subscription_id
+        self.user_id = user_id
+        self.scope = scope  # None = semua alert
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, alert: Dict) -> bool:
+        if self.scope is None:
+            return True
+        return alert.get("user_id") is None or alert.get("user_id") in self.scope
+
+    def _offer(self, alert: Dict):
+        """Dijalankan di event loop subscriber"""
+        if self.queue.full():
+            # Back-pressure: buang alert terlama, client diberi tahu untuk resync
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(alert)
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+# ============= BROKER =============
+class AlertBroker:
+    QUEUE_SIZE = 100
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._subscriptions: Dict[int, AlertSubscription] = {}
+
+    def subscribe(self, user_id: str, scope: Optional[List[str]] = None) -> AlertSubscription:
+        """Harus dipanggil dari dalam event loop (endpoint async)"""
+        subscription = AlertSubscription(
+            next(self._ids), user_id, set(scope) if scope is not None else None,
+            asyncio.get_running_loop(), self.queue_size
+        )
+        with self._lock:
+            self._subscriptions[subscription.id] = subscription
+        return subscription
+
+    def unsubscribe(self, subscription: AlertSubscription):
+        with self._lock:
+            self._subscriptions.pop(subscription.id, None)
+
+    def publish(self, alert: Dict):
+        """Thread-safe, boleh dipanggil dari thread mana pun (mis. after_commit)"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+        for subscription in subscriptions:
+            if not subscription.wants(alert):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, alert)
+            except RuntimeError:
+                # Event loop subscriber sudah ditutup
+                self.unsubscribe(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+# Initialize broker
+alert_broker = AlertBroker()
@@ -8,7 +8,6 @@ from fastapi import HTTPException, Depends, File, UploadFile, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional, List, Dict
-# import face_recognition  # TODO: Install face_recognition library
 # import numpy as np  # Commented out due to compatibility issues
 # import cv2  # Commented out due to compatibility issues
 import jwt
@@ -26,7 +25,15 @@ import redis
 from sqlalchemy.orm import Session
 
 # Import models dari file sebelumnya
-from models.database import User, Customer, Nota, Payment, FraudDetectionLog, SessionLocal, NotaStatus, PaymentStatus
+from app.models.database import User, Customer, Nota, Payment, FraudDetectionLog, SessionLocal, NotaStatus, PaymentStatus
+from app.services.qr_service import qr_renderer, QRConfig
+from app.services.team_index import team_index
+from app.services.fraud_log_writer import fraud_log_writer
+from app.services.blob_store import blob_store
+from app.services.login_history import login_history, device_fingerprint
+from app.services.face_embedding_service import (
+    face_embeddings, extract_embedding, FaceConfig, FaceRecognitionUnavailable
+)
 
 # ============= CONFIG =============
 class Config:
@@ -99,34 +106,76 @@ class AuthService:
     
     # ============= FACE RECOGNITION =============
     async def register_face(self, face_image_base64: str, user_id: str, db: Session):
-        """Register face encoding untuk user - Simplified version"""
+        """Register face embedding untuk user (foto di blob store, embedding di face_embeddings)"""
         try:
-            # TODO: Implement actual face recognition
-            # For now, just store the base64 image
+            # Foto disimpan di blob store, row user hanya menyimpan referensi
             user = db.query(User).filter(User.id == user_id).first()
-            user.face_encoding = face_image_base64  # Store base64 for now
+            blob = blob_store.save_base64(face_image_base64)
+            user.face_photo_ref = blob["ref"]
             db.commit()
             
+            embedding = self._embedding_from_blob(blob["ref"])
+            if embedding is None:
+                return {"message": "Face registered, but no face detected in photo"}
+            
+            # Cek pendaftaran ganda (wajah sama dengan karyawan lain)
+            matches = face_embeddings.search(embedding, top_k=1, exclude=user_id)
+            face_embeddings.enroll(user_id, embedding)
+            if matches and matches[0][1] >= FaceConfig.MATCH_THRESHOLD:
+                fraud_log_writer.log(
+                    entity_type="user",
+                    entity_id=user_id,
+                    user_id=user_id,
+                    fraud_type="duplicate_face_enrolment",
+                    fraud_score=matches[0][1],
+                    detection_method="face_embedding_search",
+                    action_taken="flagged_for_review",
+                    details={"matched_user_id": matches[0][0], "similarity": round(matches[0][1], 4)}
+                )
+            
             return {"message": "Face registered successfully"}
             
+        except FaceRecognitionUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Face registration failed: {str(e)}")
     
     async def verify_face(self, face_image_base64: str, user_id: str, db: Session):
-        """Verify face untuk login - Simplified version"""
+        """Verify face untuk login: similarity embedding terhadap wajah terdaftar"""
         try:
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user or not user.face_encoding:
-                return False
+            if not face_embeddings.has(user_id):
+                # User lama: enrol dari foto yang sudah tersimpan
+                face_ref = db.query(User.face_photo_ref, User.face_encoding).filter(User.id == user_id).first()
+                if not face_ref or not (face_ref.face_photo_ref or face_ref.face_encoding):
+                    return False
+                photo_ref = face_ref.face_photo_ref
+                if not photo_ref:
+                    # Pindahkan foto legacy ke blob store sekali, row user menyimpan referensinya
+                    photo_ref = blob_store.save_base64(face_ref.face_encoding)["ref"]
+                    db.query(User).filter(User.id == user_id).update(
+                        {User.face_photo_ref: photo_ref}, synchronize_session=False
+                    )
+                    db.commit()
+                enrolled = self._embedding_from_blob(photo_ref)
+                if enrolled is None:
+                    return False
+                face_embeddings.enroll(user_id, enrolled)
             
-            # TODO: Implement actual face comparison
-            # For now, just check if face image exists
-            return len(face_image_base64) > 100  # Simple check
+            probe = extract_embedding(base64.b64decode(face_image_base64.split(",", 1)[-1]))
+            if probe is None:
+                return False
+            return face_embeddings.verify(user_id, probe)
             
+        except FaceRecognitionUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             print(f"Face verification error: {str(e)}")
             return False
     
+    def _embedding_from_blob(self, ref: str):
+        with open(blob_store.path_for(ref), "rb") as f:
+            return extract_embedding(f.read())
+    
     # ============= PASSWORD & TOKEN =============
     def hash_password(self, password: str) -> str:
         return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
@@ -201,11 +250,14 @@ class AuthService:
                 await self.log_fraud_attempt(user.id, "failed_face_recognition", login_data, db)
                 raise HTTPException(status_code=401, detail="Face verification failed")
         
-        # Check for suspicious location
-        if login_data.latitude and login_data.longitude:
-            location_valid = await self.verify_location(user, login_data.latitude, login_data.longitude)
-            if not location_valid:
-                await self.log_fraud_attempt(user.id, "suspicious_location", login_data, db)
+        # Check for suspicious location / device (satu fraud event untuk semua temuan)
+        risk = self.assess_login(user, login_data)
+        if risk["reasons"]:
+            fraud_type = "suspicious_location" if risk["impossible_travel"] else "new_device"
+            await self.log_fraud_attempt(user.id, fraud_type, login_data, db,
+                                         fraud_score=risk["score"], risk=risk)
+        login_history.record(user.id, login_data.latitude, login_data.longitude,
+                             device_fingerprint(login_data.device_info))
         
         # Update last login
         user.last_login = datetime.utcnow()
@@ -227,48 +279,49 @@ class AuthService:
             }
         }
     
-    async def log_fraud_attempt(self, user_id: str, fraud_type: str, data: LoginRequest, db: Session):
+    def assess_login(self, user: User, login_data: LoginRequest) -> Dict:
+        """Skor impossible travel + device baru dari ring buffer riwayat login"""
+        return login_history.score(
+            user.id, login_data.latitude, login_data.longitude,
+            device_fingerprint(login_data.device_info)
+        )
+    
+    async def log_fraud_attempt(self, user_id: str, fraud_type: str, data: LoginRequest, db: Session,
+                                fraud_score: float = 0.8, risk: Optional[Dict] = None):
         """Log suspicious login attempts"""
-        fraud_log = FraudDetectionLog(
+        details = {
+            "latitude": data.latitude,
+            "longitude": data.longitude,
+            "device_info": data.device_info,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        if risk:
+            details["risk"] = risk
+        fraud_log_writer.log(
             entity_type="login",
             entity_id=user_id,
             user_id=user_id,
             fraud_type=fraud_type,
-            fraud_score=0.8,
+            fraud_score=fraud_score,
             detection_method="login_validation",
-            details={
-                "latitude": data.latitude,
-                "longitude": data.longitude,
-                "device_info": data.device_info,
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            details=details
         )
-        db.add(fraud_log)
-        db.commit()
 
 # ============= NOTA & PAYMENT ANTI-FRAUD =============
 class PaymentAntifraudService:
     def __init__(self):
         self.twilio_client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
+        self.qr_renderer = qr_renderer
     
-    def generate_nota_qr(self, nota_id: str, nota_number: str, amount: float) -> str:
-        """Generate unique QR code untuk nota"""
-        # Create unique hash
+    def nota_qr_hash(self, nota_id: str, nota_number: str, amount: float) -> str:
+        """Create unique hash untuk isi QR nota"""
         data = f"{nota_id}|{nota_number}|{amount}|{datetime.utcnow().isoformat()}"
-        hash_value = hashlib.sha256(data.encode()).hexdigest()
-        
-        # Generate QR
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(hash_value)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to base64
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        
+        return hashlib.sha256(data.encode()).hexdigest()
+    
+    def generate_nota_qr(self, nota_id: str, nota_number: str, amount: float, fmt: str = QRConfig.DEFAULT_FORMAT):
+        """Generate unique QR code untuk nota"""
+        hash_value = self.nota_qr_hash(nota_id, nota_number, amount)
+        img_str = self.qr_renderer.render(hash_value, fmt)
         return hash_value, img_str
     
     async def verify_nota_qr(self, nota_data: NotaVerification, db: Session):
@@ -281,7 +334,7 @@ class PaymentAntifraudService:
         # Check QR code
         if nota.qr_code != nota_data.qr_code:
             # Log fraud attempt
-            fraud_log = FraudDetectionLog(
+            fraud_log_writer.log(
                 entity_type="nota",
                 entity_id=nota.id,
                 fraud_type="invalid_qr_code",
@@ -289,8 +342,6 @@ class PaymentAntifraudService:
                 detection_method="qr_verification",
                 details={"provided_qr": nota_data.qr_code, "expected_qr": nota.qr_code}
             )
-            db.add(fraud_log)
-            db.commit()
             
             raise HTTPException(status_code=400, detail="Invalid QR code")
         
@@ -303,7 +354,7 @@ class PaymentAntifraudService:
         
         # Check for multiple scans (potential fraud)
         if nota.qr_scan_count > 3:
-            fraud_log = FraudDetectionLog(
+            fraud_log_writer.log(
                 entity_type="nota",
                 entity_id=nota.id,
                 fraud_type="excessive_qr_scans",
@@ -311,7 +362,6 @@ class PaymentAntifraudService:
                 detection_method="scan_count_check",
                 details={"scan_count": nota.qr_scan_count}
             )
-            db.add(fraud_log)
         
         # Update status
         nota.status = NotaStatus.PROCESS_PAYMENT
@@ -413,7 +463,7 @@ class PaymentAntifraudService:
             payment.late_deposit_hours = 24
             
             # Create fraud log
-            fraud_log = FraudDetectionLog(
+            fraud_log_writer.log(
                 entity_type="payment",
                 entity_id=payment.id,
                 user_id=payment.salesman_id,
@@ -427,7 +477,6 @@ class PaymentAntifraudService:
                     "hours_late": 24
                 }
             )
-            db.add(fraud_log)
             
             # Update salesman fraud score
             salesman = db.query(User).filter(User.id == payment.salesman_id).first()
@@ -441,14 +490,12 @@ class PaymentAntifraudService:
     
     async def send_fraud_alert(self, salesman_id: str, payment_id: str, db: Session):
         """Send fraud alert to supervisors"""
-        # Get supervisors
-        supervisors = db.query(User).filter(
-            User.role.in_(['supervisor_toko', 'manager'])
-        ).all()
+        # Get supervisors (from in-memory team index)
+        supervisors = team_index.users_with_roles('supervisor_toko', 'manager')
         
         for supervisor in supervisors:
             # In production, send actual notification
-            print(f"FRAUD ALERT to {supervisor.name}: Payment {payment_id} by {salesman_id} not deposited")
+            print(f"FRAUD ALERT to {supervisor['name']}: Payment {payment_id} by {salesman_id} not deposited")
 
 # ============= ML FRAUD DETECTION ENGINE =============
 class MLFraudDetector:
@@ -0,0 +1,157 @@
+# backend/app/services/blob_store.py
+"""
+Blob Store - penyimpanan file content-addressed di filesystem lokal
+Upload di-stream per chunk ke disk, dedupe berdasarkan SHA-256,
+thumbnail dibuat di thread background. DB hanya menyimpan referensi.
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from fastapi import UploadFile
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# ============= CONFIG =============
+class BlobConfig:
+    ROOT = os.getenv("BLOB_STORE_DIR", os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "blobs"
+    ))
+    CHUNK_SIZE = 64 * 1024
+    MAX_BYTES = int(os.getenv("BLOB_MAX_BYTES", str(10 * 1024 * 1024)))
+    THUMBNAIL_SIZE = (256, 256)
+    THUMBNAIL_WORKERS = 2
+
+REF_PREFIX = "sha256:"
+
+class BlobTooLargeError(ValueError):
+    pass
+
+def digest_of(ref: str) -> str:
+    if not ref or not ref.startswith(REF_PREFIX):
+        raise ValueError(f"Invalid blob reference: {ref}")
+    digest = ref[len(REF_PREFIX):]
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        raise ValueError(f"Invalid blob reference: {ref}")
+    return digest
+
+# ============= BLOB STORE =============
+class BlobStore:
+    def __init__(self, root: str = BlobConfig.ROOT, max_bytes: int = BlobConfig.MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ----- paths -----
+    def path_for(self, ref: str) -> str:
+        digest = digest_of(ref)
+        return os.path.join(self.root, "objects", digest[:2], digest[2:4], digest)
+
+    def thumbnail_path_for(self, ref: str) -> str:
+        digest = digest_of(ref)
+        return os.path.join(self.root, "thumbs", digest[:2], f"{digest}.jpg")
+
+    def exists(self, ref: str) -> bool:
+        return os.path.exists(self.path_for(ref))
+
+    # ----- write -----
+    async def save_upload(self, upload: UploadFile, thumbnail: bool = True) -> Dict:
+        """Stream UploadFile ke disk per chunk tanpa memuat seluruh file ke memory"""
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = await upload.read(BlobConfig.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise BlobTooLargeError(f"Upload exceeds {self.max_bytes} bytes")
+                    hasher.update(chunk)
+                    out.write(chunk)
+            ref = REF_PREFIX + hasher.hexdigest()
+            self._commit(tmp_path, ref)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if thumbnail:
+            self.schedule_thumbnail(ref)
+        return {"ref": ref, "size": size, "content_type": upload.content_type}
+
+    def save_bytes(self, data: bytes, thumbnail: bool = True) -> Dict:
+        if len(data) > self.max_bytes:
+            raise BlobTooLargeError(f"Blob exceeds {self.max_bytes} bytes")
+        ref = REF_PREFIX + hashlib.sha256(data).hexdigest()
+        if not self.exists(ref):
+            tmp_dir = os.path.join(self.root, "tmp")
+            os.makedirs(tmp_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    out.write(data)
+                self._commit(tmp_path, ref)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        if thumbnail:
+            self.schedule_thumbnail(ref)
+        return {"ref": ref, "size": len(data)}
+
+    def save_base64(self, data_base64: str, thumbnail: bool = True) -> Dict:
+        # Terima data URL (data:image/jpeg;base64,...) maupun base64 biasa
+        if data_base64.startswith("data:") and "," in data_base64:
+            data_base64 = data_base64.split(",", 1)[1]
+        return self.save_bytes(base64.b64decode(data_base64), thumbnail)
+
+    def _commit(self, tmp_path: str, ref: str):
+        """Pindahkan file sementara ke lokasi final; blob yang sama tidak ditulis ulang"""
+        final_path = self.path_for(ref)
+        if os.path.exists(final_path):
+            return
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+
+    # ----- thumbnails -----
+    def schedule_thumbnail(self, ref: str):
+        if os.path.exists(self.thumbnail_path_for(ref)):
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=BlobConfig.THUMBNAIL_WORKERS,
+                                                thread_name_prefix="blob-thumb")
+        self._executor.submit(self.make_thumbnail, ref)
+
+    def make_thumbnail(self, ref: str) -> Optional[str]:
+        thumb_path = self.thumbnail_path_for(ref)
+        if os.path.exists(thumb_path):
+            return thumb_path
+        try:
+            with Image.open(self.path_for(ref)) as img:
+                img.thumbnail(BlobConfig.THUMBNAIL_SIZE)
+                os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+                tmp_path = f"{thumb_path}.{os.getpid()}.tmp"
+                img.convert("RGB").save(tmp_path, format="JPEG", quality=80)
+                os.replace(tmp_path, thumb_path)
+            return thumb_path
+        except Exception as e:
+            # Bukan gambar / file rusak: blob tetap disimpan tanpa thumbnail
+            logger.error(f"Thumbnail error for {ref}: {str(e)}")
+            return None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+# Initialize store
+blob_store = BlobStore()
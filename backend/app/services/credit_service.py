@@ -0,0 +1,62 @@
+# backend/app/services/credit_service.py
+"""
+Credit Ledger Service - reservasi credit limit customer secara atomik
+Satu UPDATE bersyarat, aman dari race condition order paralel
+"""
+
+from datetime import datetime
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.models.database import Customer, CreditLedgerEntry, new_id
+
+class InsufficientCreditError(Exception):
+    def __init__(self, customer_id: str, available: float):
+        self.customer_id = customer_id
+        self.available = available
+        super().__init__(f"Order exceeds credit limit. Available: {available}")
+
+# ============= CREDIT LEDGER SERVICE =============
+class CreditLedgerService:
+    def available_credit(self, db: Session, customer_id: str) -> float:
+        row = db.query(Customer.credit_limit, Customer.credit_used).filter(
+            Customer.id == customer_id
+        ).first()
+        if not row:
+            return 0.0
+        return (row.credit_limit or 0.0) - (row.credit_used or 0.0)
+
+    def reserve(self, db: Session, customer_id: str, amount: float, order_id: str = None):
+        """
+        Reservasi credit dengan satu UPDATE bersyarat:
+        UPDATE customers SET credit_used = credit_used + :amt
+        WHERE id = :id AND credit_used + :amt <= credit_limit
+        Tidak commit - ikut transaksi pemanggil.
+        """
+        result = db.execute(
+            update(Customer)
+            .where(
+                Customer.id == customer_id,
+                Customer.credit_used + amount <= Customer.credit_limit
+            )
+            .values(credit_used=Customer.credit_used + amount)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise InsufficientCreditError(customer_id, self.available_credit(db, customer_id))
+
+        self._record(db, customer_id, order_id, "reserve", amount)
+
+    def _record(self, db: Session, customer_id: str, order_id: str, entry_type: str, amount: float):
+        db.execute(insert(CreditLedgerEntry).values(
+            id=new_id(),
+            customer_id=customer_id,
+            order_id=order_id,
+            entry_type=entry_type,
+            amount=amount,
+            created_at=datetime.utcnow()
+        ))
+
+# Initialize service
+credit_ledger = CreditLedgerService()
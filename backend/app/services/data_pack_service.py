@@ -0,0 +1,223 @@
+# backend/app/services/data_pack_service.py
+"""
+Data Pack Service - data offline yang sudah jadi per area dan per katalog
+Customer per area dan katalog produk sama untuk semua salesman di area itu,
+jadi dibangun sekali di background sebagai file JSON gzip content-addressed
+(nama file = hash isi = ETag). Sync pagi cukup baca file, tanpa query.
+Pack dibangun ulang hanya jika sync_changes mencatat perubahan di scope-nya.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal, Customer, Product, SyncChange
+from app.services.sync_service import customer_dict, product_dict, catalog_visible, encode_token
+
+logger = logging.getLogger(__name__)
+
+# ============= CONFIG =============
+class DataPackConfig:
+    ROOT = os.getenv("DATA_PACK_DIR", os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data_packs"
+    ))
+    INTERVAL_SECONDS = int(os.getenv("DATA_PACK_INTERVAL", "60"))  # 0 = builder background mati
+    COMPRESS_LEVEL = 6
+
+CATALOG = "catalog"
+MANIFEST = "manifest.json"
+
+def area_pack(area: Optional[str]) -> str:
+    """Nama pack customer satu area (customer tanpa area_code: area:_)"""
+    return f"area:{area if area is not None else '_'}"
+
+def _pack_area(name: str) -> Optional[str]:
+    area = name[len("area:"):]
+    return None if area == "_" else area
+
+def _valid_file_name(file_name: str) -> bool:
+    stem, _, ext = file_name.partition(".")
+    return ext == "json.gz" and len(stem) == 64 and all(c in "0123456789abcdef" for c in stem)
+
+# ============= BUILDER =============
+class DataPackBuilder:
+    def __init__(self, root: str = DataPackConfig.ROOT, session_factory=SessionLocal):
+        self.root = root
+        self.session_factory = session_factory
+        self._manifest: Optional[Dict] = None
+        self._manifest_mtime = 0.0
+        self._files: Dict[str, bytes] = {}
+        self._build_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ----- build -----
+    def build(self, db: Session) -> Dict:
+        """
+        Bangun ulang pack yang berubah sejak manifest terakhir.
+        Semua pack di manifest valid per manifest["version"] (id sync_changes),
+        perubahan sesudahnya dikirim lewat delta sync.
+        """
+        with self._build_lock:
+            previous = self.manifest()
+            version = db.query(func.max(SyncChange.id)).scalar() or 0
+            stale = self._stale_packs(db, previous, version)
+
+            packs = dict(previous["packs"]) if previous else {}
+            for name in sorted(stale, key=str):
+                packs[name] = self._write_pack(name, self._pack_rows(db, name))
+
+            manifest = {"version": version, "built_at": datetime.utcnow().isoformat(), "packs": packs}
+            self._write_atomic(MANIFEST, json.dumps(manifest).encode())
+            self._cleanup(manifest, previous)
+            logger.info(f"Data packs v{version}: {len(stale)} dibangun ulang dari {len(packs)}")
+            return manifest
+
+    def _stale_packs(self, db: Session, previous: Optional[Dict], version: int) -> set:
+        """Satu query GROUP BY ke change log; belum ada manifest: bangun semua"""
+        if previous is None:
+            areas = {row.area_code for row in db.query(Customer.area_code).distinct()}
+            return {CATALOG, *(area_pack(area) for area in areas)}
+
+        stale = set()
+        changes = db.query(SyncChange.entity, SyncChange.scope).filter(
+            SyncChange.id > previous["version"], SyncChange.id <= version,
+            SyncChange.entity.in_(("customers", "products"))
+        ).group_by(SyncChange.entity, SyncChange.scope)
+        for entity, scope in changes:
+            stale.add(CATALOG if entity == "products" else area_pack(scope))
+        return stale
+
+    def _pack_rows(self, db: Session, name: str) -> Dict:
+        if name == CATALOG:
+            rows = db.query(Product).filter(catalog_visible()).order_by(Product.id)
+            return {"products": [product_dict(row) for row in rows]}
+        rows = db.query(Customer).filter(
+            Customer.is_active.isnot(False), Customer.area_code == _pack_area(name)
+        ).order_by(Customer.id)
+        return {"customers": [customer_dict(row) for row in rows]}
+
+    def _write_pack(self, name: str, payload: Dict) -> Dict:
+        """Nama file dari hash isi: isi sama = file dan ETag sama (device dapat 304)"""
+        raw = json.dumps({"pack": name, **payload}, separators=(",", ":"), sort_keys=True, default=str).encode()
+        digest = hashlib.sha256(raw).hexdigest()
+        file_name = f"{digest}.json.gz"
+        path = os.path.join(self.root, file_name)
+        if not os.path.exists(path):
+            # mtime=0: hasil gzip deterministik
+            self._write_atomic(file_name, gzip.compress(raw, DataPackConfig.COMPRESS_LEVEL, mtime=0))
+        return {
+            "file": file_name,
+            "etag": f'"{digest[:32]}"',
+            "size": os.path.getsize(path),
+            "count": sum(len(rows) for rows in payload.values())
+        }
+
+    def _write_atomic(self, file_name: str, content: bytes):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(content)
+            os.replace(tmp_path, os.path.join(self.root, file_name))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _cleanup(self, manifest: Dict, previous: Optional[Dict]):
+        """Simpan file manifest sekarang dan sebelumnya (device yang sedang download)"""
+        keep = {pack["file"] for m in (manifest, previous) if m for pack in m["packs"].values()}
+        for file_name in os.listdir(self.root):
+            if _valid_file_name(file_name) and file_name not in keep:
+                os.remove(os.path.join(self.root, file_name))
+
+    # ----- read -----
+    def manifest(self) -> Optional[Dict]:
+        """Manifest terbaru; dibaca ulang jika worker lain sudah membangun versi baru"""
+        path = os.path.join(self.root, MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+        if self._manifest is None or mtime != self._manifest_mtime:
+            with open(path, "rb") as f:
+                self._manifest = json.loads(f.read())
+            self._manifest_mtime = mtime
+            current = {pack["file"] for pack in self._manifest["packs"].values()}
+            self._files = {name: data for name, data in self._files.items() if name in current}
+        return self._manifest
+
+    def packs_for(self, db: Session, areas: List[str]) -> Dict:
+        """
+        Daftar pack untuk salesman: katalog + customer per area (tanpa area: semua area).
+        Setelah semua pack dimuat, device lanjut /api/sync/download dengan sync_token ini
+        (order salesman, lalu delta sejak versi pack).
+        """
+        manifest = self.manifest() or self.build(db)
+        packs = manifest["packs"]
+        names = [CATALOG] + ([area_pack(area) for area in areas] if areas
+                             else sorted(name for name in packs if name != CATALOG))
+        return {
+            "version": manifest["version"],
+            "built_at": manifest["built_at"],
+            "sync_token": encode_token(manifest["version"], "orders", ""),
+            "packs": [
+                {"name": name, "url": f"/api/sync/packs/file/{packs[name]['file']}", **packs[name]}
+                for name in names if name in packs
+            ]
+        }
+
+    def read(self, file_name: str) -> Optional[bytes]:
+        """Isi file pack (gzip), di-cache di memory selama masih di manifest"""
+        if not _valid_file_name(file_name):
+            return None
+        data = self._files.get(file_name)
+        if data is None:
+            try:
+                with open(os.path.join(self.root, file_name), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+            self._files[file_name] = data
+        return data
+
+    # ----- background -----
+    def start(self, interval: int = DataPackConfig.INTERVAL_SECONDS, session_factory=None):
+        if interval <= 0 or self._thread is not None:
+            return
+        if session_factory is not None:
+            self.session_factory = session_factory
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="data-pack-builder", daemon=True)
+        self._thread.start()
+
+    def shutdown(self, timeout: float = 10.0):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout)
+
+    def _run(self, interval: int):
+        while True:
+            db = self.session_factory()
+            try:
+                self.build(db)
+            except Exception as e:
+                logger.error(f"Data pack build error: {str(e)}")
+            finally:
+                db.close()
+            if self._stop.wait(interval):
+                return
+
+# Initialize builder
+data_packs = DataPackBuilder()
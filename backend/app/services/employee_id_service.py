@@ -3,24 +3,16 @@ GAJAH NUSA ERP - Employee ID Management System
 Auto-generate Employee ID dengan reuse capability dan history tracking
 """
 
-from enum import Enum
+import sys
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Optional, Dict, List, Tuple
-from sqlalchemy import Column, String, DateTime, Boolean, Text, Integer
-from sqlalchemy.ext.declarative import declarative_base
 
-Base = declarative_base()
-
-class UserRole(Enum):
-    OWNER = "owner"
-    MANAGER = "manager" 
-    ADMIN = "admin"
-    SUPERVISOR_TOKO = "supervisor_toko"
-    SUPERVISOR_PROJECT = "supervisor_project"
-    SALES_TOKO = "sales_toko"
-    SALES_PROJECT = "sales_project"
-    DRIVER = "driver"
-    GUDANG = "gudang"
+try:
+    from app.models.database import User, EmployeeHistory, UserRole
+except ImportError:  # di-import sebagai services.employee_id_service (backend/app di sys.path)
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from app.models.database import User, EmployeeHistory, UserRole
 
 class EmployeeIDGenerator:
     """
@@ -181,47 +173,6 @@ class EmployeeIDGenerator:
         else:
             return f"{replacement_first} [Former]"
 
-class EmployeeHistory(Base):
-    """
-    Table untuk menyimpan history ID reuse
-    """
-    __tablename__ = "employee_history"
-    
-    id = Column(Integer, primary_key=True)
-    original_employee_id = Column(String(10), nullable=False)
-    original_name = Column(String(100), nullable=False)
-    replacement_name = Column(String(100), nullable=False)
-    new_employee_name = Column(String(100), nullable=False)
-    reuse_date = Column(DateTime(timezone=True), nullable=False)
-    reason = Column(String(50), nullable=False)  # ID_REUSE, RESTRUCTURE, etc.
-    notes = Column(Text)
-
-# Update User model untuk support departure tracking
-class User(Base):
-    __tablename__ = "users"
-    
-    id = Column(String(36), primary_key=True)
-    employee_id = Column(String(10), unique=True, nullable=False)  # OWN001, MGR001, etc.
-    name = Column(String(100), nullable=False)
-    email = Column(String(100), unique=True, nullable=False)
-    password_hash = Column(String(255), nullable=False)
-    role = Column(String(20), nullable=False)
-    area_type = Column(String(20))
-    area_detail = Column(String(100))
-    address = Column(Text)
-    phone_personal = Column(String(20))
-    phone_office = Column(String(20))
-    
-    # Status tracking
-    is_active = Column(Boolean, default=True)
-    hired_date = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    departure_date = Column(DateTime(timezone=True))
-    departure_reason = Column(String(100))
-    departure_note = Column(Text)
-    
-    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
-
 class EmployeeService:
     """
     Service untuk mengelola karyawan dengan auto ID generation
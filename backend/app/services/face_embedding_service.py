@@ -0,0 +1,301 @@
+# backend/app/services/face_embedding_service.py
+"""
+Face Embedding Service - penyimpanan embedding wajah di matrix memory-mapped
+Verifikasi 1:1 = satu dot product, pencarian 1:N (duplikasi pendaftaran)
+dijalankan per batch dengan NumPy di semua karyawan.
+"""
+
+import io
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    import face_recognition  # requirements-backend.txt, butuh dlib
+except ImportError:
+    face_recognition = None
+
+try:
+    import fcntl  # lock antar worker; tidak ada di Windows
+except ImportError:
+    fcntl = None
+
+class FaceRecognitionUnavailable(RuntimeError):
+    """face_recognition tidak terpasang dan fallback development tidak diaktifkan"""
+
+# ============= CONFIG =============
+class FaceConfig:
+    STORE_DIR = os.getenv("FACE_EMBEDDING_DIR", os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "embeddings"
+    ))
+    DIM = 128
+    # Cosine similarity minimum untuk dianggap orang yang sama
+    MATCH_THRESHOLD = float(os.getenv("FACE_MATCH_THRESHOLD", "0.94"))
+    INITIAL_CAPACITY = 1024
+    SEARCH_BATCH = 1024
+    # Fitur grayscale 16x8 tanpa face_recognition: HANYA development, tidak membedakan wajah.
+    # Diabaikan jika ENVIRONMENT=production.
+    DEV_FALLBACK = (os.getenv("FACE_DEV_FALLBACK", "false").lower() == "true"
+                    and os.getenv("ENVIRONMENT", "development") != "production")
+
+# ============= EXTRACTION =============
+def _normalize(vector: np.ndarray) -> Optional[np.ndarray]:
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0:
+        return None
+    return vector / norm
+
+def extract_embedding(image_bytes: bytes) -> Optional[np.ndarray]:
+    """
+    Embedding 128-d ter-normalisasi dari foto wajah (face_recognition).
+    Tanpa face_recognition: FaceRecognitionUnavailable, kecuali FACE_DEV_FALLBACK=true
+    (fitur grayscale 16x8, hanya untuk development).
+    """
+    if face_recognition is not None:
+        image = face_recognition.load_image_file(io.BytesIO(image_bytes))
+        encodings = face_recognition.face_encodings(image)
+        return _normalize(encodings[0]) if encodings else None
+    if not FaceConfig.DEV_FALLBACK:
+        raise FaceRecognitionUnavailable(
+            "face_recognition is not installed (pip install -r requirements-backend.txt); "
+            "set FACE_DEV_FALLBACK=true only for local development"
+        )
+
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        pixels = np.asarray(img.convert("L").resize((16, 8)), dtype=np.float32).reshape(-1)
+    return _normalize(pixels - pixels.mean())
+
+# ============= EMBEDDING STORE =============
+class FaceEmbeddingStore:
+    """
+    Matrix float32 (capacity x dim) di file memmap + index user_id -> row.
+    Row yang dihapus di-nol-kan sehingga tidak pernah match.
+
+    Beberapa worker (uvicorn --workers) boleh memakai direktori yang sama:
+    penulis mengambil flock eksklusif di index.lock dan memuat ulang index
+    sebelum mengalokasikan row; pembaca memuat ulang saat index.json berubah.
+    Tanpa fcntl (Windows) hanya boleh ada satu proses penulis.
+    """
+
+    def __init__(self, directory: str = FaceConfig.STORE_DIR, dim: int = FaceConfig.DIM):
+        self.directory = directory
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.memmap] = None
+        self._rows: Dict[str, int] = {}
+        self._count = 0
+        self._index_stamp = None
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.directory, "embeddings.f32")
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(self.directory, "index.lock")
+
+    def _stamp(self):
+        # index.json ditulis lewat os.replace: inode/mtime/size berubah setiap simpan.
+        # Cukup untuk pembaca; penulis tetap memuat ulang paksa di bawah lock.
+        try:
+            stat = os.stat(self._index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self, force: bool = False):
+        """Muat index + matrix; dimuat ulang jika index.json ditulis proses lain"""
+        stamp = self._stamp()
+        if not force and self._matrix is not None and stamp == self._index_stamp:
+            return
+        if stamp is None:
+            self._rows, self._count = {}, 0
+            self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        else:
+            with open(self._index_path) as f:
+                index = json.load(f)
+            self._rows, self._count = index["rows"], index["count"]
+            capacity = os.path.getsize(self._matrix_path) // (4 * self.dim)
+            self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._index_stamp = stamp
+
+    @contextmanager
+    def _writing(self):
+        """Satu penulis antar thread dan proses; index terbaru dimuat sebelum row dialokasikan"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._lock_path, "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._load(force=True)
+                    if self._matrix.shape[0] == 0:
+                        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="w+",
+                                                 shape=(FaceConfig.INITIAL_CAPACITY, self.dim))
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _allocate(self, user_id: str) -> int:
+        row = self._rows.get(user_id)
+        if row is None:
+            if self._count >= self._matrix.shape[0]:
+                self._grow()
+            row = self._count
+            self._count += 1
+            self._rows[user_id] = row
+        return row
+
+    def _grow(self):
+        """Gandakan kapasitas file memmap"""
+        old = self._matrix
+        capacity = old.shape[0] * 2
+        old.flush()
+        del self._matrix
+        with open(self._matrix_path, "r+b") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _save_index(self):
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"rows": self._rows, "count": self._count}, f, separators=(",", ":"))
+        os.replace(tmp_path, self._index_path)
+        self._index_stamp = self._stamp()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._rows)
+
+    def has(self, user_id: str) -> bool:
+        with self._lock:
+            self._load()
+            return user_id in self._rows
+
+    def enroll(self, user_id: str, embedding: np.ndarray):
+        vector = _normalize(embedding)
+        if vector is None or vector.shape[0] != self.dim:
+            raise ValueError("Invalid face embedding")
+        with self._writing():
+            row = self._allocate(user_id)  # bisa grow: ambil self._matrix setelahnya
+            self._matrix[row] = vector
+            self._matrix.flush()
+            self._save_index()
+
+    def enroll_many(self, embeddings: Dict[str, np.ndarray]):
+        """Enrol massal (migrasi/benchmark): satu flush dan satu tulis index"""
+        with self._writing():
+            for user_id, embedding in embeddings.items():
+                vector = _normalize(embedding)
+                if vector is None or vector.shape[0] != self.dim:
+                    continue
+                row = self._allocate(user_id)
+                self._matrix[row] = vector
+            self._matrix.flush()
+            self._save_index()
+
+    def remove(self, user_id: str):
+        with self._writing():
+            row = self._rows.pop(user_id, None)
+            if row is not None:
+                self._matrix[row] = 0.0
+                self._matrix.flush()
+                self._save_index()
+
+    def similarity(self, user_id: str, embedding: np.ndarray) -> Optional[float]:
+        """Verifikasi 1:1 - satu dot product"""
+        vector = _normalize(embedding)
+        with self._lock:
+            self._load()
+            row = self._rows.get(user_id)
+            if row is None or vector is None:
+                return None
+            return float(np.dot(self._matrix[row], vector))
+
+    def verify(self, user_id: str, embedding: np.ndarray,
+               threshold: float = FaceConfig.MATCH_THRESHOLD) -> bool:
+        score = self.similarity(user_id, embedding)
+        return score is not None and score >= threshold
+
+    def search(self, embedding: np.ndarray, top_k: int = 5,
+               exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Pencarian 1:N: user dengan similarity tertinggi"""
+        vector = _normalize(embedding)
+        if vector is None:
+            return []
+        with self._lock:
+            self._load()
+            count = self._count
+            scores = np.asarray(self._matrix[:count] @ vector)
+            users = {row: user_id for user_id, row in self._rows.items()}
+            if exclude is not None and exclude in self._rows:
+                scores[self._rows[exclude]] = -1.0
+        top_k = min(top_k, count)
+        if top_k == 0:
+            return []
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [(users[row], float(scores[row])) for row in top if row in users]
+
+    def find_duplicates(self, threshold: float = FaceConfig.MATCH_THRESHOLD,
+                        batch_size: int = FaceConfig.SEARCH_BATCH) -> List[Tuple[str, str, float]]:
+        """Semua pasangan karyawan dengan wajah mirip (pendaftaran ganda), batch matmul"""
+        with self._lock:
+            self._load()
+            count = self._count
+            matrix = np.asarray(self._matrix[:count])
+            users = {row: user_id for user_id, row in self._rows.items()}
+
+        pairs = []
+        for start in range(0, count, batch_size):
+            block = matrix[start:start + batch_size] @ matrix.T
+            rows, cols = np.nonzero(block >= threshold)
+            for r, c in zip(rows, cols):
+                i, j = start + int(r), int(c)
+                if i < j and i in users and j in users:
+                    pairs.append((users[i], users[j], float(block[r, c])))
+        pairs.sort(key=lambda pair: -pair[2])
+        return pairs
+
+# Initialize store
+face_embeddings = FaceEmbeddingStore()
+
+if __name__ == "__main__":
+    # Benchmark CPU: 10k wajah terdaftar
+    import tempfile
+    import time
+
+    store = FaceEmbeddingStore(tempfile.mkdtemp())
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((10000, FaceConfig.DIM)).astype(np.float32)
+
+    started = time.perf_counter()
+    store.enroll_many({f"user-{i}": vectors[i] for i in range(len(vectors))})
+    print(f"enrol 10k: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    probe = vectors[42] + rng.standard_normal(FaceConfig.DIM).astype(np.float32) * 0.05
+    started = time.perf_counter()
+    for _ in range(1000):
+        store.verify("user-42", probe)
+    print(f"verify 1:1: {(time.perf_counter() - started) * 1000:.3f} us/verify")
+
+    started = time.perf_counter()
+    for _ in range(100):
+        matches = store.search(probe, top_k=3)
+    print(f"search 1:N: {(time.perf_counter() - started) * 10:.2f} ms/search, top={matches[0]}")
+
+    started = time.perf_counter()
+    duplicates = store.find_duplicates()
+    print(f"duplicate scan 10k x 10k: {(time.perf_counter() - started) * 1000:.1f} ms, pairs={len(duplicates)}")
@@ -0,0 +1,220 @@
+# backend/app/services/fraud_alert_service.py
+"""
+Fraud Alert Service - feed alert dengan keyset cursor dan summary counter
+Supervisor cukup mengambil delta sejak cursor terakhir,
+alert baru juga di-push ke alert_broker setelah commit
+"""
+
+import base64
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, event, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal, FraudDetectionLog, UserRole
+from app.services.team_index import team_index
+from app.services.alert_broker import alert_broker
+
+# ============= CURSOR =============
+def encode_cursor(detected_at: datetime, log_id: str) -> str:
+    raw = f"{detected_at.isoformat()}|{log_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, log_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), log_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def alert_dict(row) -> Dict:
+    """Bentuk alert yang sama untuk feed, summary dan stream"""
+    return {
+        "id": row.id,
+        "type": row.fraud_type,
+        "entity": row.entity_type,
+        "entity_id": row.entity_id,
+        "user_id": row.user_id,
+        "score": row.fraud_score,
+        "method": row.detection_method,
+        "action": row.action_taken,
+        "timestamp": row.detected_at.isoformat() if row.detected_at else None
+    }
+
+# ============= SCOPE =============
+def alert_scope(user) -> Optional[List[str]]:
+    """
+    None = semua alert (manager/owner).
+    Supervisor hanya melihat alert salesman di timnya (+ alert tanpa user).
+    """
+    if user.role in [UserRole.SUPERVISOR_TOKO, UserRole.SUPERVISOR_PROJECT]:
+        return team_index.team_of(user.id)
+    return None
+
+# ============= COUNTERS =============
+class FraudAlertCounters:
+    """
+    Counter per fraud_type, di-seed sekali dengan GROUP BY lalu
+    dinaikkan dari event commit. Re-seed berkala untuk insert dari worker lain.
+    """
+    MAX_AGE_SECONDS = 300
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._by_type: Counter = Counter()
+        self._last_alert_at: Optional[datetime] = None
+        self._seeded_at = 0.0
+
+    def _ensure_seeded(self):
+        if time.monotonic() - self._seeded_at < self.MAX_AGE_SECONDS:
+            return
+        with self.session_factory() as db:
+            rows = db.query(FraudDetectionLog.fraud_type, func.count(FraudDetectionLog.id)).group_by(
+                FraudDetectionLog.fraud_type
+            ).all()
+            last_alert_at = db.query(func.max(FraudDetectionLog.detected_at)).scalar()
+        with self._lock:
+            self._by_type = Counter({fraud_type: count for fraud_type, count in rows})
+            self._last_alert_at = last_alert_at
+            self._seeded_at = time.monotonic()
+
+    def record(self, fraud_type: str, detected_at: Optional[datetime]):
+        if isinstance(detected_at, str):
+            detected_at = datetime.fromisoformat(detected_at)
+        with self._lock:
+            self._by_type[fraud_type] += 1
+            if detected_at and (self._last_alert_at is None or detected_at > self._last_alert_at):
+                self._last_alert_at = detected_at
+
+    def snapshot(self) -> Dict:
+        self._ensure_seeded()
+        with self._lock:
+            return {
+                "total": sum(self._by_type.values()),
+                "by_type": dict(self._by_type),
+                "last_alert_at": self._last_alert_at.isoformat() if self._last_alert_at else None
+            }
+
+    def snapshot_for(self, db: Session, scope_user_ids: List[str]) -> Dict:
+        """Counter untuk scope supervisor (salesman tim + alert tanpa user), langsung GROUP BY"""
+        scope = or_(FraudDetectionLog.user_id.in_(scope_user_ids), FraudDetectionLog.user_id.is_(None))
+        rows = db.query(FraudDetectionLog.fraud_type, func.count(FraudDetectionLog.id)).filter(scope).group_by(
+            FraudDetectionLog.fraud_type
+        ).all()
+        last_alert_at = db.query(func.max(FraudDetectionLog.detected_at)).filter(scope).scalar()
+        return {
+            "total": sum(count for _, count in rows),
+            "by_type": {fraud_type: count for fraud_type, count in rows},
+            "last_alert_at": last_alert_at.isoformat() if last_alert_at else None
+        }
+
+fraud_alert_counters = FraudAlertCounters()
+
+def _is_fraud_log(obj) -> bool:
+    return getattr(obj, "__tablename__", None) == "fraud_detection_logs"
+
+@event.listens_for(Session, "after_flush")
+def _collect_new_alerts(session, flush_context):
+    # Simpan nilai saat flush, setelah commit atribut sudah expired
+    new_logs = [alert_dict(obj) for obj in session.new if _is_fraud_log(obj)]
+    if new_logs:
+        session.info.setdefault("new_fraud_logs", []).extend(new_logs)
+
+def publish_alerts(alerts: List[Dict]):
+    """Naikkan counter dan push ke broker untuk alert yang sudah ter-commit"""
+    for alert in alerts:
+        fraud_alert_counters.record(alert["type"], alert["timestamp"])
+        alert_broker.publish(alert)
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_alerts(session):
+    publish_alerts(session.info.pop("new_fraud_logs", []))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_new_alerts(session):
+    session.info.pop("new_fraud_logs", None)
+
+# ============= FEED =============
+class FraudAlertFeed:
+    MAX_LIMIT = 200
+
+    def fetch(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        direction: str = "older",  # older: halaman berikutnya, newer: delta sejak cursor
+        limit: int = 50,
+        fraud_types: Optional[List[str]] = None,
+        user_id: Optional[str] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        scope_user_ids: Optional[List[str]] = None,
+    ) -> Dict:
+        if direction not in ("older", "newer"):
+            raise ValueError("direction must be 'older' or 'newer'")
+        limit = max(1, min(limit, self.MAX_LIMIT))
+
+        query = db.query(
+            FraudDetectionLog.id, FraudDetectionLog.fraud_type, FraudDetectionLog.entity_type,
+            FraudDetectionLog.entity_id, FraudDetectionLog.user_id, FraudDetectionLog.fraud_score,
+            FraudDetectionLog.detection_method, FraudDetectionLog.action_taken, FraudDetectionLog.detected_at
+        )
+
+        # Server-side filters
+        if fraud_types:
+            query = query.filter(FraudDetectionLog.fraud_type.in_(fraud_types))
+        if user_id:
+            query = query.filter(FraudDetectionLog.user_id == user_id)
+        if min_score is not None:
+            query = query.filter(FraudDetectionLog.fraud_score >= min_score)
+        if max_score is not None:
+            query = query.filter(FraudDetectionLog.fraud_score <= max_score)
+        if since:
+            query = query.filter(FraudDetectionLog.detected_at >= since)
+        if until:
+            query = query.filter(FraudDetectionLog.detected_at < until)
+        if scope_user_ids is not None:
+            query = query.filter(or_(
+                FraudDetectionLog.user_id.in_(scope_user_ids),
+                FraudDetectionLog.user_id.is_(None)
+            ))
+
+        # Keyset predicate pada (detected_at, id)
+        ts_col, id_col = FraudDetectionLog.detected_at, FraudDetectionLog.id
+        if cursor:
+            cursor_ts, cursor_id = decode_cursor(cursor)
+            if direction == "older":
+                query = query.filter(or_(ts_col < cursor_ts, and_(ts_col == cursor_ts, id_col < cursor_id)))
+            else:
+                query = query.filter(or_(ts_col > cursor_ts, and_(ts_col == cursor_ts, id_col > cursor_id)))
+
+        if direction == "older":
+            query = query.order_by(ts_col.desc(), id_col.desc())
+        else:
+            query = query.order_by(ts_col.asc(), id_col.asc())
+
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        if rows:
+            next_cursor = encode_cursor(rows[-1].detected_at, rows[-1].id)
+        else:
+            next_cursor = cursor
+
+        return {
+            "alerts": [alert_dict(row) for row in rows],
+            "next_cursor": next_cursor,
+            "has_more": has_more
+        }
+
+# Initialize service
+fraud_alert_feed = FraudAlertFeed()
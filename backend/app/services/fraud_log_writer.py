@@ -0,0 +1,194 @@
+# backend/app/services/fraud_log_writer.py
+"""
+Fraud Log Writer - write-behind untuk FraudDetectionLog
+Log dikumpulkan di buffer dan di-insert per batch oleh thread background,
+sehingga deteksi fraud tidak menambah commit di request path.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.models.database import SessionLocal, FraudDetectionLog, new_id
+from app.services.fraud_alert_service import alert_dict, publish_alerts
+
+logger = logging.getLogger(__name__)
+
+# ============= CONFIG =============
+class FraudLogConfig:
+    BATCH_SIZE = int(os.getenv("FRAUD_LOG_BATCH_SIZE", "100"))
+    FLUSH_MS = int(os.getenv("FRAUD_LOG_FLUSH_MS", "200"))
+    DURABILITY = os.getenv("FRAUD_LOG_DURABILITY", "buffered")  # buffered, sync
+    MAX_PENDING = int(os.getenv("FRAUD_LOG_MAX_PENDING", "10000"))
+
+DURABILITY_MODES = ("buffered", "sync")
+
+# ============= WRITER =============
+class FraudLogWriter:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        batch_size: int = FraudLogConfig.BATCH_SIZE,
+        flush_ms: int = FraudLogConfig.FLUSH_MS,
+        durability: str = FraudLogConfig.DURABILITY,
+        max_pending: int = FraudLogConfig.MAX_PENDING,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(1, flush_ms) / 1000
+        self.durability = durability
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        # Batch yang gagal ditulis dua kali dan dibuang
+        self.dropped_batches = 0
+        self.dropped_rows = 0
+
+    def log(self, **fields) -> str:
+        """
+        Catat satu fraud log. Field sama dengan kolom FraudDetectionLog.
+        Return id log (sudah dibuat di sini supaya bisa direferensikan).
+        """
+        row = {"id": new_id(), "detected_at": datetime.utcnow(), **fields}
+
+        if self.durability == "sync" or self._stopping:
+            self._write([row])
+            return row["id"]
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Buffer penuh: tulis langsung daripada kehilangan log
+            self._write([row])
+        return row["id"]
+
+    def flush(self):
+        """Tunggu sampai semua log di buffer tertulis"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def shutdown(self, timeout: float = 10.0):
+        """
+        Drain buffer lalu hentikan thread (dipanggil saat app shutdown).
+        Jika drain belum selesai dalam timeout, thread tetap dipegang dan log baru
+        ditulis langsung, supaya tidak ada dua thread writer; panggil lagi untuk menunggu.
+        """
+        with self._lock:
+            thread = self._thread
+            first_stop = not self._stopping
+            self._stopping = True
+        if thread is not None:
+            if first_stop:
+                self._queue.put(None)
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning(f"Fraud log writer still draining after {timeout}s")
+                return
+        with self._lock:
+            self._thread = None
+            self._stopping = False
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fraud-log-writer", daemon=True)
+                self._thread.start()
+
+    def stats(self) -> Dict:
+        return {"pending": self._queue.qsize(), "dropped_batches": self.dropped_batches,
+                "dropped_rows": self.dropped_rows}
+
+    def _run(self):
+        try:
+            stop = False
+            while not stop:
+                first = self._queue.get()
+                if first is None:
+                    self._queue.task_done()
+                    break
+                batch = [first]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        row = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if row is None:
+                        stop = True
+                        break
+                    batch.append(row)
+
+                try:
+                    self._write(batch)
+                finally:
+                    for _ in range(len(batch) + (1 if stop else 0)):
+                        self._queue.task_done()
+        finally:
+            # Setiap jalur keluar: sisa yang masuk bersamaan/setelah sentinel tetap ditulis
+            self._drain()
+
+    def _drain(self):
+        taken = 0
+        rows = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            taken += 1
+            if row is not None:
+                rows.append(row)
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                self._write(rows[start:start + self.batch_size])
+        finally:
+            # task_done setelah ditulis, supaya flush() tidak selesai lebih dulu
+            for _ in range(taken):
+                self._queue.task_done()
+
+    def _write(self, rows: List[Dict]) -> bool:
+        """
+        Satu executemany + commit, lalu beri tahu counter dan broker.
+        Return False jika batch dibuang setelah dua kali gagal (dicatat di dropped_*).
+        """
+        for attempt in (1, 2):
+            db = self.session_factory()
+            try:
+                db.execute(insert(FraudDetectionLog), rows)
+                db.commit()
+                break
+            except Exception as e:
+                db.rollback()
+                if attempt == 2:
+                    with self._lock:
+                        self.dropped_batches += 1
+                        self.dropped_rows += len(rows)
+                    logger.error(f"Fraud log write error ({len(rows)} rows dropped, "
+                                 f"{self.dropped_rows} total): {str(e)}")
+                    return False
+            finally:
+                db.close()
+
+        # Core insert tidak lewat session.new, jadi notifikasi dilakukan di sini
+        publish_alerts([alert_dict(FraudDetectionLog(**row)) for row in rows])
+        return True
+
+# Initialize writer
+fraud_log_writer = FraudLogWriter()
+atexit.register(fraud_log_writer.shutdown)
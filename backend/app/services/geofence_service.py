@@ -0,0 +1,216 @@
+# backend/app/services/geofence_service.py
+"""
+Geofence Service - validasi lokasi check-in dengan grid index di memory
+Semua koordinat customer disimpan per sel grid, sehingga validasi
+dan pencarian customer terdekat tidak perlu query DB.
+"""
+
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal, Customer
+
+EARTH_RADIUS_M = 6371000.0
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Jarak dua titik dalam meter"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+# ============= PYDANTIC MODELS =============
+class GeofenceCheck(BaseModel):
+    customer_id: str
+    latitude: float
+    longitude: float
+    client_ref: Optional[str] = None
+    timestamp: Optional[datetime] = None
+
+# ============= VERSION STAMP =============
+class CustomerLocationVersion:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.value += 1
+
+customer_location_version = CustomerLocationVersion()
+
+def _is_customer(obj) -> bool:
+    return getattr(obj, "__tablename__", None) == "customers"
+
+@event.listens_for(Session, "after_flush")
+def _mark_customer_changes(session, flush_context):
+    if any(_is_customer(obj) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["customers_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _bump_customer_location_version(session):
+    if session.info.pop("customers_changed", False):
+        customer_location_version.bump()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_customer_changes(session):
+    session.info.pop("customers_changed", None)
+
+# ============= GEOFENCE INDEX =============
+class GeofenceIndex:
+    CHECKIN_RADIUS_M = 100
+    SUGGEST_RADIUS_M = 1000
+    # ~1.1 km per sel di ekuator; pencarian melebar per cincin sel
+    CELL_DEGREES = 0.01
+    MAX_AGE_SECONDS = 300
+
+    def __init__(self, session_factory=SessionLocal, cell_degrees: float = CELL_DEGREES):
+        self.session_factory = session_factory
+        self.cell_degrees = cell_degrees
+        self._lock = threading.Lock()
+        self._built_version = -1
+        self._built_at = 0.0
+        self._points: Dict[str, Tuple[float, float]] = {}
+        self._names: Dict[str, str] = {}
+        self._grid: Dict[Tuple[int, int], List[str]] = {}
+
+    # ----- build -----
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def _is_fresh(self) -> bool:
+        return (self._built_version == customer_location_version.value
+                and time.monotonic() - self._built_at < self.MAX_AGE_SECONDS)
+
+    def _ensure_fresh(self):
+        if self._is_fresh():
+            return
+        with self._lock:
+            if self._is_fresh():
+                return
+            version = customer_location_version.value
+            self._rebuild()
+            self._built_version = version
+            self._built_at = time.monotonic()
+
+    def _rebuild(self):
+        with self.session_factory() as db:
+            rows = db.query(Customer.id, Customer.name, Customer.latitude, Customer.longitude).filter(
+                Customer.is_active == True,
+                Customer.latitude != None,
+                Customer.longitude != None
+            ).all()
+        points, names, grid = {}, {}, defaultdict(list)
+        for row in rows:
+            points[row.id] = (row.latitude, row.longitude)
+            names[row.id] = row.name
+            grid[self._cell(row.latitude, row.longitude)].append(row.id)
+        self._points, self._names, self._grid = points, names, dict(grid)
+
+    # ----- queries -----
+    def location_of(self, customer_id: str) -> Optional[Tuple[float, float]]:
+        self._ensure_fresh()
+        return self._points.get(customer_id)
+
+    def nearest(self, lat: float, lng: float, max_distance_m: float = SUGGEST_RADIUS_M,
+                limit: int = 3, exclude: Optional[str] = None) -> List[Dict]:
+        """Customer terdekat dalam max_distance_m, diurutkan dari yang terdekat"""
+        self._ensure_fresh()
+        points, grid = self._points, self._grid
+
+        # Jumlah cincin sel yang perlu diperiksa (sel lebih sempit ke arah kutub untuk longitude)
+        meters_per_cell = self.cell_degrees * math.pi / 180 * EARTH_RADIUS_M
+        lat_rings = int(math.ceil(max_distance_m / meters_per_cell))
+        lng_rings = int(math.ceil(max_distance_m / (meters_per_cell * max(math.cos(math.radians(lat)), 0.01))))
+        ci, cj = self._cell(lat, lng)
+
+        candidates = []
+        for i in range(ci - lat_rings, ci + lat_rings + 1):
+            for j in range(cj - lng_rings, cj + lng_rings + 1):
+                for customer_id in grid.get((i, j), ()):
+                    if customer_id == exclude:
+                        continue
+                    c_lat, c_lng = points[customer_id]
+                    distance = haversine_m(lat, lng, c_lat, c_lng)
+                    if distance <= max_distance_m:
+                        candidates.append((distance, customer_id))
+
+        candidates.sort()
+        return [
+            {"customer_id": customer_id, "name": self._names.get(customer_id), "distance_m": round(distance, 2)}
+            for distance, customer_id in candidates[:limit]
+        ]
+
+    def validate(self, customer_id: str, lat: float, lng: float,
+                 radius_m: float = CHECKIN_RADIUS_M, suggest: bool = True) -> Dict:
+        """
+        Validasi check-in terhadap lokasi customer di index.
+        Jika di luar radius, sertakan customer terdekat dari posisi sebenarnya.
+        """
+        return self._check(customer_id, self.location_of(customer_id), lat, lng, radius_m, suggest)
+
+    def validate_customer(self, customer: Customer, lat: float, lng: float,
+                          radius_m: float = CHECKIN_RADIUS_M, suggest: bool = True) -> Dict:
+        """
+        Validasi terhadap koordinat baris customer yang sudah di-load.
+        Index bisa tertinggal sampai MAX_AGE_SECONDS, jadi hanya dipakai untuk saran terdekat.
+        """
+        location = None
+        if customer.latitude is not None and customer.longitude is not None:
+            location = (customer.latitude, customer.longitude)
+        return self._check(customer.id, location, lat, lng, radius_m, suggest)
+
+    def _check(self, customer_id: str, location: Optional[Tuple[float, float]], lat: float, lng: float,
+               radius_m: float, suggest: bool) -> Dict:
+        if location is None:
+            return {"customer_id": customer_id, "location_valid": False, "distance_m": None,
+                    "reason": "Customer has no registered location", "nearest": []}
+
+        distance = haversine_m(lat, lng, location[0], location[1])
+        result = {
+            "customer_id": customer_id,
+            "location_valid": distance <= radius_m,
+            "distance_m": round(distance, 2)
+        }
+        if not result["location_valid"]:
+            result["reason"] = "Location mismatch"
+            result["nearest"] = self.nearest(lat, lng, exclude=customer_id) if suggest else []
+        return result
+
+    def validate_bulk(self, checks: Iterable[GeofenceCheck], radius_m: float = CHECKIN_RADIUS_M) -> List[Dict]:
+        """Validasi banyak kunjungan offline sekaligus"""
+        return [
+            {"client_ref": check.client_ref, **self.validate(check.customer_id, check.latitude, check.longitude, radius_m)}
+            for check in checks
+        ]
+
+# Initialize index
+geofence_index = GeofenceIndex()
+
+if __name__ == "__main__":
+    # Micro-benchmark: 50k customer acak di sekitar Jawa Timur
+    import random
+
+    index = GeofenceIndex(session_factory=None)
+    random.seed(1)
+    points = {f"c{i}": (-8.2 + random.random() * 1.5, 111.5 + random.random() * 3) for i in range(50000)}
+    grid = defaultdict(list)
+    for cid, (lat, lng) in points.items():
+        grid[index._cell(lat, lng)].append(cid)
+    index._points, index._names, index._grid = points, {}, dict(grid)
+    index._built_version, index._built_at = customer_location_version.value, time.monotonic()
+
+    started = time.perf_counter()
+    rounds = 10000
+    for i in range(rounds):
+        lat, lng = points[f"c{i}"]
+        index.validate(f"c{i + 1}", lat + 0.0003, lng)
+    elapsed = time.perf_counter() - started
+    print(f"{rounds} validasi (dengan saran terdekat): {elapsed / rounds * 1e6:.1f} us/validasi")
@@ -0,0 +1,98 @@
+# backend/app/services/login_history.py
+"""
+Login History - ring buffer per user (koordinat, device, waktu) di memory
+Skor impossible travel dan device baru dihitung O(1) saat login
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional
+
+# ============= CONFIG =============
+class LoginHistoryConfig:
+    CAPACITY = int(os.getenv("LOGIN_HISTORY_SIZE", "10"))
+    MAX_SPEED_KMH = float(os.getenv("LOGIN_MAX_SPEED_KMH", "500"))  # lebih cepat dari pesawat = mustahil
+    MIN_DISTANCE_KM = 5.0  # abaikan noise GPS
+    IMPOSSIBLE_TRAVEL_SCORE = 0.8
+    NEW_DEVICE_SCORE = 0.4
+
+DEVICE_KEYS = ("device_id", "model", "brand", "os", "os_version", "platform")
+
+def device_fingerprint(device_info: Optional[Dict]) -> Optional[str]:
+    """Hash pendek dari atribut device yang stabil"""
+    if not device_info:
+        return None
+    stable = {key: device_info[key] for key in DEVICE_KEYS if key in device_info} or device_info
+    raw = json.dumps(stable, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+def distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+class LoginEvent(NamedTuple):
+    timestamp: float
+    latitude: Optional[float]
+    longitude: Optional[float]
+    device: Optional[str]
+
+# ============= LOGIN HISTORY =============
+class LoginHistory:
+    def __init__(self, capacity: int = LoginHistoryConfig.CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._events: Dict[str, Deque[LoginEvent]] = {}
+
+    def record(self, user_id: str, latitude: Optional[float], longitude: Optional[float],
+               device: Optional[str], timestamp: Optional[float] = None):
+        event = LoginEvent(timestamp or time.time(), latitude, longitude, device)
+        with self._lock:
+            history = self._events.get(user_id)
+            if history is None:
+                history = self._events[user_id] = deque(maxlen=self.capacity)
+            history.append(event)
+
+    def score(self, user_id: str, latitude: Optional[float], longitude: Optional[float],
+              device: Optional[str], timestamp: Optional[float] = None) -> Dict:
+        """
+        Bandingkan login ini dengan riwayat user.
+        Buffer berukuran tetap, jadi biaya per login konstan.
+        """
+        now = timestamp or time.time()
+        with self._lock:
+            history = list(self._events.get(user_id, ()))
+
+        result = {"score": 0.0, "reasons": [], "impossible_travel": False, "new_device": False}
+        if not history:
+            return result
+
+        # Impossible travel: terhadap login terakhir yang punya koordinat
+        if latitude is not None and longitude is not None:
+            last = next((e for e in reversed(history) if e.latitude is not None and e.longitude is not None), None)
+            if last is not None:
+                km = distance_km(last.latitude, last.longitude, latitude, longitude)
+                hours = max(now - last.timestamp, 1.0) / 3600
+                speed = km / hours
+                result.update(distance_km=round(km, 2), speed_kmh=round(speed, 1))
+                if km >= LoginHistoryConfig.MIN_DISTANCE_KM and speed > LoginHistoryConfig.MAX_SPEED_KMH:
+                    result["impossible_travel"] = True
+                    result["score"] += LoginHistoryConfig.IMPOSSIBLE_TRAVEL_SCORE
+                    result["reasons"].append("impossible_travel")
+
+        # Device baru: tidak ada di N login terakhir
+        if device is not None and all(e.device != device for e in history):
+            result["new_device"] = True
+            result["score"] += LoginHistoryConfig.NEW_DEVICE_SCORE
+            result["reasons"].append("new_device")
+
+        result["score"] = min(result["score"], 1.0)
+        return result
+
+# Initialize history
+login_history = LoginHistory()
@@ -0,0 +1,144 @@
+# backend/app/services/nota_service.py
+"""
+Nota Issuance Service - penerbitan nota massal (month-end billing)
+Satu query order, QR dirender paralel, insert bulk per chunk
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import exists, insert
+from sqlalchemy.orm import Session
+
+from app.models.database import Nota, Order, new_id
+from app.services.sequence_service import sequence_allocator
+
+# ============= PYDANTIC MODELS =============
+class BulkNotaRequest(BaseModel):
+    order_ids: Optional[List[str]] = None
+    customer_id: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    due_days: int = 60
+    qr_format: str = "compact"
+    include_qr: bool = True
+    chunk_size: int = 500
+
+# ============= NOTA ISSUANCE SERVICE =============
+class NotaIssuanceService:
+    MAX_CHUNK_SIZE = 2000
+
+    def __init__(self, payment_service):
+        self.payment_service = payment_service
+
+    def find_orders(self, db: Session, request: BulkNotaRequest):
+        """Satu query untuk semua order yang belum punya nota"""
+        query = db.query(Order.id, Order.customer_id, Order.salesman_id, Order.total_amount).filter(
+            ~exists().where(Nota.order_id == Order.id)
+        )
+        if request.order_ids is not None:
+            query = query.filter(Order.id.in_(request.order_ids))
+        if request.customer_id:
+            query = query.filter(Order.customer_id == request.customer_id)
+        if request.created_from:
+            query = query.filter(Order.created_at >= request.created_from)
+        if request.created_to:
+            query = query.filter(Order.created_at < request.created_to)
+        return query.all()
+
+    def prepare_rows(self, orders, due_days: int) -> List[Dict]:
+        """Buat nomor nota, hash QR dan baris insert untuk setiap order"""
+        due_date = datetime.utcnow() + timedelta(days=due_days)
+        rows = []
+        for order in orders:
+            nota_number = sequence_allocator.next_number("NT")
+            amount = order.total_amount or 0.0
+            qr_hash = self.payment_service.nota_qr_hash(order.id, nota_number, amount)
+            rows.append({
+                "id": new_id(),
+                "nota_number": nota_number,
+                "customer_id": order.customer_id,
+                "salesman_id": order.salesman_id,
+                "order_id": order.id,
+                "amount": amount,
+                "total_amount": amount,
+                "qr_code": qr_hash,
+                "due_date": due_date,
+                "original_hash": qr_hash
+            })
+        return rows
+
+    def insert_chunked(self, db: Session, rows: List[Dict], chunk_size: int) -> Dict[str, str]:
+        """
+        Bulk insert nota per chunk, satu transaksi per chunk.
+        Return order_id -> error untuk chunk yang gagal.
+        """
+        chunk_size = max(1, min(chunk_size, self.MAX_CHUNK_SIZE))
+        failed = {}
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                db.execute(insert(Nota), chunk)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                for row in chunk:
+                    failed[row["order_id"]] = str(e)
+        return failed
+
+    async def render_qrs(self, rows: List[Dict], qr_format: str) -> Dict[str, str]:
+        """Render QR semua nota secara paralel, return qr_hash -> image"""
+        images = {}
+        async for qr_hash, qr_image in self.payment_service.qr_renderer.render_many(
+            ((row["qr_code"], row["qr_code"]) for row in rows), qr_format
+        ):
+            images[qr_hash] = qr_image
+        return images
+
+    async def issue_bulk(self, db: Session, request: BulkNotaRequest) -> Dict:
+        """Terbitkan nota untuk semua order yang cocok dengan request"""
+        started = time.perf_counter()
+
+        orders = self.find_orders(db, request)
+        rows = self.prepare_rows(orders, request.due_days)
+        failed = self.insert_chunked(db, rows, request.chunk_size)
+
+        created_rows = [row for row in rows if row["order_id"] not in failed]
+        images = await self.render_qrs(created_rows, request.qr_format) if request.include_qr else {}
+
+        results = []
+        for row in rows:
+            if row["order_id"] in failed:
+                results.append({"order_id": row["order_id"], "status": "failed", "error": failed[row["order_id"]]})
+                continue
+            result = {
+                "order_id": row["order_id"],
+                "status": "created",
+                "nota_id": row["id"],
+                "nota_number": row["nota_number"],
+                "amount": row["amount"],
+                "due_date": row["due_date"].isoformat()
+            }
+            if request.include_qr:
+                result["qr_code"] = images.get(row["qr_code"])
+            results.append(result)
+
+        # Order yang diminta tapi tidak ditemukan / sudah punya nota
+        if request.order_ids is not None:
+            found_ids = {row["order_id"] for row in rows}
+            for order_id in request.order_ids:
+                if order_id not in found_ids:
+                    results.append({"order_id": order_id, "status": "skipped",
+                                    "error": "Order not found or nota already issued"})
+
+        elapsed = time.perf_counter() - started
+        return {
+            "total_orders": len(rows),
+            "created": len(created_rows),
+            "failed": len(failed),
+            "elapsed_seconds": round(elapsed, 3),
+            "notas_per_second": round(len(created_rows) / elapsed, 1) if elapsed > 0 else 0.0,
+            "results": results
+        }
@@ -0,0 +1,240 @@
+# backend/app/services/order_service.py
+"""
+Order Ingestion Service - validasi harga dari price list (cache)
+dan insert order item secara bulk, termasuk batch multi-order dari mobile
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+
+from app.models.database import Customer, Order, OrderItem, OrderStatus, Product, new_id
+from app.services.credit_service import credit_ledger, InsufficientCreditError
+from app.services.sequence_service import sequence_allocator
+from app.services.rollup_service import sales_rollups, salesman_scope
+from app.services.sync_service import record_changes
+
+# ============= PYDANTIC MODELS =============
+class OrderItemInput(BaseModel):
+    product_id: str
+    quantity: int
+    unit_price: Optional[float] = None  # Harga dari client, divalidasi ke price list
+
+class OrderInput(BaseModel):
+    customer_id: str
+    items: List[OrderItemInput]
+    client_ref: Optional[str] = None  # ID order lokal di mobile app
+
+class OrderValidationError(ValueError):
+    pass
+
+# ============= PRICE LIST CACHE =============
+class PriceListCache:
+    """Cache harga produk in-process, miss diambil dengan satu query IN"""
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl_seconds = ttl_seconds
+        self._prices: Dict[str, tuple] = {}  # product_id -> (selling_price, loaded_at)
+        self._lock = threading.Lock()
+
+    def get_prices(self, db: Session, product_ids: Iterable[str]) -> Dict[str, float]:
+        now = time.monotonic()
+        wanted = set(product_ids)
+        with self._lock:
+            cached = {
+                pid: entry[0] for pid, entry in ((pid, self._prices.get(pid)) for pid in wanted)
+                if entry and now - entry[1] < self.ttl_seconds
+            }
+        missing = wanted - cached.keys()
+        if missing:
+            rows = db.query(Product.id, Product.selling_price).filter(
+                Product.id.in_(missing),
+                Product.is_active == True
+            ).all()
+            with self._lock:
+                for row in rows:
+                    self._prices[row.id] = (row.selling_price, now)
+            cached.update({row.id: row.selling_price for row in rows})
+        return cached
+
+    def invalidate(self, product_id: Optional[str] = None):
+        with self._lock:
+            if product_id is None:
+                self._prices.clear()
+            else:
+                self._prices.pop(product_id, None)
+
+# ============= ORDER INGESTION SERVICE =============
+class OrderIngestionService:
+    PRICE_TOLERANCE = 0.01
+
+    def __init__(self, price_cache: PriceListCache):
+        self.price_cache = price_cache
+
+    def _validate_items(self, items: List[OrderItemInput], prices: Dict[str, float]) -> List[Dict]:
+        """Validasi item terhadap price list, return baris order_items tanpa order_id"""
+        if not items:
+            raise OrderValidationError("Order has no items")
+
+        rows = []
+        for item in items:
+            if item.product_id not in prices:
+                raise OrderValidationError(f"Unknown or inactive product: {item.product_id}")
+            if item.quantity <= 0:
+                raise OrderValidationError(f"Invalid quantity for product {item.product_id}")
+
+            price = prices[item.product_id]
+            if item.unit_price is not None and abs(item.unit_price - price) > self.PRICE_TOLERANCE:
+                raise OrderValidationError(
+                    f"Price mismatch for product {item.product_id}: got {item.unit_price}, expected {price}"
+                )
+            rows.append({
+                "id": new_id(),
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "unit_price": price,
+                "total_price": item.quantity * price
+            })
+        return rows
+
+    def _ingest(self, db: Session, scope: Dict, order_input: OrderInput,
+                prices: Dict[str, float], order_number: str, at: Optional[datetime] = None) -> Dict:
+        """Insert satu order + item, tanpa commit. at: waktu order (offline: waktu device)"""
+        item_rows = self._validate_items(order_input.items, prices)
+        total_amount = sum(row["total_price"] for row in item_rows)
+
+        order_id = new_id()
+        at = at or datetime.utcnow()
+
+        db.execute(insert(Order).values(
+            id=order_id,
+            order_number=order_number,
+            customer_id=order_input.customer_id,
+            salesman_id=scope["salesman_id"],
+            total_amount=total_amount,
+            final_amount=total_amount,
+            status=OrderStatus.ORDER,
+            created_at=at
+        ))
+        record_changes(db, "orders", [(order_id, scope["salesman_id"])])
+        credit_ledger.reserve(db, order_input.customer_id, total_amount, order_id=order_id)
+        sales_rollups.record_order(db, scope, total_amount, at)
+
+        for row in item_rows:
+            row["order_id"] = order_id
+        db.execute(insert(OrderItem), item_rows)
+
+        return {
+            "order_id": order_id,
+            "order_number": order_number,
+            "total_amount": total_amount,
+            "items": len(item_rows),
+            "status": "created"
+        }
+
+    def create_order(self, db: Session, salesman, order_input: OrderInput) -> Dict:
+        """Create satu order dan commit"""
+        if not db.query(Customer.id).filter(Customer.id == order_input.customer_id).first():
+            raise LookupError("Customer not found")
+
+        prices = self.price_cache.get_prices(db, (item.product_id for item in order_input.items))
+        order_number = sequence_allocator.next_number("ORD")
+        try:
+            result = self._ingest(db, salesman_scope(salesman), order_input, prices, order_number)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return result
+
+    def create_orders(self, db: Session, salesman, orders: List[OrderInput]) -> Dict:
+        """
+        Batch multi-order dari mobile app: satu query customer, satu query harga,
+        satu commit. Setiap order di savepoint sendiri sehingga order yang gagal
+        tidak membatalkan order lain.
+        """
+        started = time.perf_counter()
+
+        customer_ids = {order.customer_id for order in orders}
+        existing_customers = {
+            row.id for row in db.query(Customer.id).filter(Customer.id.in_(customer_ids)).all()
+        }
+        prices = self.price_cache.get_prices(
+            db, (item.product_id for order in orders for item in order.items)
+        )
+        # Nomor dialokasikan sebelum transaksi tulis dimulai
+        order_numbers = [sequence_allocator.next_number("ORD") for _ in orders]
+        scope = salesman_scope(salesman)
+
+        results = []
+        try:
+            for order_input, order_number in zip(orders, order_numbers):
+                base = {"client_ref": order_input.client_ref, "customer_id": order_input.customer_id}
+                if order_input.customer_id not in existing_customers:
+                    results.append({**base, "status": "failed", "error": "Customer not found"})
+                    continue
+                savepoint = db.begin_nested()
+                try:
+                    results.append({**base, **self._ingest(db, scope, order_input, prices, order_number)})
+                    savepoint.commit()
+                except (OrderValidationError, InsufficientCreditError) as e:
+                    savepoint.rollback()
+                    results.append({**base, "status": "failed", "error": str(e)})
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return {
+            "total_orders": len(orders),
+            "created": sum(1 for r in results if r["status"] == "created"),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "results": results
+        }
+
+# Initialize services
+price_list_cache = PriceListCache()
+order_ingestion = OrderIngestionService(price_list_cache)
+
+# ============= CACHE INVALIDATION =============
+# Produk yang harga/status aktifnya berubah dibuang dari cache setelah commit.
+# Worker lain tetap mengandalkan TTL.
+PRICE_FIELDS = ("selling_price", "is_active")
+
+def _is_product(obj) -> bool:
+    return getattr(obj, "__tablename__", None) == "products"
+
+@event.listens_for(Session, "after_flush")
+def _mark_price_changes(session, flush_context):
+    changed = {obj.id for obj in session.deleted if _is_product(obj)}
+    changed.update(obj.id for obj in session.dirty if _is_product(obj) and any(
+        inspect(obj).attrs[field].history.has_changes() for field in PRICE_FIELDS))
+    if changed:
+        session.info.setdefault("price_changes", set()).update(changed)
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_price_changes(orm_execute_state):
+    # query(Product).update(...) / delete(Product): tidak tahu id mana, kosongkan semua
+    if ((orm_execute_state.is_update or orm_execute_state.is_delete)
+            and orm_execute_state.bind_mapper is not None
+            and orm_execute_state.bind_mapper.class_ is Product):
+        orm_execute_state.session.info["price_changes_all"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_prices(session):
+    changed = session.info.pop("price_changes", set())
+    if session.info.pop("price_changes_all", False):
+        price_list_cache.invalidate()
+        return
+    for product_id in changed:
+        price_list_cache.invalidate(product_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_price_changes(session):
+    session.info.pop("price_changes", None)
+    session.info.pop("price_changes_all", None)
@@ -0,0 +1,104 @@
+# backend/app/services/qr_service.py
+"""
+QR Rendering Service - render QR nota lewat worker pool
+Mendukung output PNG (base64), SVG dan PNG compact
+"""
+
+import asyncio
+import base64
+import io
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Iterable, Optional, Tuple
+
+import qrcode
+import qrcode.image.svg
+
+# ============= CONFIG =============
+class QRConfig:
+    WORKERS = int(os.getenv("QR_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+    EXECUTOR = os.getenv("QR_RENDER_EXECUTOR", "process")  # process, thread
+    DEFAULT_FORMAT = os.getenv("QR_RENDER_FORMAT", "png")
+
+QR_FORMATS = ("png", "svg", "compact")
+
+# ============= RENDERING =============
+def render_qr(data: str, fmt: str = "png") -> str:
+    """Render satu QR code. Module-level supaya bisa dipakai oleh process pool"""
+    if fmt not in QR_FORMATS:
+        raise ValueError(f"Unknown QR format: {fmt}")
+
+    if fmt == "svg":
+        qr = qrcode.QRCode(version=1, box_size=10, border=4,
+                           image_factory=qrcode.image.svg.SvgPathImage)
+        qr.add_data(data)
+        qr.make(fit=True)
+        return qr.make_image().to_string(encoding="unicode")
+
+    # png: sama dengan output lama, compact: 1-bit dengan modul kecil
+    box_size, border = (10, 5) if fmt == "png" else (3, 1)
+    qr = qrcode.QRCode(version=1, box_size=box_size, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffered = io.BytesIO()
+    if fmt == "compact":
+        img.get_image().convert("1").save(buffered, format="PNG", optimize=True)
+    else:
+        img.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode()
+
+class QRRenderService:
+    """Worker pool untuk render QR di luar event loop"""
+
+    def __init__(self, workers: int = QRConfig.WORKERS, executor: str = QRConfig.EXECUTOR):
+        self.workers = max(1, workers)
+        self.executor_kind = executor
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        # Pool dibuat lazy supaya import module tidak spawn process
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="qr-render")
+        return self._executor
+
+    def render(self, data: str, fmt: str = QRConfig.DEFAULT_FORMAT) -> str:
+        """Render sinkron di thread pemanggil (untuk satu nota)"""
+        return render_qr(data, fmt)
+
+    async def render_async(self, data: str, fmt: str = QRConfig.DEFAULT_FORMAT) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), render_qr, data, fmt)
+
+    async def render_many(
+        self, items: Iterable[Tuple[str, str]], fmt: str = QRConfig.DEFAULT_FORMAT
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Render banyak QR secara paralel.
+        items: iterable (key, data). Yield (key, image) sesuai urutan selesai.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        async def _render(key: str, data: str) -> Tuple[str, str]:
+            return key, await loop.run_in_executor(executor, render_qr, data, fmt)
+
+        tasks = [asyncio.ensure_future(_render(key, data)) for key, data in items]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+# Initialize service
+qr_renderer = QRRenderService()
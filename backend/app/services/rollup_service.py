@@ -0,0 +1,144 @@
+# backend/app/services/rollup_service.py
+"""
+Sales Rollup Service - agregat per jam/hari per salesman untuk dashboard
+Di-update incremental saat order, visit dan payment ditulis
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_, and_
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal, SalesRollup, Order, SalesVisit, SalesVisitArchive, Payment, PaymentStatus, User
+
+METRICS = ("orders_count", "sales_amount", "visits_count", "payments_count", "payments_amount")
+
+def _hour(at: datetime) -> datetime:
+    return at.replace(minute=0, second=0, microsecond=0)
+
+def _day(at: datetime) -> datetime:
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def salesman_scope(user) -> Dict[str, Optional[str]]:
+    """Role dan area salesman yang disimpan di baris rollup"""
+    role = getattr(user.role, "value", user.role)
+    locations = (user.area_detail or {}).get("location") or [None]
+    return {"salesman_id": user.id, "role": role, "area": locations[0]}
+
+class SalesRollupService:
+    def _upsert(self, db: Session, scope: Dict, at: datetime, increments: Dict[str, float]):
+        """Tambah increment ke baris jam dan hari. Tidak commit."""
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as insert_fn  # import dialect hanya jika dipakai
+        else:
+            insert_fn = sqlite.insert
+
+        for granularity, bucket in (("hour", _hour(at)), ("day", _day(at))):
+            values = {metric: 0 for metric in METRICS}
+            values.update(increments)
+            stmt = insert_fn(SalesRollup).values(granularity=granularity, bucket=bucket, **scope, **values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["granularity", "bucket", "salesman_id"],
+                set_={metric: getattr(SalesRollup, metric) + amount for metric, amount in increments.items()}
+            )
+            db.execute(stmt)
+
+    def record_order(self, db: Session, scope: Dict, amount: float, at: Optional[datetime] = None):
+        self._upsert(db, scope, at or datetime.utcnow(), {"orders_count": 1, "sales_amount": amount or 0.0})
+
+    def record_visit(self, db: Session, scope: Dict, at: Optional[datetime] = None):
+        self._upsert(db, scope, at or datetime.utcnow(), {"visits_count": 1})
+
+    def record_payment(self, db: Session, scope: Dict, amount: float, at: datetime):
+        """Dipanggil saat payment COMPLETED, bucket = payment.created_at"""
+        self._upsert(db, scope, at, {"payments_count": 1, "payments_amount": amount or 0.0})
+
+    def summarize(self, db: Session, start: datetime, end: datetime,
+                  salesman_ids: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Jumlahkan baris rollup di window [start, end]:
+        baris hari untuk hari penuh, baris jam untuk sisa di awal/akhir window
+        """
+        start_hour = _hour(start)
+        first_full_day = _day(start) if start == _day(start) else _day(start) + timedelta(days=1)
+        last_day = _day(end)
+
+        if first_full_day < last_day:
+            window = or_(
+                and_(SalesRollup.granularity == "day",
+                     SalesRollup.bucket >= first_full_day, SalesRollup.bucket < last_day),
+                and_(SalesRollup.granularity == "hour",
+                     or_(and_(SalesRollup.bucket >= start_hour, SalesRollup.bucket < first_full_day),
+                         and_(SalesRollup.bucket >= last_day, SalesRollup.bucket <= end)))
+            )
+        else:
+            window = and_(SalesRollup.granularity == "hour",
+                          SalesRollup.bucket >= start_hour, SalesRollup.bucket <= end)
+
+        query = db.query(*[func.coalesce(func.sum(getattr(SalesRollup, m)), 0).label(m) for m in METRICS]).filter(window)
+        if salesman_ids is not None:
+            query = query.filter(SalesRollup.salesman_id.in_(salesman_ids))
+
+        row = query.one()
+        return {metric: getattr(row, metric) for metric in METRICS}
+
+    def rebuild(self, db: Session, since: datetime, chunk_size: int = 10000):
+        """Backfill rollup dari tabel mentah (data lama / setelah migrasi)"""
+        since = _day(since)
+        scopes = {
+            user.id: salesman_scope(user)
+            for user in db.query(User.id, User.role, User.area_detail)
+        }
+        totals = defaultdict(lambda: defaultdict(float))
+
+        def add(salesman_id, at, increments):
+            for key in (("hour", _hour(at), salesman_id), ("day", _day(at), salesman_id)):
+                for metric, amount in increments.items():
+                    totals[key][metric] += amount
+
+        for order in db.query(Order.salesman_id, Order.created_at, Order.total_amount).filter(
+            Order.created_at >= since
+        ).yield_per(chunk_size):
+            add(order.salesman_id, order.created_at, {"orders_count": 1, "sales_amount": order.total_amount or 0.0})
+        for model in (SalesVisit, SalesVisitArchive):
+            for visit in db.query(model.salesman_id, model.check_in).filter(
+                model.check_in >= since
+            ).yield_per(chunk_size):
+                add(visit.salesman_id, visit.check_in, {"visits_count": 1})
+        for payment in db.query(Payment.salesman_id, Payment.created_at, Payment.amount).filter(
+            Payment.created_at >= since, Payment.status == PaymentStatus.COMPLETED
+        ).yield_per(chunk_size):
+            add(payment.salesman_id, payment.created_at, {"payments_count": 1, "payments_amount": payment.amount or 0.0})
+
+        db.query(SalesRollup).filter(SalesRollup.bucket >= _day(since)).delete(synchronize_session=False)
+        db.bulk_insert_mappings(SalesRollup, [
+            {
+                "granularity": granularity, "bucket": bucket,
+                **scopes.get(salesman_id, {"salesman_id": salesman_id, "role": None, "area": None}),
+                **{metric: values.get(metric, 0) for metric in METRICS}
+            }
+            for (granularity, bucket, salesman_id), values in totals.items()
+        ])
+        db.commit()
+        return len(totals)
+
+# Initialize service
+sales_rollups = SalesRollupService()
+
+if __name__ == "__main__":
+    # Backfill setelah migrasi / data lama: python -m app.services.rollup_service --days 90
+    parser = argparse.ArgumentParser(description="Hitung ulang sales_rollups dari order, visit dan payment")
+    parser.add_argument("--days", type=int, default=30, help="Rebuild mulai N hari terakhir")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Tanggal awal (YYYY-MM-DD), override --days")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    since = args.since or datetime.utcnow() - timedelta(days=args.days)
+    with SessionLocal() as db:
+        buckets = sales_rollups.rebuild(db, since, args.chunk_size)
+    print(f"{buckets} baris rollup dibangun ulang sejak {_day(since).date()}")
@@ -0,0 +1,76 @@
+# backend/app/services/sequence_service.py
+"""
+Sequence Allocator - nomor order/nota per hari yang unik dan monotonic
+Blok nomor dialokasikan dari tabel document_sequences, sehingga
+tidak perlu round-trip database untuk setiap nomor
+"""
+
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models.database import SessionLocal, DocumentSequence
+
+class SequenceConfig:
+    BLOCK_SIZE = int(os.getenv("SEQUENCE_BLOCK_SIZE", "50"))
+
+class SequenceAllocator:
+    """
+    Per (prefix, tanggal) setiap worker memegang blok [next, end].
+    Saat blok habis, satu transaksi pendek menaikkan last_value sebesar
+    BLOCK_SIZE. Nomor yang tidak terpakai saat restart hanya menjadi gap.
+    """
+
+    def __init__(self, session_factory=SessionLocal, block_size: int = SequenceConfig.BLOCK_SIZE):
+        self.session_factory = session_factory
+        self.block_size = max(1, block_size)
+        self._blocks: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def _allocate_block(self, name: str, day: str) -> Tuple[int, int]:
+        """Reservasi blok baru di transaksi terpisah dari request"""
+        with self.session_factory() as db:
+            for _ in range(3):
+                try:
+                    result = db.execute(
+                        update(DocumentSequence)
+                        .where(DocumentSequence.name == name, DocumentSequence.day == day)
+                        .values(last_value=DocumentSequence.last_value + self.block_size)
+                    )
+                    if result.rowcount == 0:
+                        db.add(DocumentSequence(name=name, day=day, last_value=self.block_size))
+                        db.flush()
+                    end = db.execute(
+                        select(DocumentSequence.last_value)
+                        .where(DocumentSequence.name == name, DocumentSequence.day == day)
+                    ).scalar_one()
+                    db.commit()
+                    return end - self.block_size + 1, end
+                except IntegrityError:
+                    # Worker lain membuat baris hari ini lebih dulu, ulangi UPDATE
+                    db.rollback()
+        raise RuntimeError(f"Could not allocate sequence block for {name}{day}")
+
+    def next_value(self, name: str, day: str) -> int:
+        with self._lock:
+            block = self._blocks.get((name, day))
+            if block is None or block[0] > block[1]:
+                block = list(self._allocate_block(name, day))
+                # Blok hari sebelumnya tidak dipakai lagi
+                self._blocks = {k: v for k, v in self._blocks.items() if k[1] == day}
+                self._blocks[(name, day)] = block
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def next_number(self, prefix: str, width: int = 6) -> str:
+        """Format: PREFIX + YYYYMMDD + nomor urut, contoh ORD20250101000042"""
+        day = datetime.now().strftime('%Y%m%d')
+        return f"{prefix}{day}{self.next_value(prefix, day):0{width}d}"
+
+# Initialize service
+sequence_allocator = SequenceAllocator()
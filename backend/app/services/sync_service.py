@@ -0,0 +1,279 @@
+# backend/app/services/sync_service.py
+"""
+Sync Service - delta sync offline untuk aplikasi absensi/mobile
+Setiap insert/update/delete customer, product dan order dicatat di sync_changes
+(satu transaksi dengan perubahannya). Device mengirim sync_token terakhir dan
+hanya menerima perubahan sesudahnya; sync pertama berupa snapshot berhalaman.
+"""
+
+import base64
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, event, func, inspect, insert, or_
+from sqlalchemy.orm import Session
+
+from app.models.database import Customer, Product, Order, SyncChange, SyncFieldClock
+
+# ============= CONFIG =============
+class SyncConfig:
+    PAGE_SIZE = 500
+    MAX_PAGE_SIZE = 2000
+    ORDER_WINDOW_DAYS = 30
+    # Selain SQLite (penulis tunggal), id bisa commit tidak berurutan:
+    # perubahan yang lebih baru dari ini ditahan sampai halaman berikutnya
+    SETTLE_SECONDS = 5
+
+ENTITIES = ("customers", "products", "orders")
+# Field yang boleh diedit offline per entity (merge per field di sync_upload_service)
+MERGE_FIELDS = {
+    "customers": ("name", "owner_name", "address", "phone_store", "phone_owner", "email", "latitude", "longitude"),
+}
+PAYLOAD_KEYS = {"customers": "customers", "products": "products", "orders": "recent_orders"}
+
+# ============= TOKEN =============
+def encode_token(version: int, entity: Optional[str] = None, after: str = "") -> str:
+    """Delta: d|version. Snapshot berjalan: s|version|entity|id terakhir"""
+    raw = f"s|{version}|{entity}|{after}" if entity else f"d|{version}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_token(token: str) -> Tuple[int, Optional[str], str]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        parts = raw.split("|")
+        if parts[0] == "d" and len(parts) == 2:
+            return int(parts[1]), None, ""
+        if parts[0] == "s" and len(parts) == 4 and parts[2] in ENTITIES:
+            return int(parts[1]), parts[2], parts[3]
+    except Exception:
+        pass
+    raise ValueError("Invalid sync token")
+
+# ============= CHANGE LOG =============
+def _scope(obj) -> Optional[str]:
+    table = obj.__tablename__
+    if table == "customers":
+        return obj.area_code
+    if table == "orders":
+        return obj.salesman_id
+    return None
+
+def _old_scope(obj) -> Optional[str]:
+    """Scope sebelum update (customer pindah area / order pindah salesman)"""
+    attr = {"customers": "area_code", "orders": "salesman_id"}.get(obj.__tablename__)
+    if attr is None:
+        return None
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else None
+
+_tables_ready = set()
+
+def _has_change_log(connection, table: str = SyncChange.__tablename__) -> bool:
+    """DB lama / DB test tanpa tabel sync_changes: lewati pencatatan"""
+    key = (connection.engine.url, table)
+    if key not in _tables_ready and inspect(connection).has_table(table):
+        _tables_ready.add(key)
+    return key in _tables_ready
+
+def record_changes(db: Session, entity: str, changes: Iterable[Tuple[str, Optional[str]]], op: str = "upsert"):
+    """Catat perubahan dari statement core (insert()/update()) yang tidak lewat flush ORM"""
+    rows = [{"entity": entity, "entity_id": entity_id, "op": op, "scope": scope,
+             "changed_at": datetime.utcnow()} for entity_id, scope in changes]
+    connection = db.connection()
+    if rows and _has_change_log(connection):
+        connection.execute(insert(SyncChange.__table__), rows)
+
+@event.listens_for(Session, "after_flush")
+def _log_field_clocks(session, flush_context):
+    """
+    Edit server (admin, main ERP) ke field yang bisa diedit offline dicatat di
+    sync_field_clocks, supaya merge upload bisa mendeteksi bentrok per field.
+    Merge upload sendiri menulis clock-nya (session.info["offline_merge"]).
+    """
+    if session.info.get("offline_merge"):
+        return
+    now = datetime.utcnow()
+    rows = []
+    for obj in session.dirty:
+        fields = MERGE_FIELDS.get(getattr(obj, "__tablename__", None))
+        if not fields:
+            continue
+        state = inspect(obj)
+        rows.extend({"entity": obj.__tablename__, "entity_id": obj.id, "field": field, "updated_at": now,
+                     "device_id": None} for field in fields if state.attrs[field].history.has_changes())
+    if not rows:
+        return
+    connection = session.connection()
+    if _has_change_log(connection, SyncFieldClock.__tablename__):
+        table = SyncFieldClock.__table__
+        for row in rows:
+            connection.execute(delete(table).where(
+                table.c.entity == row["entity"], table.c.entity_id == row["entity_id"], table.c.field == row["field"]))
+        connection.execute(insert(table), rows)
+
+@event.listens_for(Session, "after_flush")
+def _log_sync_changes(session, flush_context):
+    rows = []
+    now = datetime.utcnow()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        entity = getattr(obj, "__tablename__", None)
+        if entity not in ENTITIES:
+            continue
+        if obj in session.deleted:
+            rows.append({"entity": entity, "entity_id": obj.id, "op": "delete", "scope": _scope(obj), "changed_at": now})
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        old_scope = _old_scope(obj) if obj in session.dirty else None
+        if old_scope is not None and old_scope != _scope(obj):
+            rows.append({"entity": entity, "entity_id": obj.id, "op": "delete", "scope": old_scope, "changed_at": now})
+        rows.append({"entity": entity, "entity_id": obj.id, "op": "upsert", "scope": _scope(obj), "changed_at": now})
+    if rows:
+        connection = session.connection()
+        if _has_change_log(connection):
+            connection.execute(insert(SyncChange.__table__), rows)
+
+# ============= PAYLOAD =============
+def customer_dict(c) -> Dict:
+    return {
+        "id": c.id,
+        "name": c.name,
+        "address": c.address,
+        "phone": c.phone_store or c.phone_owner,
+        "area": c.area_code,
+        "latitude": c.latitude,
+        "longitude": c.longitude,
+        "credit_limit": float(c.credit_limit or 0)
+    }
+
+def product_dict(p) -> Dict:
+    return {
+        "id": p.id,
+        "name": p.name,
+        "sku": p.product_code,
+        "price": float(p.selling_price or 0),
+        "stock_warehouse": p.stock_quantity,
+        "stock_vehicle": p.stock_vehicle or 0,
+        "unit": p.unit or "pcs"
+    }
+
+def order_dict(o) -> Dict:
+    return {
+        "id": o.id,
+        "customer_id": o.customer_id,
+        "total_amount": float(o.total_amount or 0),
+        "status": o.status.value if o.status else "",
+        "created_at": o.created_at.isoformat() if o.created_at else None
+    }
+
+def catalog_visible():
+    """Produk yang dikirim ke device: aktif dan ada stok"""
+    return and_(Product.is_active.isnot(False), Product.stock_quantity > 0)
+
+MODELS = {"customers": Customer, "products": Product, "orders": Order}
+SERIALIZERS = {"customers": customer_dict, "products": product_dict, "orders": order_dict}
+
+# ============= SYNC =============
+class SyncService:
+    def __init__(self, config=SyncConfig):
+        self.config = config
+
+    def _visible(self, entity: str, salesman_id: str, areas: List[str]):
+        """Filter baris yang boleh ada di device"""
+        if entity == "customers":
+            conditions = [Customer.is_active.isnot(False)]
+            if areas:
+                conditions.append(Customer.area_code.in_(areas))
+            return and_(*conditions)
+        if entity == "products":
+            return catalog_visible()
+        since = datetime.utcnow() - timedelta(days=self.config.ORDER_WINDOW_DAYS)
+        return and_(Order.salesman_id == salesman_id, Order.created_at >= since)
+
+    def _change_scope(self, salesman_id: str, areas: List[str]):
+        customers = SyncChange.entity == "customers"
+        if areas:
+            customers = and_(customers, or_(SyncChange.scope.in_(areas), SyncChange.scope.is_(None)))
+        return or_(
+            customers,
+            SyncChange.entity == "products",
+            and_(SyncChange.entity == "orders", SyncChange.scope == salesman_id)
+        )
+
+    def _empty_payload(self) -> Dict:
+        return {
+            "data": {key: [] for key in PAYLOAD_KEYS.values()},
+            "deleted": {key: [] for key in PAYLOAD_KEYS.values()}
+        }
+
+    def download(self, db: Session, salesman_id: str, areas: List[str],
+                 sync_token: Optional[str] = None, page_size: Optional[int] = None) -> Dict:
+        page_size = max(1, min(page_size or self.config.PAGE_SIZE, self.config.MAX_PAGE_SIZE))
+        if sync_token:
+            version, entity, after = decode_token(sync_token)
+        else:
+            version = db.query(func.max(SyncChange.id)).scalar() or 0
+            entity, after = ENTITIES[0], ""
+
+        if entity is not None:
+            result = self._snapshot_page(db, salesman_id, areas, version, entity, after, page_size)
+        else:
+            result = self._delta_page(db, salesman_id, areas, version, page_size)
+
+        result["stats"] = {
+            f"{key}_count": len(result["data"][key]) for key in PAYLOAD_KEYS.values()
+        }
+        result["stats"]["deleted_count"] = sum(len(ids) for ids in result["deleted"].values())
+        return result
+
+    def _snapshot_page(self, db: Session, salesman_id: str, areas: List[str],
+                       version: int, entity: str, after: str, page_size: int) -> Dict:
+        """Snapshot keyset per entity; selesai -> lanjut delta dari versi awal snapshot"""
+        payload = self._empty_payload()
+        remaining = page_size
+        for name in ENTITIES[ENTITIES.index(entity):]:
+            model = MODELS[name]
+            query = db.query(model).filter(self._visible(name, salesman_id, areas))
+            if name == entity and after:
+                query = query.filter(model.id > after)
+            rows = query.order_by(model.id).limit(remaining).all()
+            payload["data"][PAYLOAD_KEYS[name]].extend(SERIALIZERS[name](row) for row in rows)
+            remaining -= len(rows)
+            if remaining == 0:
+                payload.update(mode="snapshot", has_more=True, sync_token=encode_token(version, name, rows[-1].id))
+                return payload
+
+        latest = db.query(func.max(SyncChange.id)).scalar() or 0
+        payload.update(mode="snapshot", has_more=latest > version, sync_token=encode_token(version))
+        return payload
+
+    def _delta_page(self, db: Session, salesman_id: str, areas: List[str], version: int, page_size: int) -> Dict:
+        query = db.query(SyncChange).filter(SyncChange.id > version, self._change_scope(salesman_id, areas))
+        if db.get_bind().dialect.name != "sqlite":
+            query = query.filter(SyncChange.changed_at <= datetime.utcnow() - timedelta(seconds=self.config.SETTLE_SECONDS))
+        changes = query.order_by(SyncChange.id).limit(page_size).all()
+
+        # Perubahan terakhir per baris yang menang
+        latest: Dict[Tuple[str, str], str] = {}
+        for change in changes:
+            latest[(change.entity, change.entity_id)] = change.op
+
+        payload = self._empty_payload()
+        for name in ENTITIES:
+            key = PAYLOAD_KEYS[name]
+            upserts = [entity_id for (entity, entity_id), op in latest.items() if entity == name and op == "upsert"]
+            deletes = {entity_id for (entity, entity_id), op in latest.items() if entity == name and op == "delete"}
+            if upserts:
+                model = MODELS[name]
+                rows = db.query(model).filter(model.id.in_(upserts), self._visible(name, salesman_id, areas)).all()
+                payload["data"][key] = [SERIALIZERS[name](row) for row in rows]
+                # Sudah tidak terlihat (pindah area, stok habis, nonaktif) = hapus di device
+                deletes.update(set(upserts) - {row.id for row in rows})
+            payload["deleted"][key] = sorted(deletes)
+
+        next_version = changes[-1].id if changes else version
+        payload.update(mode="delta", has_more=len(changes) == page_size, sync_token=encode_token(next_version))
+        return payload
+
+# Initialize service
+sync_service = SyncService()
@@ -0,0 +1,278 @@
+# backend/app/services/sync_upload_service.py
+"""
+Sync Upload Service - merge action offline dari banyak device
+Satu batch = satu transaksi, satu savepoint per action, idempotency key per action.
+Action diterapkan urut waktu device (bukan urutan tiba); edit customer di-merge
+per field: field yang tidak bentrok langsung dipakai, yang bentrok last-writer-wins.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.database import (
+    User, Customer, SalesVisit, ProcessedSyncAction, SyncFieldClock, new_id
+)
+from app.services.credit_service import InsufficientCreditError
+from app.services.geofence_service import geofence_index
+from app.services.order_service import OrderInput, order_ingestion
+from app.services.rollup_service import sales_rollups, salesman_scope
+from app.services.sequence_service import sequence_allocator
+from app.services.sync_service import MERGE_FIELDS
+
+class SyncActionError(Exception):
+    """Action ditolak (data tidak valid); tidak dicatat, device boleh kirim ulang"""
+
+def action_key(action) -> str:
+    """Idempotency key dari device; device lama tanpa key: hash isi action"""
+    if action.idempotency_key:
+        return action.idempotency_key[:64]
+    raw = json.dumps([action.action_type, action.timestamp, action.data], sort_keys=True, default=str)
+    return "sha1:" + hashlib.sha1(raw.encode()).hexdigest()
+
+def device_time(timestamp: str, received_at: datetime) -> datetime:
+    """Waktu device dalam UTC naive; jam device yang maju dipotong ke waktu terima"""
+    at = datetime.fromisoformat(timestamp)
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(at, received_at)
+
+# ============= CONTEXT =============
+class UploadContext:
+    """Semua referensi batch dimuat di awal dengan satu query per tabel"""
+
+    def __init__(self, db: Session, actions: List, processed: Dict[str, Dict]):
+        self.processed = processed
+        by_type: Dict[str, List[Dict]] = {}
+        for action in actions:
+            by_type.setdefault(action.action_type, []).append(action.data)
+        check_outs = by_type.get("check_out", [])
+        orders = by_type.get("order", [])
+        updates = by_type.get("update_customer", [])
+
+        visit_ids = {data.get("visit_id") for data in check_outs} - {None}
+        visit_ids |= {processed[key].get("visit_id") for key in (data.get("visit_key") for data in check_outs)
+                      if key in processed} - {None}
+        self.visits: Dict[str, SalesVisit] = {
+            visit.id: visit for visit in db.query(SalesVisit).filter(SalesVisit.id.in_(visit_ids))
+        } if visit_ids else {}
+
+        salesman_ids = {data.get("salesman_id") for data in by_type.get("check_in", []) + orders} - {None}
+        self.salesmen: Dict[str, User] = {
+            user.id: user for user in db.query(User).filter(User.id.in_(salesman_ids))
+        } if salesman_ids else {}
+
+        customer_ids = {data.get("customer_id") for data in by_type.get("check_in", []) + orders + updates} - {None}
+        self.customers: Dict[str, Customer] = {
+            customer.id: customer for customer in db.query(Customer).filter(Customer.id.in_(customer_ids))
+        } if customer_ids else {}
+
+        # Clock per field hanya untuk customer yang diedit di batch ini
+        edited = [customer_id for customer_id in {data.get("customer_id") for data in updates} if customer_id in self.customers]
+        self.clocks: Dict[Tuple[str, str, str], SyncFieldClock] = {
+            (clock.entity, clock.entity_id, clock.field): clock
+            for clock in db.query(SyncFieldClock).filter(
+                SyncFieldClock.entity == "customers", SyncFieldClock.entity_id.in_(edited))
+        } if edited else {}
+
+        product_ids = {item.get("product_id") for data in orders for item in data.get("items") or []} - {None}
+        self.prices = order_ingestion.price_cache.get_prices(db, product_ids) if product_ids else {}
+
+    def visit_for(self, data: Dict) -> Optional[SalesVisit]:
+        """visit_id dari server, atau visit_key = idempotency key check-in offline"""
+        visit_id = data.get("visit_id")
+        if visit_id is None and data.get("visit_key") in self.processed:
+            visit_id = self.processed[data["visit_key"]].get("visit_id")
+        return self.visits.get(visit_id)
+
+    def register(self, created: List):
+        """Objek baru dari action yang berhasil (savepoint sudah release)"""
+        for obj in created:
+            if isinstance(obj, SalesVisit):
+                self.visits[obj.id] = obj
+            elif isinstance(obj, SyncFieldClock):
+                self.clocks[(obj.entity, obj.entity_id, obj.field)] = obj
+
+    def salesman(self, data: Dict) -> User:
+        salesman = self.salesmen.get(data["salesman_id"])
+        if salesman is None:
+            raise SyncActionError("salesman not found")
+        return salesman
+
+    def customer(self, data: Dict) -> Customer:
+        customer = self.customers.get(data["customer_id"])
+        if customer is None:
+            raise SyncActionError("customer not found")
+        return customer
+
+# ============= UPLOAD =============
+class SyncUploadService:
+    def __init__(self):
+        self._handlers = {
+            "check_in": self._check_in,
+            "check_out": self._check_out,
+            "order": self._order,
+            "update_customer": self._update_customer,
+        }
+
+    def apply(self, db: Session, actions: List, device_id: Optional[str] = None) -> List[Dict]:
+        """
+        Proses batch dalam satu transaksi, satu savepoint per action, urut waktu device.
+        Action yang key-nya sudah diproses tidak dijalankan lagi: hasil lamanya dikembalikan.
+        Return satu hasil per action, urut sesuai input.
+        """
+        received_at = datetime.utcnow()
+        keys = [action_key(action) for action in actions]
+        # visit_key bisa menunjuk check-in dari batch sebelumnya
+        visit_keys = {a.data.get("visit_key") for a in actions if a.action_type == "check_out"} - {None}
+        processed = {
+            row.idempotency_key: row.result or {}
+            for row in db.query(ProcessedSyncAction).filter(
+                ProcessedSyncAction.idempotency_key.in_(set(keys) | visit_keys))
+        }
+        ctx = UploadContext(db, actions, processed)
+        db.info["offline_merge"] = True  # clock field ditulis handler, bukan listener edit server
+
+        results: List[Optional[Dict]] = [None] * len(actions)
+        pending = []
+        for index, (key, action) in enumerate(zip(keys, actions)):
+            if key in processed:
+                results[index] = {"key": key, "status": "duplicate", **processed[key]}
+                continue
+            if action.action_type not in self._handlers:
+                results[index] = {"key": key, "status": "failed", "error": f"unknown action {action.action_type}"}
+                continue
+            try:
+                pending.append((device_time(action.timestamp, received_at), index))
+            except (TypeError, ValueError):
+                results[index] = {"key": key, "status": "failed", "error": "invalid timestamp"}
+        pending.sort()
+
+        # Nomor order dialokasikan sebelum transaksi tulis dimulai
+        order_numbers = {index: sequence_allocator.next_number("ORD")
+                         for _, index in pending if actions[index].action_type == "order"}
+
+        for at, index in pending:
+            key, action = keys[index], actions[index]
+            if key in processed:
+                # Key sama dua kali di satu batch
+                results[index] = {"key": key, "status": "duplicate", **processed[key]}
+                continue
+            try:
+                with db.begin_nested():
+                    result, created = self._handlers[action.action_type](
+                        db, action.data, ctx, at=at, device_id=device_id, order_number=order_numbers.get(index))
+                    db.add(ProcessedSyncAction(idempotency_key=key, action_type=action.action_type, result=result))
+                    db.flush()
+            except IntegrityError:
+                # Upload paralel dengan key yang sama sudah lebih dulu
+                results[index] = {"key": key, "status": "duplicate"}
+            except (SyncActionError, InsufficientCreditError, ValueError, KeyError, TypeError) as e:
+                results[index] = {"key": key, "status": "failed", "error": str(e) or type(e).__name__}
+            except Exception as e:
+                results[index] = {"key": key, "status": "error", "error": str(e)}
+            else:
+                processed[key] = result
+                ctx.register(created)
+                results[index] = {"key": key, "status": "success", **result}
+        try:
+            db.commit()
+        finally:
+            db.info.pop("offline_merge", None)
+        return results
+
+    # ----- handlers: return (hasil, objek baru), tanpa commit -----
+    def _check_in(self, db: Session, data: Dict, ctx: UploadContext, at: datetime, **_):
+        salesman = ctx.salesman(data)
+        customer = ctx.customer(data)
+        # Geofence sama dengan check-in online; tanpa koordinat tidak bisa divalidasi
+        latitude, longitude = data.get("latitude"), data.get("longitude")
+        checked = latitude is not None and longitude is not None
+        geofence = (geofence_index.validate_customer(customer, latitude, longitude, suggest=False) if checked
+                    else {"location_valid": False, "distance_m": None})
+        visit = SalesVisit(
+            id=new_id(),
+            salesman_id=salesman.id,
+            customer_id=customer.id,
+            visit_type=data.get("visit_type", "regular"),
+            check_in=at,
+            gps_latitude=latitude,
+            gps_longitude=longitude,
+            gps_accuracy=geofence["distance_m"],
+            selfie_url=data.get("photo_url"),
+            notes=data.get("notes"),
+            location_valid=geofence["location_valid"],
+            location_fraud_attempt=checked and not geofence["location_valid"]
+        )
+        db.add(visit)
+        sales_rollups.record_visit(db, salesman_scope(salesman), at)
+        return {"visit_id": visit.id, "location_valid": geofence["location_valid"],
+                "distance_m": geofence["distance_m"]}, [visit]
+
+    def _check_out(self, db: Session, data: Dict, ctx: UploadContext, at: datetime, **_):
+        visit = ctx.visit_for(data)
+        if visit is None:
+            raise SyncActionError("visit not found")
+        if visit.check_out:
+            raise SyncActionError("already checked out")
+        visit.check_out = at
+        if visit.check_in:
+            visit.duration_minutes = int((visit.check_out - visit.check_in).total_seconds() / 60)
+        if data.get("notes"):
+            visit.notes = f"{visit.notes}\n{data['notes']}" if visit.notes else data["notes"]
+        return {"visit_id": visit.id}, []
+
+    def _order(self, db: Session, data: Dict, ctx: UploadContext, at: datetime, order_number: str, **_):
+        salesman = ctx.salesman(data)
+        ctx.customer(data)
+        order_input = OrderInput(customer_id=data["customer_id"], items=data.get("items") or [],
+                                 client_ref=data.get("client_ref"))
+        created = order_ingestion._ingest(db, salesman_scope(salesman), order_input, ctx.prices, order_number, at=at)
+        return {"order_id": created["order_id"], "order_number": created["order_number"]}, []
+
+    def _update_customer(self, db: Session, data: Dict, ctx: UploadContext, at: datetime,
+                         device_id: Optional[str] = None, **_):
+        """
+        Merge per field. data: customer_id, changes {field: nilai baru},
+        base {field: nilai yang dilihat device sebelum edit, opsional}.
+        Field hanya bisa bentrok jika field itu sendiri punya clock (edit device lain
+        atau edit server); bentrok dimenangkan edit yang lebih baru.
+        """
+        customer = ctx.customer(data)
+        changes, base = data.get("changes") or {}, data.get("base") or {}
+        unknown = set(changes) - set(MERGE_FIELDS["customers"])
+        if not changes or unknown:
+            raise SyncActionError(f"invalid fields: {', '.join(sorted(unknown)) or '-'}")
+
+        applied, conflicts, created = [], [], []
+        for field, value in changes.items():
+            current = getattr(customer, field)
+            clock = ctx.clocks.get(("customers", customer.id, field))
+            if clock is None or (field in base and base[field] == current):
+                # Belum pernah diedit sejak dibuat, atau device sudah melihat nilai terakhir
+                wins = clock is None or at >= clock.updated_at
+            else:
+                wins = at > clock.updated_at
+            if not wins:
+                conflicts.append(field)
+                continue
+            if value != current:
+                setattr(customer, field, value)
+            if clock is None:
+                clock = SyncFieldClock(entity="customers", entity_id=customer.id, field=field)
+                db.add(clock)
+                created.append(clock)
+            clock.updated_at, clock.device_id = at, device_id
+            applied.append(field)
+
+        result = {"customer_id": customer.id, "applied": applied}
+        if conflicts:
+            result["conflicts"] = conflicts
+        return result, created
+
+# Initialize service
+sync_uploads = SyncUploadService()
@@ -0,0 +1,140 @@
+# backend/app/services/team_index.py
+"""
+Team Index - peta supervisor -> salesman dan user -> area di memory
+Dipakai semua query yang di-scope berdasarkan role, tanpa round-trip DB.
+Index di-rebuild saat version stamp berubah (ada perubahan user).
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal, User, UserRole
+
+# ============= VERSION STAMP =============
+class UserDirectoryVersion:
+    """Counter yang naik setiap ada commit yang mengubah tabel users"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.value += 1
+
+user_directory_version = UserDirectoryVersion()
+
+def _is_user(obj) -> bool:
+    return getattr(obj, "__tablename__", None) == "users"
+
+@event.listens_for(Session, "after_flush")
+def _mark_user_changes(session, flush_context):
+    if any(_is_user(obj) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["users_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _bump_user_directory_version(session):
+    if session.info.pop("users_changed", False):
+        user_directory_version.bump()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session):
+    session.info.pop("users_changed", None)
+
+# ============= TEAM INDEX =============
+class TeamIndex:
+    SUPERVISED_ROLES = {
+        UserRole.SUPERVISOR_TOKO.value: UserRole.SALES_TOKO.value,
+        UserRole.SUPERVISOR_PROJECT.value: UserRole.SALES_PROJECT.value,
+    }
+    # Perubahan dari worker lain tidak menaikkan version lokal, jadi rebuild berkala
+    MAX_AGE_SECONDS = 60
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._built_version = -1
+        self._built_at = 0.0
+        # (users, by_role) dipublikasikan sebagai satu tuple: pembaca selalu melihat pasangan yang sama
+        self._snapshot: Tuple[Dict[str, Dict], Dict[str, List[str]]] = ({}, {})
+
+    def _is_fresh(self) -> bool:
+        return (self._built_version == user_directory_version.value
+                and time.monotonic() - self._built_at < self.MAX_AGE_SECONDS)
+
+    def _ensure_fresh(self):
+        if self._is_fresh():
+            return
+        with self._lock:
+            if self._is_fresh():
+                return
+            version = user_directory_version.value
+            self._rebuild()
+            self._built_version = version
+            self._built_at = time.monotonic()
+
+    def _rebuild(self):
+        users = {}
+        by_role = defaultdict(list)
+        with self.session_factory() as db:
+            rows = db.query(User.id, User.name, User.role, User.area_detail).filter(User.is_active == True).all()
+        for row in rows:
+            role = getattr(row.role, "value", row.role)
+            areas = list((row.area_detail or {}).get("location") or [])
+            users[row.id] = {"id": row.id, "name": row.name, "role": role, "areas": areas}
+            by_role[role].append(row.id)
+        # Swap atomik, pembaca lama tetap melihat index yang konsisten
+        self._snapshot = (users, dict(by_role))
+
+    def _current(self) -> Tuple[Dict[str, Dict], Dict[str, List[str]]]:
+        self._ensure_fresh()
+        return self._snapshot
+
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        users, _ = self._current()
+        return users.get(user_id)
+
+    def role_of(self, user_id: str) -> Optional[str]:
+        user = self.get_user(user_id)
+        return user["role"] if user else None
+
+    def areas_of(self, user_id: str) -> List[str]:
+        user = self.get_user(user_id)
+        return user["areas"] if user else []
+
+    def users_with_roles(self, *roles: str) -> List[Dict]:
+        users, by_role = self._current()
+        return [users[uid] for role in roles for uid in by_role.get(role, [])]
+
+    def team_of(self, supervisor_id: str) -> List[str]:
+        """
+        Salesman di bawah supervisor: role sales yang sesuai,
+        dibatasi area supervisor jika supervisor punya area
+        """
+        users, by_role = self._current()
+        return [user["id"] for user in self._team(users, by_role, supervisor_id)]
+
+    def team_areas(self, supervisor_id: str) -> List[str]:
+        """Gabungan area dari semua salesman di tim supervisor"""
+        users, by_role = self._current()
+        supervisor = users.get(supervisor_id)
+        areas = {area for user in self._team(users, by_role, supervisor_id) for area in user["areas"]}
+        return sorted(areas.union(supervisor["areas"] if supervisor else []))
+
+    def _team(self, users: Dict[str, Dict], by_role: Dict[str, List[str]], supervisor_id: str) -> List[Dict]:
+        supervisor = users.get(supervisor_id)
+        if not supervisor or supervisor["role"] not in self.SUPERVISED_ROLES:
+            return []
+        team = [users[uid] for uid in by_role.get(self.SUPERVISED_ROLES[supervisor["role"]], [])]
+        if not supervisor["areas"]:
+            return team
+        areas: Set[str] = set(supervisor["areas"])
+        return [user for user in team if areas.intersection(user["areas"])]
+
+# Initialize index
+team_index = TeamIndex()
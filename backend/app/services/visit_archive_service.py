@@ -0,0 +1,124 @@
+# backend/app/services/visit_archive_service.py
+"""
+Visit Archive Service - riwayat kunjungan hot/cold dengan cursor paging
+Kunjungan lebih lama dari ARCHIVE_AFTER_DAYS dipindah per batch ke
+sales_visits_archive, jadi tabel sales_visits (check-in harian) tetap kecil.
+Riwayat dibaca dengan keyset (check_in, id) dari kedua tabel sekaligus,
+satu halaman per query, sehingga rentang panjang tetap memory konstan.
+"""
+
+import argparse
+import base64
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, insert, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal, SalesVisit, SalesVisitArchive
+
+# ============= CONFIG =============
+class VisitArchiveConfig:
+    ARCHIVE_AFTER_DAYS = int(os.getenv("VISIT_ARCHIVE_AFTER_DAYS", "90"))
+    BATCH_SIZE = 1000
+    PAGE_SIZE = 200
+    MAX_PAGE_SIZE = 1000
+
+HOT = SalesVisit.__table__
+COLD = SalesVisitArchive.__table__
+HISTORY_COLUMNS = ("id", "customer_id", "check_in", "check_out", "duration_minutes", "notes")
+
+# ============= CURSOR =============
+def encode_cursor(check_in: datetime, visit_id: str) -> str:
+    raw = f"{check_in.isoformat()}|{visit_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        check_in, visit_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("|")
+        return datetime.fromisoformat(check_in), visit_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def visit_dict(row) -> Dict:
+    return {
+        "visit_id": row.id,
+        "customer_id": row.customer_id,
+        "check_in": row.check_in.isoformat(),
+        "check_out": row.check_out.isoformat() if row.check_out else None,
+        "duration_minutes": row.duration_minutes,
+        "notes": row.notes
+    }
+
+# ============= SERVICE =============
+class VisitArchiveService:
+    def __init__(self, config=VisitArchiveConfig):
+        self.config = config
+
+    def archive(self, db: Session, before: Optional[datetime] = None, batch_size: Optional[int] = None) -> int:
+        """
+        Pindahkan kunjungan dengan check_in < before ke archive, satu transaksi per batch.
+        Return jumlah baris yang dipindah.
+        """
+        before = before or datetime.utcnow() - timedelta(days=self.config.ARCHIVE_AFTER_DAYS)
+        batch_size = batch_size or self.config.BATCH_SIZE
+        moved = 0
+        while True:
+            ids = db.execute(
+                select(HOT.c.id).where(HOT.c.check_in < before).order_by(HOT.c.check_in).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return moved
+            columns = [column.name for column in COLD.columns]
+            db.execute(insert(COLD).from_select(columns, select(*(HOT.c[name] for name in columns)).where(HOT.c.id.in_(ids))))
+            db.execute(delete(HOT).where(HOT.c.id.in_(ids)))
+            db.commit()
+            moved += len(ids)
+
+    def _branch(self, table, salesman_id: str, since: datetime, after: Optional[Tuple[datetime, str]], limit: int):
+        """Satu tabel, urut (check_in, id) turun, dibatasi limit (pakai index salesman_id, check_in)"""
+        conditions = [table.c.salesman_id == salesman_id, table.c.check_in >= since]
+        if after is not None:
+            check_in, visit_id = after
+            conditions.append(or_(table.c.check_in < check_in, and_(table.c.check_in == check_in, table.c.id < visit_id)))
+        query = select(*(table.c[name] for name in HISTORY_COLUMNS)).where(*conditions)
+        return select(query.order_by(table.c.check_in.desc(), table.c.id.desc()).limit(limit).subquery())
+
+    def history_page(self, db: Session, salesman_id: str, since: datetime,
+                     cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List, Optional[str]]:
+        """Satu halaman riwayat (hot + archive); next_cursor None = halaman terakhir"""
+        limit = max(1, min(limit or self.config.PAGE_SIZE, self.config.MAX_PAGE_SIZE))
+        after = decode_cursor(cursor) if cursor else None
+        merged = union_all(*(self._branch(table, salesman_id, since, after, limit + 1) for table in (HOT, COLD))).subquery()
+        rows = db.execute(
+            select(merged).order_by(merged.c.check_in.desc(), merged.c.id.desc()).limit(limit + 1)
+        ).all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].check_in, rows[-1].id)
+
+    def iter_history(self, db: Session, salesman_id: str, since: datetime,
+                     page_size: Optional[int] = None) -> Iterator:
+        """Semua kunjungan sejak since, dibaca per halaman keyset"""
+        cursor = None
+        while True:
+            rows, cursor = self.history_page(db, salesman_id, since, cursor, page_size)
+            yield from rows
+            if cursor is None:
+                return
+
+# Initialize service
+visit_archive = VisitArchiveService()
+
+if __name__ == "__main__":
+    # Dijalankan terjadwal (cron), mis. tiap malam: python -m app.services.visit_archive_service
+    parser = argparse.ArgumentParser(description="Pindahkan kunjungan lama ke sales_visits_archive")
+    parser.add_argument("--days", type=int, default=VisitArchiveConfig.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=VisitArchiveConfig.BATCH_SIZE)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        moved = visit_archive.archive(db, datetime.utcnow() - timedelta(days=args.days), args.batch_size)
+    print(f"{moved} kunjungan diarsip")
@@ -1,12 +1,19 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, date
 import sqlite3
+import sys
+from pathlib import Path
 import jwt
 from passlib.context import CryptContext
 
+# Shared SQLite tuning dari backend utama (WAL + single writer)
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "backend"))
+from app.core.sqlite import connect as sqlite_connect, SQLiteWriter
+from app.core.streaming import stream_json
+
 app = FastAPI(title="Gajah Nusa HR System API")
 
 # CORS middleware
@@ -24,10 +31,11 @@ SECRET_KEY = "gajah-nusa-hr-secret-key-2025"
 ALGORITHM = "HS256"
 
 # Database
+DB_PATH = 'hr_system.db'
+db_writer = SQLiteWriter(DB_PATH)
+
 def get_db():
-    conn = sqlite3.connect('hr_system.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    return sqlite_connect(DB_PATH)
 
 # Pydantic Models
 class LoginRequest(BaseModel):
@@ -292,77 +300,70 @@ async def update_employee(employee_id: int, employee: Employee):
 # Attendance endpoints
 @app.post("/api/attendance/check-in")
 async def check_in(data: dict):
-    conn = get_db()
-    cursor = conn.cursor()
-    
     employee_id = data.get('employeeId')
     now = datetime.now()
     date_str = now.strftime('%Y-%m-%d')
     time_str = now.strftime('%H:%M:%S')
     
-    # Check if already checked in today
-    existing = cursor.execute(
-        "SELECT * FROM attendance WHERE employeeId = ? AND date = ?",
-        (employee_id, date_str)
-    ).fetchone()
-    
-    if existing:
-        conn.close()
-        raise HTTPException(status_code=400, detail="Already checked in today")
-    
     # Determine status (late if after 08:30)
     status = "Late" if now.hour > 8 or (now.hour == 8 and now.minute > 30) else "Present"
     
-    cursor.execute(
-        "INSERT INTO attendance (employeeId, date, checkIn, status) VALUES (?, ?, ?, ?)",
-        (employee_id, date_str, time_str, status)
-    )
+    def write(conn):
+        # Check if already checked in today
+        existing = conn.execute(
+            "SELECT id FROM attendance WHERE employeeId = ? AND date = ?",
+            (employee_id, date_str)
+        ).fetchone()
+        
+        if existing:
+            raise HTTPException(status_code=400, detail="Already checked in today")
+        
+        conn.execute(
+            "INSERT INTO attendance (employeeId, date, checkIn, status) VALUES (?, ?, ?, ?)",
+            (employee_id, date_str, time_str, status)
+        )
     
-    conn.commit()
-    conn.close()
+    await db_writer.run_async(write)
     
     return {"message": "Check-in successful", "time": time_str, "status": status}
 
 @app.post("/api/attendance/check-out")
 async def check_out(data: dict):
-    conn = get_db()
-    cursor = conn.cursor()
-    
     employee_id = data.get('employeeId')
     now = datetime.now()
     date_str = now.strftime('%Y-%m-%d')
     time_str = now.strftime('%H:%M:%S')
     
-    # Find today's check-in record
-    record = cursor.execute(
-        "SELECT * FROM attendance WHERE employeeId = ? AND date = ? AND checkOut IS NULL",
-        (employee_id, date_str)
-    ).fetchone()
-    
-    if not record:
-        conn.close()
-        raise HTTPException(status_code=400, detail="No check-in record found")
-    
-    # Calculate work hours
-    check_in_time = datetime.strptime(f"{date_str} {record['checkIn']}", '%Y-%m-%d %H:%M:%S')
-    check_out_time = now
-    work_hours = (check_out_time - check_in_time).total_seconds() / 3600
-    
-    cursor.execute(
-        "UPDATE attendance SET checkOut = ?, workHours = ? WHERE id = ?",
-        (time_str, round(work_hours, 2), record['id'])
-    )
+    def write(conn):
+        # Find today's check-in record
+        record = conn.execute(
+            "SELECT * FROM attendance WHERE employeeId = ? AND date = ? AND checkOut IS NULL",
+            (employee_id, date_str)
+        ).fetchone()
+        
+        if not record:
+            raise HTTPException(status_code=400, detail="No check-in record found")
+        
+        # Calculate work hours
+        check_in_time = datetime.strptime(f"{date_str} {record['checkIn']}", '%Y-%m-%d %H:%M:%S')
+        work_hours = (now - check_in_time).total_seconds() / 3600
+        
+        conn.execute(
+            "UPDATE attendance SET checkOut = ?, workHours = ? WHERE id = ?",
+            (time_str, round(work_hours, 2), record['id'])
+        )
+        return work_hours
     
-    conn.commit()
-    conn.close()
+    work_hours = await db_writer.run_async(write)
     
     return {"message": "Check-out successful", "time": time_str, "workHours": round(work_hours, 2)}
 
 @app.get("/api/attendance/report")
-async def get_attendance_report(start_date: str, end_date: str):
+async def get_attendance_report(start_date: str, end_date: str, request: Request):
     conn = get_db()
     cursor = conn.cursor()
     
+    # Di-stream per chunk (fetchmany); koneksi ditutup setelah baris terakhir
     records = cursor.execute(
         """
         SELECT a.*, e.name as employeeName 
@@ -372,10 +373,9 @@ async def get_attendance_report(start_date: str, end_date: str):
         ORDER BY a.date DESC, a.checkIn DESC
         """,
         (start_date, end_date)
-    ).fetchall()
+    )
     
-    conn.close()
-    return [dict(record) for record in records]
+    return stream_json(records, request=request, close=conn.close)
 
 @app.get("/api/attendance/today")
 async def get_today_report():
@@ -405,7 +405,7 @@ async def get_today_report():
 
 # Payroll endpoints
 @app.get("/api/payroll")
-async def get_payroll():
+async def get_payroll(request: Request):
     conn = get_db()
     cursor = conn.cursor()
     
@@ -416,10 +416,9 @@ async def get_payroll():
         JOIN employees e ON p.employeeId = e.employeeId 
         ORDER BY p.year DESC, p.month DESC
         """
-    ).fetchall()
+    )
     
-    conn.close()
-    return [dict(record) for record in records]
+    return stream_json(records, request=request, close=conn.close)
 
 @app.post("/api/payroll/generate")
 async def generate_payroll(data: dict):
@@ -1,12 +1,19 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
+from fastapi import FastAPI, HTTPException, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from datetime import datetime
 import sqlite3
+import sys
+from pathlib import Path
 import jwt
 import hashlib
 
+# Shared SQLite tuning dari backend utama (WAL + single writer)
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "backend"))
+from app.core.sqlite import connect as sqlite_connect, SQLiteWriter
+from app.core.streaming import stream_json
+
 app = FastAPI(title="Gajah Nusa E-commerce API")
 
 # CORS
@@ -22,10 +29,11 @@ SECRET_KEY = "gajah-nusa-ecommerce-secret-2025"
 ALGORITHM = "HS256"
 
 # Database
+DB_PATH = 'ecommerce.db'
+db_writer = SQLiteWriter(DB_PATH)
+
 def get_db():
-    conn = sqlite3.connect('ecommerce.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    return sqlite_connect(DB_PATH)
 
 # Pydantic Models
 class Product(BaseModel):
@@ -176,7 +184,7 @@ def get_current_customer(authorization: str = Header(None)):
 
 # Products Endpoints
 @app.get("/api/products")
-async def get_products(category: Optional[str] = None, search: Optional[str] = None):
+async def get_products(request: Request, category: Optional[str] = None, search: Optional[str] = None):
     conn = get_db()
     cursor = conn.cursor()
     
@@ -193,10 +201,10 @@ async def get_products(category: Optional[str] = None, search: Optional[str] = N
     
     query += " ORDER BY name"
     
-    products = cursor.execute(query, params).fetchall()
-    conn.close()
+    # Di-stream per chunk (fetchmany); koneksi ditutup setelah baris terakhir
+    products = cursor.execute(query, params)
     
-    return [dict(p) for p in products]
+    return stream_json(products, request=request, close=conn.close)
 
 @app.get("/api/products/{product_id}")
 async def get_product(product_id: int):
@@ -338,65 +346,61 @@ async def login_customer(email: EmailStr, password: str):
 @app.post("/api/orders/")
 async def create_order_simple(order_data: dict):
     """Create order without authentication (for guest checkout)"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
     # Generate order number
     order_number = f"ORD-{datetime.now().strftime('%Y%m%d%H%M%S')}"
     
-    # Create order
-    cursor.execute(
-        """INSERT INTO orders (
-            order_number, customer_id, subtotal, tax, shipping, total, 
-            status, payment_method, shipping_address, notes, created_at, updated_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            order_number, 
-            order_data['customer_id'],
-            order_data['subtotal'],
-            order_data['tax'],
-            order_data['shipping'],
-            order_data['total'],
-            order_data.get('status', 'pending'),
-            order_data['payment_method'],
-            order_data['shipping_address'],
-            order_data.get('notes', ''),
-            datetime.now().isoformat(),
-            datetime.now().isoformat()
-        )
-    )
-    order_id = cursor.lastrowid
-    
-    # Add order items and update stock
-    for item in order_data['items']:
-        # Get product
-        product = cursor.execute("SELECT * FROM products WHERE id = ?", (item['product_id'],)).fetchone()
+    def write(conn):
+        cursor = conn.cursor()
         
-        if not product:
-            conn.rollback()
-            conn.close()
-            raise HTTPException(status_code=404, detail=f"Product {item['product_id']} not found")
-        
-        if product['stock'] < item['quantity']:
-            conn.rollback()
-            conn.close()
-            raise HTTPException(status_code=400, detail=f"Insufficient stock for {product['name']}")
-        
-        # Insert order item
+        # Create order
         cursor.execute(
-            """INSERT INTO order_items (order_id, product_id, product_name, quantity, price) 
-               VALUES (?, ?, ?, ?, ?)""",
-            (order_id, item['product_id'], product['name'], item['quantity'], item['price'])
+            """INSERT INTO orders (
+                order_number, customer_id, subtotal, tax, shipping, total, 
+                status, payment_method, shipping_address, notes, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                order_number, 
+                order_data['customer_id'],
+                order_data['subtotal'],
+                order_data['tax'],
+                order_data['shipping'],
+                order_data['total'],
+                order_data.get('status', 'pending'),
+                order_data['payment_method'],
+                order_data['shipping_address'],
+                order_data.get('notes', ''),
+                datetime.now().isoformat(),
+                datetime.now().isoformat()
+            )
         )
+        order_id = cursor.lastrowid
         
-        # Update stock
-        cursor.execute(
-            "UPDATE products SET stock = stock - ? WHERE id = ?",
-            (item['quantity'], item['product_id'])
-        )
+        # Add order items and update stock (exception = rollback oleh writer)
+        for item in order_data['items']:
+            # Get product
+            product = cursor.execute("SELECT * FROM products WHERE id = ?", (item['product_id'],)).fetchone()
+            
+            if not product:
+                raise HTTPException(status_code=404, detail=f"Product {item['product_id']} not found")
+            
+            if product['stock'] < item['quantity']:
+                raise HTTPException(status_code=400, detail=f"Insufficient stock for {product['name']}")
+            
+            # Insert order item
+            cursor.execute(
+                """INSERT INTO order_items (order_id, product_id, product_name, quantity, price) 
+                   VALUES (?, ?, ?, ?, ?)""",
+                (order_id, item['product_id'], product['name'], item['quantity'], item['price'])
+            )
+            
+            # Update stock
+            cursor.execute(
+                "UPDATE products SET stock = stock - ? WHERE id = ?",
+                (item['quantity'], item['product_id'])
+            )
+        return order_id
     
-    conn.commit()
-    conn.close()
+    order_id = await db_writer.run_async(write)
     
     return {
         "id": order_id,
@@ -435,48 +439,44 @@ async def create_order(order: Order, customer_id: int = Depends(get_current_cust
     if not customer_id:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
     # Generate order number
     order_number = f"ORD-{datetime.now().strftime('%Y%m%d%H%M%S')}"
     
-    # Create order
-    cursor.execute(
-        "INSERT INTO orders (orderNumber, customerId, totalAmount, status, shippingAddress, paymentMethod) VALUES (?, ?, ?, ?, ?, ?)",
-        (order_number, customer_id, order.totalAmount, order.status, order.shippingAddress, order.paymentMethod)
-    )
-    order_id = cursor.lastrowid
-    
-    # Add order items and update stock
-    for item in order.items:
-        # Get product
-        product = cursor.execute("SELECT * FROM products WHERE id = ?", (item.productId,)).fetchone()
-        
-        if not product:
-            conn.rollback()
-            conn.close()
-            raise HTTPException(status_code=404, detail=f"Product {item.productId} not found")
-        
-        if product['stock'] < item.quantity:
-            conn.rollback()
-            conn.close()
-            raise HTTPException(status_code=400, detail=f"Insufficient stock for {product['name']}")
+    def write(conn):
+        cursor = conn.cursor()
         
-        # Insert order item
+        # Create order
         cursor.execute(
-            "INSERT INTO order_items (orderId, productId, quantity, price) VALUES (?, ?, ?, ?)",
-            (order_id, item.productId, item.quantity, product['price'])
+            "INSERT INTO orders (orderNumber, customerId, totalAmount, status, shippingAddress, paymentMethod) VALUES (?, ?, ?, ?, ?, ?)",
+            (order_number, customer_id, order.totalAmount, order.status, order.shippingAddress, order.paymentMethod)
         )
+        order_id = cursor.lastrowid
         
-        # Update stock
-        cursor.execute(
-            "UPDATE products SET stock = stock - ? WHERE id = ?",
-            (item.quantity, item.productId)
-        )
+        # Add order items and update stock (exception = rollback oleh writer)
+        for item in order.items:
+            # Get product
+            product = cursor.execute("SELECT * FROM products WHERE id = ?", (item.productId,)).fetchone()
+            
+            if not product:
+                raise HTTPException(status_code=404, detail=f"Product {item.productId} not found")
+            
+            if product['stock'] < item.quantity:
+                raise HTTPException(status_code=400, detail=f"Insufficient stock for {product['name']}")
+            
+            # Insert order item
+            cursor.execute(
+                "INSERT INTO order_items (orderId, productId, quantity, price) VALUES (?, ?, ?, ?)",
+                (order_id, item.productId, item.quantity, product['price'])
+            )
+            
+            # Update stock
+            cursor.execute(
+                "UPDATE products SET stock = stock - ? WHERE id = ?",
+                (item.quantity, item.productId)
+            )
+        return order_id
     
-    conn.commit()
-    conn.close()
+    order_id = await db_writer.run_async(write)
     
     return {
         "orderId": order_id,
@@ -216,8 +216,10 @@ class FraudDetectionML:
         Detect location-based fraud in sales visits
         """
         try:
-            # Calculate distance from expected location
-            distance = visit_data.get('gps_accuracy', 0)
+            # Distance from expected location (hasil geofence, fallback ke gps_accuracy lama)
+            distance = visit_data.get('distance_m')
+            if distance is None:
+                distance = visit_data.get('gps_accuracy') or 0
             
             # Check time patterns
             visit_hour = visit_data.get('hour', datetime.now().hour)
@@ -232,7 +234,7 @@ class FraudDetectionML:
             fraud_score = 0
             reasons = []
             
-            if distance > 100:  # More than 100 meters from store
+            if distance > 100 or visit_data.get('location_valid') is False:  # More than 100 meters from store
                 fraud_score += 0.4
                 reasons.append('Location mismatch')
             
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test akses /api/blobs/{ref}
+Selfie / foto wajah hanya untuk uploader, supervisor uploader dan role admin;
+user lain mendapat 404. Foto wajah legacy yang dipindah ke blob store dicatat di user.
+"""
+
+import asyncio
+import base64
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+from app.models.database import Base, User, Customer, SalesVisit, UserRole, AreaType, build_engine
+from app.services import auth_service as auth_module
+from app.services.blob_store import blob_store
+from app.services.face_embedding_service import FaceConfig, FaceEmbeddingStore
+from app.services.team_index import team_index, user_directory_version
+
+def _user(code, role, areas=None, **fields):
+    return User(employee_id=code, name=code, email=f"{code.lower()}@example.com", password_hash="x", role=role,
+                area_type=AreaType.URBAN, phone_personal="0811", area_detail={"location": areas or []}, **fields)
+
+def _png(seed: int) -> bytes:
+    image = Image.new("L", (32, 16))
+    image.putdata([(x * seed + y * 7) % 256 for y in range(16) for x in range(32)])
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def test_blob_access():
+    print("=== Testing Blob Access ===\n")
+    tmp = tempfile.mkdtemp()
+    engine = build_engine(f"sqlite:///{os.path.join(tmp, 'blobs.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    original_root = blob_store.root
+    blob_store.root = os.path.join(tmp, "store")
+    selfie_ref = blob_store.save_bytes(_png(3), thumbnail=False)["ref"]
+    face_ref = blob_store.save_bytes(_png(5), thumbnail=False)["ref"]
+
+    with Session() as db:
+        users = {
+            "uploader": _user("BA001", UserRole.SALES_TOKO, ["KDR"]),
+            "other": _user("BA002", UserRole.SALES_TOKO, ["SBY"], face_photo_ref=face_ref),
+            "supervisor": _user("BV001", UserRole.SUPERVISOR_TOKO, ["KDR"]),
+            "other_supervisor": _user("BV002", UserRole.SUPERVISOR_TOKO, ["SBY"]),
+            "admin": _user("BD001", UserRole.ADMIN),
+        }
+        customer = Customer(customer_code="BA0001", name="Toko", type="toko", address="Jl. Raya",
+                            phone_owner="0811", area_code="KDR")
+        db.add_all([*users.values(), customer])
+        db.flush()
+        db.add(SalesVisit(salesman_id=users["uploader"].id, customer_id=customer.id, visit_type="regular",
+                          selfie_url=selfie_ref))
+        db.commit()
+        ids = {key: user.id for key, user in users.items()}
+
+    current = {}
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def override_user():
+        with Session() as db:
+            return db.get(User, current["id"])
+
+    original_factory = team_index.session_factory
+    team_index.session_factory = Session
+    user_directory_version.bump()
+    main.app.dependency_overrides[main.get_db] = override_db
+    main.app.dependency_overrides[main.get_current_user] = override_user
+    try:
+        client = TestClient(main.app)
+
+        def status(key, ref):
+            current["id"] = ids[key]
+            return client.get(f"/api/blobs/{ref}").status_code
+
+        assert [status(key, selfie_ref) for key in ("uploader", "supervisor", "admin")] == [200, 200, 200]
+        assert [status(key, selfie_ref) for key in ("other", "other_supervisor")] == [404, 404]
+        assert [status(key, face_ref) for key in ("other", "other_supervisor", "uploader", "supervisor")] == [200, 200, 404, 404]
+        assert status("admin", "sha256:" + "0" * 64) == 404
+        assert status("admin", "not-a-ref") == 400
+    finally:
+        main.app.dependency_overrides.clear()
+        team_index.session_factory = original_factory
+        user_directory_version.bump()
+        blob_store.root = original_root
+        engine.dispose()
+    print("✅ Blob hanya terbaca oleh uploader, supervisornya dan admin")
+
+def test_verify_face_records_migrated_photo():
+    print("=== Testing Legacy Face Photo Migration ===\n")
+    tmp = tempfile.mkdtemp()
+    engine = build_engine(f"sqlite:///{os.path.join(tmp, 'face.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    photo = base64.b64encode(_png(9)).decode()
+
+    with Session() as db:
+        user = _user("FL001", UserRole.SALES_TOKO, face_encoding=photo)
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    originals = (blob_store.root, auth_module.face_embeddings, FaceConfig.DEV_FALLBACK)
+    blob_store.root = os.path.join(tmp, "store")
+    auth_module.face_embeddings = FaceEmbeddingStore(os.path.join(tmp, "embeddings"))
+    FaceConfig.DEV_FALLBACK = True
+    try:
+        with Session() as db:
+            assert asyncio.run(main.auth_service.verify_face(photo, user_id, db))
+        with Session() as db:
+            ref = db.get(User, user_id).face_photo_ref
+        assert ref and blob_store.exists(ref)
+    finally:
+        blob_store.root, auth_module.face_embeddings, FaceConfig.DEV_FALLBACK = originals
+        engine.dispose()
+    print("✅ Foto wajah legacy tersimpan sebagai face_photo_ref")
+
+if __name__ == "__main__":
+    test_blob_access()
+    test_verify_face_records_migrated_photo()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark untuk atomic credit reservation
+200 order paralel ke satu toko - credit tidak boleh overspend
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Customer, CreditLedgerEntry
+from app.services.credit_service import CreditLedgerService, InsufficientCreditError
+
+PARALLEL_ORDERS = 200
+CREDIT_LIMIT = 1_000_000.0
+ORDER_AMOUNT = 15_000.0
+
+def test_no_overspend_under_parallel_orders():
+    """200 thread reservasi credit bersamaan untuk customer yang sama"""
+    print("=== Testing Credit Reservation Concurrency ===\n")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "credit_bench.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False, "timeout": 60})
+    Base.metadata.create_all(bind=engine, tables=[Customer.__table__, CreditLedgerEntry.__table__])
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        db.add(Customer(
+            id="toko-1", customer_code="C001", name="Toko Bench", type="toko",
+            address="Kediri", phone_owner="0811", area_code="KDR",
+            credit_limit=CREDIT_LIMIT, credit_used=0.0
+        ))
+        db.commit()
+
+    ledger = CreditLedgerService()
+    outcomes = {"reserved": 0, "rejected": 0, "errors": 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(PARALLEL_ORDERS)
+
+    def place_order(i):
+        barrier.wait()
+        with Session() as db:
+            try:
+                ledger.reserve(db, "toko-1", ORDER_AMOUNT, order_id=f"order-{i}")
+                db.commit()
+                key = "reserved"
+            except InsufficientCreditError:
+                db.rollback()
+                key = "rejected"
+            except Exception:
+                db.rollback()
+                key = "errors"
+        with lock:
+            outcomes[key] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=place_order, args=(i,)) for i in range(PARALLEL_ORDERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    with Session() as db:
+        credit_used = db.query(Customer.credit_used).filter(Customer.id == "toko-1").scalar()
+        ledger_rows = db.query(CreditLedgerEntry).count()
+
+    print(f"   Orders: {PARALLEL_ORDERS} parallel, {elapsed:.2f}s ({PARALLEL_ORDERS / elapsed:.0f} orders/s)")
+    print(f"   Reserved: {outcomes['reserved']}, rejected: {outcomes['rejected']}, errors: {outcomes['errors']}")
+    print(f"   Credit used: {credit_used:,.0f} / {CREDIT_LIMIT:,.0f}")
+
+    assert credit_used <= CREDIT_LIMIT
+    assert credit_used == outcomes["reserved"] * ORDER_AMOUNT
+    assert ledger_rows == outcomes["reserved"]
+    assert outcomes["reserved"] == int(CREDIT_LIMIT // ORDER_AMOUNT)
+    print("\n✅ No overspend under parallel orders")
+
+if __name__ == "__main__":
+    test_no_overspend_under_parallel_orders()
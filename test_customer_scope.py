@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test scope /api/customers per role lewat team index
+Sales toko melihat area sendiri, supervisor toko melihat area timnya.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+from app.models.database import Base, User, Customer, UserRole, AreaType, build_engine
+from app.services.team_index import TeamIndex, team_index, user_directory_version
+
+def _user(code, role, areas):
+    return User(employee_id=code, name=code, email=f"{code.lower()}@example.com", password_hash="x", role=role,
+                area_type=AreaType.URBAN, phone_personal="0811", area_detail={"location": areas})
+
+def test_customer_scope():
+    print("=== Testing Customer Scope ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'scope.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        users = {
+            "sales_kdr": _user("SK001", UserRole.SALES_TOKO, ["KDR"]),
+            "sales_blt": _user("SK002", UserRole.SALES_TOKO, ["BLT", "KDR"]),
+            "sales_sby": _user("SK003", UserRole.SALES_TOKO, ["SBY"]),
+            "supervisor": _user("SP001", UserRole.SUPERVISOR_TOKO, ["KDR"]),
+            "project": _user("PR001", UserRole.SALES_PROJECT, []),
+        }
+        db.add_all(users.values())
+        db.add_all(Customer(customer_code=f"CS{i:03d}", name=f"Toko {i}", type="project" if i % 4 == 0 else "toko",
+                            address="Jl. Raya", phone_owner="0811", area_code=area, status="approved")
+                   for i, area in enumerate(["KDR", "BLT", "SBY", "MLG"] * 3))
+        db.commit()
+        ids = {key: user.id for key, user in users.items()}
+
+    current = {}
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def override_user():
+        with Session() as db:
+            return db.get(User, current["id"])
+
+    original_factory = team_index.session_factory
+    team_index.session_factory = Session
+    user_directory_version.bump()
+    main.app.dependency_overrides[main.get_db] = override_db
+    main.app.dependency_overrides[main.get_current_user] = override_user
+    statements = []
+    try:
+        client = TestClient(main.app)
+
+        def areas_for(key, **params):
+            current["id"] = ids[key]
+            response = client.get("/api/customers", params=params)
+            assert response.status_code == 200, response.text
+            return sorted({c["area_code"] for c in response.json()}), len(response.json())
+
+        assert areas_for("sales_kdr") == (["KDR"], 3)
+        assert areas_for("sales_blt") == (["BLT", "KDR"], 6)
+        # Supervisor area KDR: salesman KDR dan BLT/KDR masuk tim, SBY tidak
+        assert areas_for("supervisor") == (["BLT", "KDR"], 6)
+        assert areas_for("supervisor", area="BLT") == (["BLT"], 3)
+        assert areas_for("project")[1] == 3
+
+        # Scope dari index: tidak ada SELECT ke tabel users selain autentikasi
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        areas_for("supervisor")
+        assert len([s for s in statements if "FROM users" in s]) == 1
+    finally:
+        main.app.dependency_overrides.clear()
+        team_index.session_factory = original_factory
+        user_directory_version.bump()
+        engine.dispose()
+    print("✅ Customer di-scope per role dari team index")
+
+def test_team_reads_survive_rebuild():
+    print("=== Testing Team Index Rebuild ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'rebuild.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        supervisor = _user("SP101", UserRole.SUPERVISOR_TOKO, ["KDR"])
+        db.add_all([supervisor, *(_user(f"SK1{i:02d}", UserRole.SALES_TOKO, ["KDR"]) for i in range(20))])
+        db.commit()
+        supervisor_id = supervisor.id
+
+    # Rebuild terus-menerus: salesman bergantian aktif/nonaktif selagi tim dibaca
+    index = TeamIndex(Session)
+    stop = threading.Event()
+    errors = []
+
+    def toggle():
+        with Session() as db:
+            while not stop.is_set():
+                for user in db.query(User).filter(User.role == UserRole.SALES_TOKO):
+                    user.is_active = not user.is_active
+                db.commit()
+
+    def read():
+        try:
+            for _ in range(300):
+                team = set(index.team_of(supervisor_id))
+                assert len(team) in (0, 20)
+                assert index.team_areas(supervisor_id) == ["KDR"]
+        except Exception as exc:
+            errors.append(exc)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    writer = threading.Thread(target=toggle)
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    try:
+        writer.start()
+        for thread in readers:
+            thread.start()
+        for thread in readers:
+            thread.join()
+    finally:
+        stop.set()
+        writer.join()
+        sys.setswitchinterval(switch_interval)
+        user_directory_version.bump()
+        engine.dispose()
+    assert not errors, errors
+    print("✅ team_of / team_areas konsisten selama rebuild")
+
+if __name__ == "__main__":
+    test_customer_scope()
+    test_team_reads_survive_rebuild()
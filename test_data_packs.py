@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test data pack offline per area /api/sync/packs
+Pack dibangun sekali per area + katalog; sync pagi salesman hanya membaca file.
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+import attendance_service
+from app.models.database import (
+    Base, User, Customer, Product, Order, UserRole, AreaType, OrderStatus, build_engine
+)
+from app.services.data_pack_service import DataPackBuilder
+
+AREAS = [f"A{i:02d}" for i in range(10)]
+SALESMEN = 300
+CUSTOMERS_PER_AREA = 200
+PRODUCTS = 800
+
+def _seed(Session):
+    with Session() as db:
+        salesmen = [User(employee_id=f"PK{i:04d}", name=f"Sales {i}", email=f"pk{i}@example.com", password_hash="x",
+                         role=UserRole.SALES_TOKO, area_type=AreaType.URBAN, phone_personal="0811",
+                         area_detail={"location": [AREAS[i % len(AREAS)]]})
+                    for i in range(SALESMEN)]
+        db.add_all(salesmen)
+        db.add_all(Customer(customer_code=f"PC{a}{i:04d}", name=f"Toko {a} {i}", type="toko", address="Jl. Raya",
+                            phone_owner="0811", area_code=area)
+                   for a, area in enumerate(AREAS) for i in range(CUSTOMERS_PER_AREA))
+        db.add_all(Product(product_code=f"PP{i:05d}", name=f"Produk {i}", category="umum", unit="pcs",
+                           base_price=1000, selling_price=1200, stock_quantity=50)
+                   for i in range(PRODUCTS))
+        db.flush()
+        customer = db.query(Customer).filter(Customer.area_code == AREAS[0]).first()
+        db.add_all(Order(order_number=f"PO{i:03d}", customer_id=customer.id, salesman_id=salesmen[0].id,
+                         total_amount=1000, final_amount=1000, status=OrderStatus.ORDER)
+                   for i in range(5))
+        db.commit()
+        return [s.id for s in salesmen]
+
+def _load_packs(client, salesman_id, etags=None):
+    """Manifest + semua file pack; return (manifest, isi pack, jumlah 304)"""
+    manifest = client.get(f"/api/sync/packs/{salesman_id}").json()
+    contents, not_modified = {}, 0
+    for pack in manifest["packs"]:
+        headers = {"If-None-Match": etags[pack["name"]]} if etags and pack["name"] in etags else {}
+        response = client.get(pack["url"], headers=headers)
+        if response.status_code == 304:
+            not_modified += 1
+            continue
+        assert response.status_code == 200 and response.headers["etag"] == pack["etag"]
+        contents[pack["name"]] = response.json()
+    return manifest, contents, not_modified
+
+def test_area_data_packs():
+    print("=== Testing Data Pack per Area ===\n")
+    tmp = tempfile.mkdtemp()
+    engine = build_engine(f"sqlite:///{os.path.join(tmp, 'packs.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    salesman_ids = _seed(Session)
+    builder = DataPackBuilder(root=os.path.join(tmp, "packs"), session_factory=Session)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    original = attendance_service.data_packs
+    attendance_service.data_packs = builder
+    attendance_service.app.dependency_overrides[attendance_service.get_db] = override_db
+    try:
+        client = TestClient(attendance_service.app)
+
+        with Session() as db:
+            started = time.perf_counter()
+            manifest = builder.build(db)
+            print(f"Build awal: {len(manifest['packs'])} pack, {(time.perf_counter() - started) * 1000:.0f} ms")
+        assert len(manifest["packs"]) == len(AREAS) + 1
+
+        # Sync pagi: snapshot per salesman (query) vs data pack (baca file)
+        statements.clear()
+        started = time.perf_counter()
+        for salesman_id in salesman_ids[:30]:
+            token, has_more = None, True
+            while has_more:
+                body = client.post("/api/sync/download", json={"salesman_id": salesman_id, "sync_token": token,
+                                                                "page_size": 2000}).json()
+                token, has_more = body["sync_token"], body["has_more"]
+        snapshot_ms = (time.perf_counter() - started) * 1000 / 30
+        snapshot_queries = len(statements) / 30
+
+        statements.clear()
+        started = time.perf_counter()
+        for salesman_id in salesman_ids:
+            manifest, contents, _ = _load_packs(client, salesman_id)
+        pack_ms = (time.perf_counter() - started) * 1000 / SALESMEN
+        pack_queries = len(statements) / SALESMEN
+        print(f"Per salesman: snapshot {snapshot_ms:.1f} ms / {snapshot_queries:.1f} query, "
+              f"data pack {pack_ms:.1f} ms / {pack_queries:.1f} query")
+        assert pack_queries <= 1  # hanya lookup salesman
+
+        assert len(contents["catalog"]["products"]) == PRODUCTS
+        assert len(contents[f"area:{AREAS[-1]}"]["customers"]) == CUSTOMERS_PER_AREA
+
+        # Lanjut dengan sync_token manifest: order salesman, lalu delta
+        body = client.post("/api/sync/download", json={"salesman_id": salesman_ids[0],
+                                                        "sync_token": manifest["sync_token"]}).json()
+        assert len(body["data"]["recent_orders"]) == 5 and not body["data"]["customers"]
+
+        # Perubahan di satu area: hanya pack area itu yang dibangun ulang
+        before = builder.manifest()["packs"]
+        etags = {pack["name"]: pack["etag"] for pack in client.get(f"/api/sync/packs/{salesman_ids[0]}").json()["packs"]}
+        with Session() as db:
+            db.query(Customer).filter(Customer.area_code == AREAS[0]).first().name = "Toko Ganti Nama"
+            db.commit()
+            rebuilt = builder.build(db)
+        changed = [name for name, pack in rebuilt["packs"].items() if pack["etag"] != before[name]["etag"]]
+        assert changed == [f"area:{AREAS[0]}"], changed
+
+        manifest, contents, not_modified = _load_packs(client, salesman_ids[0], etags)
+        assert not_modified == 1 and list(contents) == [f"area:{AREAS[0]}"]
+        assert "Toko Ganti Nama" in {c["name"] for c in contents[f"area:{AREAS[0]}"]["customers"]}
+
+        # Client tanpa gzip tetap dapat JSON
+        pack = manifest["packs"][0]
+        raw = client.get(pack["url"], headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in raw.headers and json.loads(raw.content)["pack"] == pack["name"]
+        assert client.get("/api/sync/packs/file/../../etc.json.gz").status_code == 404
+
+        files = [name for name in os.listdir(builder.root) if name.endswith(".json.gz")]
+        size = sum(os.path.getsize(os.path.join(builder.root, name)) for name in files)
+        raw_size = sum(len(gzip.decompress(open(os.path.join(builder.root, name), "rb").read())) for name in files)
+        print(f"{len(files)} file pack: {size / 1024:.0f} KB gzip ({raw_size / 1024:.0f} KB JSON)")
+    finally:
+        attendance_service.data_packs = original
+        attendance_service.app.dependency_overrides.clear()
+        engine.dispose()
+    print("\n✅ Sync pagi dari data pack, rebuild hanya area yang berubah")
+
+if __name__ == "__main__":
+    test_area_data_packs()
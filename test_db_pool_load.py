@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Load test connection pool engine database
+Throughput pada 50/200/500 request bersamaan terhadap engine non-SQLite (QueuePool).
+Butuh LOAD_TEST_DATABASE_URL (PostgreSQL); tanpa itu test di-skip, karena
+angka dari SQLite bukan ukuran pool.
+"""
+
+import os
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.dialects import registry
+from sqlalchemy.engine.default import DefaultDialect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.models.database import Base, Customer, User, UserRole, AreaType, PoolConfig, build_engine
+
+CONCURRENCY_LEVELS = (50, 200, 500)
+REQUESTS_PER_CLIENT = 4
+
+LOAD_TEST_URL = os.getenv("LOAD_TEST_DATABASE_URL", "")
+SKIP_REASON = ("LOAD_TEST_DATABASE_URL tidak di-set ke database non-SQLite (mis. postgresql://...); "
+               "load test pool tidak dijalankan di SQLite")
+
+def _seed(Session):
+    with Session() as db:
+        if db.query(func.count(User.id)).scalar():
+            return
+        for i in range(50):
+            db.add(User(
+                employee_id=f"LOAD{i:04d}", name=f"Sales {i}", email=f"load{i}@example.com",
+                password_hash="x", role=UserRole.SALES_TOKO, area_type=AreaType.URBAN,
+                phone_personal="0811"
+            ))
+            db.add(Customer(
+                customer_code=f"LC{i:04d}", name=f"Toko {i}", type="toko", address="Kediri",
+                phone_owner="0811", area_code="KDR"
+            ))
+        db.commit()
+
+def _request(Session):
+    """Satu 'request' dashboard: checkout koneksi, dua query, kembalikan koneksi"""
+    started = time.perf_counter()
+    with Session() as db:
+        db.query(func.count(User.id)).filter(User.role == UserRole.SALES_TOKO).scalar()
+        db.query(Customer.id, Customer.name).filter(Customer.area_code == "KDR").limit(20).all()
+    return time.perf_counter() - started
+
+@pytest.mark.skipif(not LOAD_TEST_URL or LOAD_TEST_URL.startswith("sqlite"), reason=SKIP_REASON)
+def test_pool_throughput_under_concurrency():
+    print("=== Testing Database Pool Throughput ===\n")
+
+    engine = build_engine(LOAD_TEST_URL)
+    assert isinstance(engine.pool, QueuePool)
+    print(f"{engine.dialect.name}: pool_size={engine.pool.size()} max_overflow={engine.pool._max_overflow}\n")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Customer.__table__])
+    Session = sessionmaker(bind=engine)
+    _seed(Session)
+
+    for clients in CONCURRENCY_LEVELS:
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(clients)
+
+        def client():
+            barrier.wait()
+            for _ in range(REQUESTS_PER_CLIENT):
+                try:
+                    elapsed = _request(Session)
+                    with lock:
+                        latencies.append(elapsed)
+                except Exception as e:
+                    with lock:
+                        errors.append(str(e))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            for _ in range(clients):
+                executor.submit(client)
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+        print(f"{clients:>4} concurrent: {len(latencies) / wall:8.1f} req/s, "
+              f"p95 {p95 * 1000:7.1f} ms, errors {len(errors)}")
+        assert not errors, errors[:3]
+
+    engine.dispose()
+    print("\n✅ Tidak ada error koneksi pada semua level concurrency")
+
+class OfflinePGDialect(DefaultDialect):
+    """
+    Stand-in dialect postgresql tanpa driver: cukup untuk membangun engine, tidak pernah connect.
+    Bukan turunan PGDialect supaya MetaData pg_catalog tidak ikut ter-load (test_model_registry).
+    """
+    name = "postgresql"
+    supports_statement_cache = True
+
+    def __init__(self, json_serializer=None, json_deserializer=None, **kwargs):
+        super().__init__(**kwargs)
+        self._json_serializer = json_serializer
+
+    @classmethod
+    def import_dbapi(cls):
+        return types.SimpleNamespace(paramstyle="pyformat", Error=Exception)
+
+registry.register("postgresql.offline", __name__, "OfflinePGDialect")
+
+def test_build_engine_pool_config():
+    """URL non-SQLite: QueuePool dengan ukuran dari PoolConfig dan pre-ping"""
+    engine = build_engine("postgresql+offline://erp:secret@db:5432/gajah_nusa_erp")
+    try:
+        assert engine.dialect.name == "postgresql"
+        assert isinstance(engine.pool, QueuePool)
+        assert engine.pool.size() == PoolConfig.POOL_SIZE
+        assert engine.pool._max_overflow == PoolConfig.MAX_OVERFLOW
+        assert engine.pool._pre_ping is True
+        assert engine.pool._timeout == PoolConfig.POOL_TIMEOUT
+        assert engine.pool._recycle == PoolConfig.POOL_RECYCLE
+    finally:
+        engine.dispose()
+    print(f"✅ QueuePool size={PoolConfig.POOL_SIZE} overflow={PoolConfig.MAX_OVERFLOW} pre_ping=True")
+
+if __name__ == "__main__":
+    if LOAD_TEST_URL and not LOAD_TEST_URL.startswith("sqlite"):
+        test_pool_throughput_under_concurrency()
+    else:
+        print(f"⏭️  Skip load test: {SKIP_REASON}")
+    test_build_engine_pool_config()
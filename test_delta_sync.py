@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test delta sync attendance /api/sync/download
+Snapshot berhalaman untuk territory besar, lalu delta hanya berisi perubahan.
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+import attendance_service
+from app.models.database import (
+    Base, User, Customer, Product, Order, UserRole, AreaType, OrderStatus, build_engine, new_id
+)
+from app.services.sync_service import record_changes
+
+CUSTOMERS = 3000
+PRODUCTS = 1200
+PAGE_SIZE = 500
+
+def _seed(Session):
+    with Session() as db:
+        salesman = User(employee_id="SYNC001", name="Sales Sync", email="sync@example.com", password_hash="x",
+                        role=UserRole.SALES_TOKO, area_type=AreaType.URBAN, phone_personal="0811",
+                        area_detail={"location": ["KDR"]})
+        db.add(salesman)
+        db.flush()
+        db.add_all(Customer(customer_code=f"SC{i:05d}", name=f"Toko {i}", type="toko", address="Jl. Raya",
+                            phone_owner="0811", area_code="KDR" if i < CUSTOMERS else "BLT")
+                   for i in range(CUSTOMERS + 500))
+        db.add_all(Product(product_code=f"SP{i:05d}", name=f"Produk {i}", category="umum", unit="pcs",
+                           base_price=1000, selling_price=1200, stock_quantity=0 if i % 10 == 0 else 50)
+                   for i in range(PRODUCTS))
+        customer = db.query(Customer).filter(Customer.area_code == "KDR").first()
+        db.add_all(Order(order_number=f"SO{i:05d}", customer_id=customer.id, salesman_id=salesman.id,
+                         total_amount=1000, final_amount=1000, status=OrderStatus.ORDER)
+                   for i in range(20))
+        db.commit()
+        return salesman.id
+
+def _download(client, salesman_id, token=None, **kwargs):
+    response = client.post("/api/sync/download", json={
+        "salesman_id": salesman_id, "sync_token": token, "page_size": PAGE_SIZE
+    }, **kwargs)
+    assert response.status_code == 200, response.text
+    return response
+
+def test_snapshot_then_delta():
+    print("=== Testing Delta Sync ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'sync.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    salesman_id = _seed(Session)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    attendance_service.app.dependency_overrides[attendance_service.get_db] = override_db
+    try:
+        client = TestClient(attendance_service.app)
+
+        # Snapshot penuh, berhalaman (dulu terpotong di 100 customer / 200 product)
+        customers, products, orders, pages, snapshot_bytes = {}, {}, {}, 0, 0
+        token, has_more = None, True
+        while has_more:
+            body = _download(client, salesman_id, token).json()
+            pages += 1
+            snapshot_bytes += len(gzip.compress(json.dumps(body).encode()))
+            customers.update((c["id"], c) for c in body["data"]["customers"])
+            products.update((p["id"], p) for p in body["data"]["products"])
+            orders.update((o["id"], o) for o in body["data"]["recent_orders"])
+            token, has_more = body["sync_token"], body["has_more"]
+        assert len(customers) == CUSTOMERS, len(customers)
+        assert len(products) == PRODUCTS - PRODUCTS // 10
+        assert len(orders) == 20
+        print(f"Snapshot: {pages} halaman, {len(customers)} customer, {len(products)} product, "
+              f"{snapshot_bytes / 1024:.1f} KB gzip")
+
+        # Tidak ada perubahan: delta kosong
+        body = _download(client, salesman_id, token).json()
+        assert body["mode"] == "delta" and not body["has_more"]
+        assert body["stats"]["customers_count"] == 0 and body["stats"]["deleted_count"] == 0
+
+        with Session() as db:
+            renamed, moved = db.query(Customer).filter(Customer.area_code == "KDR").order_by(Customer.id).limit(2).all()
+            renamed.name = "Toko Baru Berganti Nama"
+            moved.area_code = "BLT"
+            sold_out = db.query(Product).filter(Product.stock_quantity > 0).order_by(Product.id).first()
+            sold_out.stock_quantity = 0
+            db.add(Product(product_code="SPNEW", name="Produk Baru", category="umum", unit="pcs",
+                           base_price=1000, selling_price=1500, stock_quantity=10))
+            db.delete(db.query(Order).order_by(Order.id).first())
+            # Insert core (seperti order_service) dicatat manual
+            order_id = new_id()
+            db.execute(insert(Order).values(id=order_id, order_number="SO-CORE", customer_id=renamed.id,
+                                            salesman_id=salesman_id, total_amount=500, final_amount=500,
+                                            status=OrderStatus.ORDER, created_at=datetime.utcnow()))
+            record_changes(db, "orders", [(order_id, salesman_id)])
+            # Customer area lain tidak boleh bocor ke device ini
+            db.query(Customer).filter(Customer.area_code == "BLT", Customer.id != moved.id).first().name = "Toko Blitar"
+            db.commit()
+            renamed_id, moved_id, sold_out_id = renamed.id, moved.id, sold_out.id
+
+        response = _download(client, salesman_id, token)
+        body = response.json()
+        delta_bytes = len(gzip.compress(response.content))
+        print(f"Delta: {body['stats']}, {len(response.content)} B json, {delta_bytes} B gzip")
+        assert body["mode"] == "delta"
+        assert [c["id"] for c in body["data"]["customers"]] == [renamed_id]
+        assert body["data"]["customers"][0]["name"] == "Toko Baru Berganti Nama"
+        assert body["deleted"]["customers"] == [moved_id]
+        assert [p["name"] for p in body["data"]["products"]] == ["Produk Baru"]
+        assert body["deleted"]["products"] == [sold_out_id]
+        assert [o["id"] for o in body["data"]["recent_orders"]] == [order_id]
+        assert len(body["deleted"]["recent_orders"]) == 1
+        assert delta_bytes < 2048
+
+        # msgpack jika diminta
+        packed = _download(client, salesman_id, token, headers={"Accept": "application/x-msgpack"})
+        if attendance_service.msgpack is not None:
+            assert packed.headers["content-type"] == "application/x-msgpack"
+            assert attendance_service.msgpack.unpackb(packed.content)["deleted"]["customers"] == [moved_id]
+            print(f"Delta msgpack: {len(packed.content)} B")
+
+        assert client.post("/api/sync/download", json={"salesman_id": salesman_id, "sync_token": "rusak"}).status_code == 400
+    finally:
+        attendance_service.app.dependency_overrides.clear()
+        engine.dispose()
+    print("\n✅ Snapshot lengkap, delta hanya berisi perubahan")
+
+if __name__ == "__main__":
+    test_snapshot_then_delta()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test FaceEmbeddingStore dengan beberapa worker proses di direktori yang sama
+Enrol paralel tidak saling menimpa row; store yang sudah dimuat melihat
+pendaftaran dari proses lain.
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import zlib
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+import numpy as np
+
+from app.services.face_embedding_service import FaceConfig, FaceEmbeddingStore
+
+WORKERS = 4
+PER_WORKER = 300  # > INITIAL_CAPACITY / WORKERS: file matrix ikut di-grow saat paralel
+
+def _vector(user_id: str) -> np.ndarray:
+    return np.random.default_rng(zlib.crc32(user_id.encode())).standard_normal(FaceConfig.DIM).astype(np.float32)
+
+def _enroll_worker(directory: str, worker: int):
+    store = FaceEmbeddingStore(directory)
+    for i in range(PER_WORKER):
+        user_id = f"w{worker}-u{i}"
+        store.enroll(user_id, _vector(user_id))
+
+def test_multi_process_enroll():
+    print("=== Testing Face Embedding Store (multi-process) ===\n")
+    directory = tempfile.mkdtemp()
+    reader = FaceEmbeddingStore(directory)
+    assert len(reader) == 0
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_enroll_worker, args=(directory, w)) for w in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    # Store yang dimuat sebelum enrol tetap melihat semua user baru
+    total = WORKERS * PER_WORKER
+    assert len(reader) == total
+    assert sorted(reader._rows.values()) == list(range(total))
+    for worker in range(WORKERS):
+        for i in range(0, PER_WORKER, 37):
+            user_id = f"w{worker}-u{i}"
+            assert reader.verify(user_id, _vector(user_id))
+            assert reader.search(_vector(user_id), top_k=1)[0][0] == user_id
+    print(f"{WORKERS} proses x {PER_WORKER} enrol: {len(reader)} row unik, "
+          f"kapasitas {os.path.getsize(os.path.join(directory, 'embeddings.f32')) // (4 * FaceConfig.DIM)}")
+
+    reader.remove("w0-u0")
+    assert not FaceEmbeddingStore(directory).has("w0-u0")
+    print("\n✅ Enrol paralel antar proses tanpa row bentrok")
+
+if __name__ == "__main__":
+    test_multi_process_enroll()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test scope /api/dashboard/fraud-alerts/summary
+Supervisor hanya menghitung alert, high-risk user dan setoran telat salesman di timnya.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+from app.models.database import (
+    Base, User, Customer, Nota, Payment, FraudDetectionLog, UserRole, AreaType, build_engine
+)
+from app.services.fraud_alert_service import fraud_alert_counters
+from app.services.team_index import team_index, user_directory_version
+
+def _user(code, role, areas, fraud_score=0.0):
+    return User(employee_id=code, name=code, email=f"{code.lower()}@example.com", password_hash="x", role=role,
+                area_type=AreaType.URBAN, phone_personal="0811", area_detail={"location": areas},
+                fraud_score=fraud_score)
+
+def test_fraud_summary_scope():
+    print("=== Testing Fraud Alert Summary Scope ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'fraud_scope.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        team = _user("FS001", UserRole.SALES_TOKO, ["KDR"], fraud_score=0.9)
+        other = _user("FS002", UserRole.SALES_TOKO, ["SBY"], fraud_score=0.95)
+        supervisor = _user("FV001", UserRole.SUPERVISOR_TOKO, ["KDR"])
+        manager = _user("FM001", UserRole.MANAGER, [])
+        customer = Customer(customer_code="FC0001", name="Toko", type="toko", address="Jl. Raya",
+                            phone_owner="0811", area_code="KDR")
+        db.add_all([team, other, supervisor, manager, customer])
+        db.flush()
+        for salesman, logs in ((team, 2), (other, 5)):
+            db.add_all(FraudDetectionLog(entity_type="payment", entity_id=f"p-{i}", user_id=salesman.id,
+                                         fraud_type="late_deposit", fraud_score=0.8, detection_method="rule")
+                       for i in range(logs))
+            nota = Nota(nota_number=f"NT-{salesman.employee_id}", customer_id=customer.id, salesman_id=salesman.id,
+                        amount=1000, total_amount=1000, qr_code=salesman.employee_id,
+                        due_date=datetime.utcnow() + timedelta(days=30))
+            db.add(nota)
+            db.flush()
+            db.add(Payment(nota_id=nota.id, customer_id=customer.id, salesman_id=salesman.id, amount=1000,
+                           payment_method="cash", gps_latitude=-7.8, gps_longitude=112.0, late_deposit_hours=30))
+        # Alert tanpa user (mis. QR palsu) terlihat semua supervisor
+        db.add(FraudDetectionLog(entity_type="nota", entity_id="n-1", fraud_type="invalid_qr_scan",
+                                 fraud_score=0.9, detection_method="qr_validation"))
+        db.commit()
+        ids = {"supervisor": supervisor.id, "manager": manager.id}
+
+    current = {}
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def override_user():
+        with Session() as db:
+            return db.get(User, current["id"])
+
+    originals = (team_index.session_factory, fraud_alert_counters.session_factory)
+    team_index.session_factory = fraud_alert_counters.session_factory = Session
+    fraud_alert_counters._seeded_at = 0.0
+    user_directory_version.bump()
+    main.app.dependency_overrides[main.get_read_db] = override_db
+    main.app.dependency_overrides[main.get_current_user] = override_user
+    try:
+        client = TestClient(main.app)
+
+        def summary(key):
+            current["id"] = ids[key]
+            response = client.get("/api/dashboard/fraud-alerts/summary")
+            assert response.status_code == 200, response.text
+            return response.json()
+
+        scoped = summary("supervisor")
+        assert scoped["alerts"]["total"] == 3
+        assert scoped["alerts"]["by_type"] == {"late_deposit": 2, "invalid_qr_scan": 1}
+        assert (scoped["high_risk_users"], scoped["pending_deposits"]) == (1, 1)
+
+        everything = summary("manager")
+        assert everything["alerts"]["total"] == 8
+        assert (everything["high_risk_users"], everything["pending_deposits"]) == (2, 2)
+    finally:
+        main.app.dependency_overrides.clear()
+        team_index.session_factory, fraud_alert_counters.session_factory = originals
+        fraud_alert_counters._seeded_at = 0.0
+        user_directory_version.bump()
+        engine.dispose()
+    print("✅ Ringkasan fraud alert di-scope ke tim supervisor")
+
+if __name__ == "__main__":
+    test_fraud_summary_scope()
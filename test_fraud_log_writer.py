@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark write-behind FraudDetectionLog
+Bandingkan waktu di request path antara mode sync dan buffered,
+dan pastikan semua log tertulis setelah shutdown (drain)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, FraudDetectionLog, compact_json
+from app.services.fraud_alert_service import fraud_alert_counters
+from app.services.fraud_log_writer import FraudLogWriter
+
+LOG_COUNT = 500
+
+def _log_many(writer: FraudLogWriter) -> float:
+    started = time.perf_counter()
+    for i in range(LOG_COUNT):
+        writer.log(
+            entity_type="visit",
+            entity_id=f"customer-{i}",
+            fraud_type="invalid_qr_scan",
+            fraud_score=0.9,
+            detection_method="qr_validation",
+            details={"provided_qr": f"qr-{i}", "location": {"lat": -7.8, "lng": 112.0}}
+        )
+    return time.perf_counter() - started
+
+def test_buffered_writer_drains_all_logs():
+    print("=== Testing Fraud Log Writer ===\n")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "fraud_log_bench.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False},
+                           json_serializer=compact_json)
+    Base.metadata.create_all(bind=engine, tables=[FraudDetectionLog.__table__])
+    Session = sessionmaker(bind=engine)
+    original_factory = fraud_alert_counters.session_factory
+    fraud_alert_counters.session_factory = Session
+    try:
+        sync_writer = FraudLogWriter(session_factory=Session, durability="sync")
+        sync_elapsed = _log_many(sync_writer)
+
+        before = fraud_alert_counters.snapshot()["total"]
+        buffered_writer = FraudLogWriter(session_factory=Session, batch_size=100, flush_ms=50)
+        buffered_elapsed = _log_many(buffered_writer)
+        buffered_writer.shutdown()
+        after = fraud_alert_counters.snapshot()["total"]
+
+        with Session() as db:
+            total = db.query(func.count(FraudDetectionLog.id)).scalar()
+            raw_details = db.execute(text("SELECT details FROM fraud_detection_logs LIMIT 1")).scalar()
+    finally:
+        fraud_alert_counters.session_factory = original_factory
+        engine.dispose()
+
+    print(f"sync:     {sync_elapsed * 1000:.1f} ms untuk {LOG_COUNT} log")
+    print(f"buffered: {buffered_elapsed * 1000:.1f} ms untuk {LOG_COUNT} log")
+    print(f"rows tertulis: {total}")
+
+    assert total == LOG_COUNT * 2
+    assert after == before + LOG_COUNT
+    assert ", " not in raw_details and ": " not in raw_details  # JSON compact
+    print("✅ Semua log tertulis setelah drain")
+
+class SlowWriter(FraudLogWriter):
+    """Setiap batch butuh 50 ms (DB lambat saat shutdown)"""
+
+    def _write(self, rows):
+        time.sleep(0.05)
+        return super()._write(rows)
+
+def test_shutdown_timeout_keeps_single_writer():
+    print("=== Testing Fraud Log Writer Shutdown Timeout ===\n")
+    db_path = os.path.join(tempfile.mkdtemp(), "fraud_log_shutdown.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[FraudDetectionLog.__table__])
+    Session = sessionmaker(bind=engine)
+    original_factory = fraud_alert_counters.session_factory
+    fraud_alert_counters.session_factory = Session
+    try:
+        writer = SlowWriter(session_factory=Session, batch_size=10, flush_ms=10)
+        _log_many(writer)
+        writer.shutdown(timeout=0.01)  # drain belum selesai
+
+        def writer_threads():
+            return [t for t in threading.enumerate() if t.name == "fraud-log-writer" and t.is_alive()]
+
+        assert len(writer_threads()) == 1
+        writer.log(entity_type="visit", entity_id="late", fraud_type="invalid_qr_scan", fraud_score=0.9,
+                   detection_method="qr_validation")
+        assert len(writer_threads()) == 1  # log baru ditulis langsung, bukan thread kedua
+
+        writer.shutdown(timeout=30)
+        assert writer_threads() == []
+        with Session() as db:
+            assert db.query(func.count(FraudDetectionLog.id)).scalar() == LOG_COUNT + 1
+
+        # Setelah shutdown selesai writer bisa dipakai lagi
+        writer.log(entity_type="visit", entity_id="again", fraud_type="invalid_qr_scan", fraud_score=0.9,
+                   detection_method="qr_validation")
+        writer.shutdown()
+        with Session() as db:
+            assert db.query(func.count(FraudDetectionLog.id)).scalar() == LOG_COUNT + 2
+    finally:
+        fraud_alert_counters.session_factory = original_factory
+        engine.dispose()
+    print("✅ Shutdown timeout tidak memicu thread writer kedua")
+
+def test_sentinel_first_still_drains():
+    print("=== Testing Fraud Log Writer Sentinel First ===\n")
+    db_path = os.path.join(tempfile.mkdtemp(), "fraud_log_sentinel.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[FraudDetectionLog.__table__])
+    Session = sessionmaker(bind=engine)
+    original_factory = fraud_alert_counters.session_factory
+    fraud_alert_counters.session_factory = Session
+    try:
+        # Log yang masuk setelah sentinel (race dengan shutdown): sentinel diambil pertama
+        writer = FraudLogWriter(session_factory=Session)
+        writer._queue.put(None)
+        for i in range(5):
+            writer._queue.put({"id": f"late-{i}", "entity_type": "visit", "entity_id": "late",
+                               "fraud_type": "invalid_qr_scan", "fraud_score": 0.9,
+                               "detection_method": "qr_validation"})
+        writer._ensure_started()
+        writer._thread.join(10)
+        assert not writer._thread.is_alive()
+        assert writer._queue.unfinished_tasks == 0
+        with Session() as db:
+            assert db.query(func.count(FraudDetectionLog.id)).scalar() == 5
+    finally:
+        fraud_alert_counters.session_factory = original_factory
+        engine.dispose()
+    print("✅ Sentinel di depan antrian tetap men-drain sisa log")
+
+def test_dropped_batches_are_counted():
+    print("=== Testing Fraud Log Writer Dropped Batches ===\n")
+    # Tabel tidak dibuat: setiap insert gagal
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'fraud_log_broken.db')}",
+                           connect_args={"check_same_thread": False})
+    writer = FraudLogWriter(session_factory=sessionmaker(bind=engine), batch_size=10, flush_ms=10)
+    try:
+        for i in range(25):
+            writer.log(entity_type="visit", entity_id=f"c-{i}", fraud_type="invalid_qr_scan", fraud_score=0.9,
+                       detection_method="qr_validation")
+        writer.shutdown()
+        stats = writer.stats()
+        assert stats["dropped_rows"] == 25 and stats["dropped_batches"] >= 3, stats
+        assert stats["pending"] == 0
+    finally:
+        engine.dispose()
+    print(f"dibuang: {stats['dropped_batches']} batch, {stats['dropped_rows']} log")
+    print("✅ Batch yang dibuang tercatat di stats()")
+
+if __name__ == "__main__":
+    test_buffered_writer_drains_all_logs()
+    test_shutdown_timeout_keeps_single_writer()
+    test_sentinel_first_still_drains()
+    test_dropped_batches_are_counted()
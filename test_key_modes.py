@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test key mode database (DB_KEY_MODE): uuid4 vs uuid7 vs uuid7_binary
+Migrasi DB lama ke key binary, lalu benchmark ukuran index, insert dan join.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import (
+    Base, User, Customer, Product, Order, OrderItem, FraudDetectionLog,
+    UserRole, AreaType, build_engine, uuid7
+)
+from app.models.key_migration import migrate_keys
+
+ORDERS = 20000
+ITEMS_PER_ORDER = 2
+BATCH = 500
+JOIN_LOOKUPS = 2000
+
+def _temp_url(name):
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(), name)}"
+
+def test_uuid7_is_time_ordered():
+    print("=== Testing UUIDv7 ===\n")
+    ids = []
+    for _ in range(50):
+        ids.append(uuid7())
+        time.sleep(0.002)
+    assert all(uuid.UUID(value).version == 7 for value in ids)
+    assert ids == sorted(ids), "uuid7 harus urut menurut waktu"
+    assert [uuid.UUID(value).bytes for value in ids] == sorted(uuid.UUID(value).bytes for value in ids)
+    print("✅ UUIDv7 urut sebagai string maupun 16 byte")
+
+def test_migrate_to_binary_keys_keeps_api_ids():
+    print("=== Testing Key Migration ===\n")
+    source = build_engine(_temp_url("legacy.db"), key_mode="uuid4")
+    Base.metadata.create_all(bind=source)
+    SourceSession = sessionmaker(bind=source)
+    with SourceSession() as db:
+        user = User(employee_id="MIG001", name="Sales Migrasi", email="mig@example.com", password_hash="x",
+                    role=UserRole.SALES_TOKO, area_type=AreaType.URBAN, phone_personal="0811")
+        customer = Customer(customer_code="MC001", name="Toko Migrasi", type="toko", address="Kediri",
+                            phone_owner="0811", area_code="KDR")
+        product = Product(product_code="MP001", name="Semen", category="bangunan", unit="sak",
+                          base_price=50000, selling_price=55000)
+        db.add_all([user, customer, product])
+        db.flush()
+        order = Order(order_number="ORD-MIG-1", customer_id=customer.id, salesman_id=user.id,
+                      total_amount=110000, final_amount=110000)
+        db.add(order)
+        db.flush()
+        db.add(OrderItem(order_id=order.id, product_id=product.id, quantity=2, unit_price=55000, total_price=110000))
+        db.add(FraudDetectionLog(entity_type="order", entity_id=order.id, user_id=user.id,
+                                 fraud_type="test", fraud_score=0.1, detection_method="test"))
+        db.commit()
+        user_id, customer_id, order_id = user.id, customer.id, order.id
+
+    target = build_engine(_temp_url("binary.db"), key_mode="uuid7_binary")
+    copied = migrate_keys(source, target, batch_size=2)
+    print(f"Copied: { {name: count for name, count in copied.items() if count} }")
+    assert copied["orders"] == 1 and copied["order_items"] == 1
+
+    with target.connect() as conn:
+        kind, size = conn.execute(text("SELECT typeof(id), length(id) FROM orders")).one()
+    assert (kind, size) == ("blob", 16), (kind, size)
+
+    TargetSession = sessionmaker(bind=target)
+    with TargetSession() as db:
+        order = db.get(Order, order_id)
+        assert order is not None and order.id == order_id
+        assert order.customer.id == customer_id and order.customer.name == "Toko Migrasi"
+        assert order.salesman.id == user_id
+        items = db.query(OrderItem).join(Order).filter(Order.customer_id == customer_id).all()
+        assert len(items) == 1 and items[0].order_id == order_id
+        log = db.query(FraudDetectionLog).filter(FraudDetectionLog.user_id == user_id).one()
+        assert log.entity_id == order_id
+
+        # Baris baru di DB binary tetap dapat id string dari API
+        db.add(Customer(customer_code="MC002", name="Toko Baru", type="toko", address="Kediri",
+                        phone_owner="0811", area_code="KDR"))
+        db.commit()
+        assert len(db.query(Customer).filter(Customer.customer_code == "MC002").one().id) == 36
+
+    source.dispose()
+    target.dispose()
+    print("✅ ID API sama setelah migrasi, join tetap jalan")
+
+def _bench(mode):
+    engine = build_engine(_temp_url(f"{mode}.db"), key_mode=mode)
+    tables = [User.__table__, Customer.__table__, Product.__table__, Order.__table__, OrderItem.__table__]
+    Base.metadata.create_all(bind=engine, tables=tables)
+    make_id = (lambda: str(uuid.uuid4())) if mode == "uuid4" else uuid7
+    rng = random.Random(11)
+
+    users = [{"id": make_id(), "employee_id": f"KB{i:04d}", "name": f"Sales {i}", "email": f"kb{i}@example.com",
+              "password_hash": "x", "role": UserRole.SALES_TOKO, "area_type": AreaType.URBAN,
+              "phone_personal": "0811"} for i in range(100)]
+    customers = [{"id": make_id(), "customer_code": f"KC{i:05d}", "name": f"Toko {i}", "type": "toko",
+                  "address": "Kediri", "phone_owner": "0811", "area_code": f"A{i % 20}"} for i in range(1000)]
+    products = [{"id": make_id(), "product_code": f"KP{i:04d}", "name": f"Produk {i}", "category": "umum",
+                 "unit": "pcs", "base_price": 1000.0, "selling_price": 1200.0} for i in range(200)]
+    with engine.begin() as conn:
+        conn.execute(insert(User), users)
+        conn.execute(insert(Customer), customers)
+        conn.execute(insert(Product), products)
+
+    started = time.perf_counter()
+    for offset in range(0, ORDERS, BATCH):
+        orders, items = [], []
+        for i in range(offset, offset + BATCH):
+            order_id = make_id()
+            orders.append({"id": order_id, "order_number": f"ORD{i:08d}",
+                           "customer_id": rng.choice(customers)["id"], "salesman_id": rng.choice(users)["id"],
+                           "total_amount": 2400.0, "final_amount": 2400.0})
+            items.extend({"id": make_id(), "order_id": order_id, "product_id": rng.choice(products)["id"],
+                          "quantity": 1, "unit_price": 1200.0, "total_price": 1200.0}
+                         for _ in range(ITEMS_PER_ORDER))
+        with engine.begin() as conn:
+            conn.execute(insert(Order), orders)
+            conn.execute(insert(OrderItem), items)
+    insert_rate = ORDERS * (1 + ITEMS_PER_ORDER) / (time.perf_counter() - started)
+
+    with engine.connect() as conn:
+        index_bytes = conn.execute(text(
+            "SELECT SUM(s.pgsize) FROM dbstat s JOIN sqlite_master m ON m.name = s.name "
+            "WHERE m.type = 'index' AND m.tbl_name IN ('orders', 'order_items')"
+        )).scalar()
+        file_bytes = conn.execute(text("SELECT page_count * page_size FROM pragma_page_count, pragma_page_size")).scalar()
+
+        query = (
+            select(func.count(OrderItem.id), func.sum(OrderItem.total_price))
+            .join(Order, OrderItem.order_id == Order.id)
+            .join(Customer, Order.customer_id == Customer.id)
+        )
+        lookups = [rng.choice(customers)["id"] for _ in range(JOIN_LOOKUPS)]
+        started = time.perf_counter()
+        for customer_id in lookups:
+            conn.execute(query.where(Customer.id == customer_id)).one()
+        join_rate = JOIN_LOOKUPS / (time.perf_counter() - started)
+    engine.dispose()
+    return index_bytes, file_bytes, insert_rate, join_rate
+
+def test_key_mode_benchmark():
+    print("=== Benchmark Key Mode ===\n")
+    print(f"{ORDERS} orders + {ORDERS * ITEMS_PER_ORDER} items, batch {BATCH}\n")
+    print(f"{'mode':<14} {'index KB':>10} {'file KB':>10} {'insert rows/s':>14} {'join q/s':>10}")
+    results = {}
+    for mode in ("uuid4", "uuid7", "uuid7_binary"):
+        index_bytes, file_bytes, insert_rate, join_rate = results[mode] = _bench(mode)
+        print(f"{mode:<14} {index_bytes / 1024:>10.0f} {file_bytes / 1024:>10.0f} "
+              f"{insert_rate:>14.0f} {join_rate:>10.0f}")
+
+    # Waktu tergantung mesin, hanya ukuran yang di-assert
+    assert results["uuid7_binary"][0] < results["uuid4"][0] * 0.8
+    print("\n✅ Key biner urut waktu memperkecil index")
+
+if __name__ == "__main__":
+    test_uuid7_is_time_ordered()
+    test_migrate_to_binary_keys_keeps_api_ids()
+    test_key_mode_benchmark()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test registry model tunggal (app.models.database)
+Semua service harus memakai satu MetaData, lalu benchmark waktu import per service.
+"""
+
+import gc
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from sqlalchemy import MetaData
+
+SERVICES = (
+    "app.main",
+    "attendance_service",
+    "app.services.employee_id_service",
+    "app.core.config",
+)
+RUNS = 3
+
+_PROBE = """
+import gc, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+from sqlalchemy import MetaData
+metadatas = [obj for obj in gc.get_objects() if isinstance(obj, MetaData) and obj.tables]
+print(f"{{elapsed:.1f}} {{len(metadatas)}} {{len(sys.modules)}}")
+"""
+
+def _import_cost(module):
+    """Import module di proses baru: (ms, jumlah MetaData berisi tabel, jumlah modul)"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(project_root / "backend"), str(project_root)]))
+    samples = []
+    for _ in range(RUNS):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            cwd=project_root, env=env, capture_output=True, text=True, timeout=120
+        )
+        if out.returncode != 0:
+            return None
+        samples.append([float(value) for value in out.stdout.split()[-3:]])
+    return (statistics.median(s[0] for s in samples), int(samples[0][1]), int(samples[0][2]))
+
+def test_single_metadata_registry():
+    print("=== Testing Model Registry ===\n")
+    import app.main  # noqa: F401
+    import attendance_service
+    from app.services import employee_id_service
+    from app.core import config
+    from app.models import database
+
+    metadatas = [obj for obj in gc.get_objects() if isinstance(obj, MetaData) and obj.tables]
+    assert metadatas == [database.Base.metadata], f"{len(metadatas)} MetaData dengan tabel"
+    assert "models.database" not in sys.modules, "database.py ter-load dua kali"
+
+    assert attendance_service.User is database.User
+    assert attendance_service.Product is database.Product
+    assert employee_id_service.User is database.User
+    assert employee_id_service.EmployeeHistory is database.EmployeeHistory
+    assert config.Customer is database.Customer
+    print(f"✅ Satu MetaData, {len(database.Base.metadata.tables)} tabel")
+
+def test_service_import_cost():
+    print("=== Benchmark Import Service ===\n")
+    print(f"{'module':<36} {'import ms':>10} {'MetaData':>9} {'modules':>8}")
+    for module in SERVICES:
+        cost = _import_cost(module)
+        if cost is None:
+            print(f"{module:<36} {'gagal':>10}")
+            continue
+        print(f"{module:<36} {cost[0]:>10.1f} {cost[1]:>9} {cost[2]:>8}")
+        assert cost[1] <= 1, f"{module}: {cost[1]} MetaData"
+
+if __name__ == "__main__":
+    test_single_metadata_registry()
+    test_service_import_cost()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test penerbitan nota massal /api/nota/issue-bulk dan /api/nota/create-batch
+Nota membawa order_id, salesman_id dan total_amount order; QR dirender paralel
+(render_many) untuk setiap nota, order yang sudah punya nota dilewati.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+from app.models.database import Base, User, Customer, Order, Nota, UserRole, AreaType
+from app.services.qr_service import QRRenderService, render_qr
+from app.services.sequence_service import sequence_allocator
+
+ORDERS = 30
+
+def _seed(Session):
+    with Session() as db:
+        admin = User(employee_id="ADM001", name="Admin", email="admin@example.com", password_hash="x",
+                     role=UserRole.ADMIN, area_type=AreaType.URBAN, phone_personal="0811")
+        salesman = User(employee_id="NB001", name="Sales", email="nb@example.com", password_hash="x",
+                        role=UserRole.SALES_TOKO, area_type=AreaType.URBAN, phone_personal="0812")
+        customer = Customer(customer_code="NB0001", name="Toko", type="toko", address="Jl. Raya",
+                            phone_owner="0813", area_code="KDR")
+        db.add_all([admin, salesman, customer])
+        db.flush()
+        db.add_all(Order(order_number=f"ORD-NB-{i:03d}", customer_id=customer.id, salesman_id=salesman.id,
+                         total_amount=10000 + i, final_amount=10000 + i) for i in range(ORDERS))
+        db.commit()
+        return admin.id, salesman.id, [o.id for o in db.query(Order).order_by(Order.order_number)]
+
+def test_render_many():
+    renderer = QRRenderService(workers=2, executor="thread")
+
+    async def collect():
+        return {key: image async for key, image in renderer.render_many(
+            ((f"k{i}", f"nota-{i}") for i in range(12)), "compact")}
+
+    try:
+        images = asyncio.run(collect())
+    finally:
+        renderer.shutdown()
+    assert images == {f"k{i}": render_qr(f"nota-{i}", "compact") for i in range(12)}
+
+def test_issue_bulk():
+    print("=== Testing Bulk Nota ===\n")
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'nota.db')}",
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    admin_id, salesman_id, order_ids = _seed(Session)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def override_user():
+        with Session() as db:
+            return db.get(User, admin_id)
+
+    original_factory = sequence_allocator.session_factory
+    sequence_allocator.session_factory = Session
+    main.app.dependency_overrides[main.get_db] = override_db
+    main.app.dependency_overrides[main.get_current_user] = override_user
+    try:
+        client = TestClient(main.app)
+
+        # Month-end: 20 order pertama lewat issue-bulk
+        body = client.post("/api/nota/issue-bulk", json={"order_ids": order_ids[:20], "qr_format": "compact"}).json()
+        print(f"issue-bulk: {body['created']} nota, {body['notas_per_second']} nota/s")
+        assert body["created"] == 20 and body["failed"] == 0
+        assert all(r["status"] == "created" and r["qr_code"] for r in body["results"])
+
+        again = client.post("/api/nota/issue-bulk", json={"order_ids": order_ids[:20]}).json()
+        assert again["created"] == 0 and {r["status"] for r in again["results"]} == {"skipped"}
+
+        # create-batch: NDJSON, order yang sudah punya nota dilaporkan sebagai error
+        response = client.post("/api/nota/create-batch", json=order_ids[15:], params={"qr_format": "compact"})
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len([line for line in lines if "error" in line]) == 5
+        streamed = [line for line in lines if "nota_id" in line]
+        assert sorted(line["order_id"] for line in streamed) == sorted(order_ids[20:])
+        assert all(line["qr_code"] for line in streamed)
+
+        with Session() as db:
+            notas = db.query(Nota).all()
+            assert len(notas) == ORDERS and len({n.nota_number for n in notas}) == ORDERS
+            totals = dict(db.query(Order.id, Order.total_amount))
+            assert all(n.salesman_id == salesman_id and n.total_amount == totals[n.order_id] for n in notas)
+    finally:
+        main.app.dependency_overrides.clear()
+        sequence_allocator.session_factory = original_factory
+        engine.dispose()
+    print("✅ Nota massal terbit sekali per order, QR untuk setiap nota")
+
+if __name__ == "__main__":
+    test_render_many()
+    test_issue_bulk()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test konfirmasi setoran /api/payment/{id}/confirm-deposit
+Konfirmasi kedua ditolak (409): rollup payment dan penalti fraud score hanya sekali.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+from app.models.database import (
+    Base, User, Customer, Nota, Payment, PaymentStatus, SalesRollup, UserRole, AreaType, build_engine
+)
+
+def test_confirm_deposit_once():
+    print("=== Testing Confirm Deposit ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'deposit.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        admin = User(employee_id="ADM001", name="Admin", email="admin@example.com", password_hash="x",
+                     role=UserRole.ADMIN, area_type=AreaType.URBAN, phone_personal="0811")
+        salesman = User(employee_id="DEP001", name="Sales", email="dep@example.com", password_hash="x",
+                        role=UserRole.SALES_TOKO, area_type=AreaType.URBAN, phone_personal="0812", fraud_score=0.0)
+        customer = Customer(customer_code="DC0001", name="Toko", type="toko", address="Jl. Raya",
+                            phone_owner="0813", area_code="KDR")
+        db.add_all([admin, salesman, customer])
+        db.flush()
+        nota = Nota(nota_number="NT-DEP-1", customer_id=customer.id, salesman_id=salesman.id, amount=500000,
+                    total_amount=500000, qr_code="qr", due_date=datetime.utcnow() + timedelta(days=14))
+        db.add(nota)
+        db.flush()
+        # Setor terlambat 2 hari -> penalti fraud score
+        payment = Payment(nota_id=nota.id, customer_id=customer.id, salesman_id=salesman.id, amount=500000,
+                          payment_method="cash", gps_latitude=-7.8, gps_longitude=112.0,
+                          created_at=datetime.utcnow() - timedelta(days=2))
+        db.add(payment)
+        db.commit()
+        admin_id, salesman_id, payment_id = admin.id, salesman.id, payment.id
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def override_user():
+        with Session() as db:
+            return db.get(User, admin_id)
+
+    main.app.dependency_overrides[main.get_db] = override_db
+    main.app.dependency_overrides[main.get_current_user] = override_user
+    try:
+        client = TestClient(main.app)
+        url = f"/api/payment/{payment_id}/confirm-deposit"
+        first = client.post(url, params={"bank_reference": "TRX-1"})
+        assert first.status_code == 200, first.text
+        second = client.post(url, params={"bank_reference": "TRX-1"})
+        assert second.status_code == 409, second.text
+
+        with Session() as db:
+            assert db.get(Payment, payment_id).status == PaymentStatus.COMPLETED
+            assert abs(db.get(User, salesman_id).fraud_score - 0.05) < 1e-9
+            days = db.query(SalesRollup).filter(SalesRollup.granularity == "day").all()
+            assert [row.payments_count for row in days] == [1]
+    finally:
+        main.app.dependency_overrides.clear()
+        engine.dispose()
+    print("✅ Setoran dikonfirmasi sekali, konfirmasi ulang 409")
+
+if __name__ == "__main__":
+    test_confirm_deposit_once()
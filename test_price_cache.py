@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test invalidasi PriceListCache (order_service)
+Perubahan harga / nonaktif produk langsung terlihat oleh order berikutnya, tanpa menunggu TTL.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Product, build_engine
+from app.services.order_service import price_list_cache
+
+def test_price_changes_invalidate_cache():
+    print("=== Testing Price List Cache ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'prices.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        db.add_all(Product(product_code=f"PC{i:03d}", name=f"Produk {i}", category="umum", unit="pcs",
+                           base_price=1000, selling_price=1500, stock_quantity=10) for i in range(3))
+        db.commit()
+        ids = [p.id for p in db.query(Product).order_by(Product.product_code)]
+
+    price_list_cache.invalidate()
+    try:
+        with Session() as db:
+            assert price_list_cache.get_prices(db, ids) == dict.fromkeys(ids, 1500)
+
+            # Edit harga satu produk: hanya produk itu yang dibuang dari cache
+            db.get(Product, ids[0]).selling_price = 1750
+            db.get(Product, ids[1]).stock_quantity = 5
+            db.commit()
+            assert set(price_list_cache._prices) == set(ids[1:])
+            assert price_list_cache.get_prices(db, ids)[ids[0]] == 1750
+
+            # Rollback tidak membuang apa pun
+            db.get(Product, ids[1]).selling_price = 1
+            db.rollback()
+            assert set(price_list_cache._prices) == set(ids)
+
+            # Nonaktifkan produk: tidak lagi ada di price list
+            db.get(Product, ids[2]).is_active = False
+            db.commit()
+            assert ids[2] not in price_list_cache.get_prices(db, ids)
+
+            # Bulk update: seluruh cache dikosongkan
+            db.query(Product).update({Product.selling_price: Product.selling_price + 100})
+            db.commit()
+            assert price_list_cache._prices == {}
+            assert price_list_cache.get_prices(db, ids[:2]) == {ids[0]: 1850, ids[1]: 1600}
+    finally:
+        price_list_cache.invalidate()
+        engine.dispose()
+    print("✅ Cache harga di-invalidate setelah commit perubahan produk")
+
+if __name__ == "__main__":
+    test_price_changes_invalidate_cache()
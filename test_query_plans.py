@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Query plan test untuk index komposit di models/database.py
+Seed data besar ke SQLite sementara, lalu pastikan query hot path
+memakai index (SEARCH ... USING INDEX), bukan full table scan.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from sqlalchemy import create_engine, insert, select, text
+
+from app.models.database import (
+    Base, User, Customer, Order, Payment, SalesVisit, FraudDetectionLog,
+    UserRole, AreaType, PaymentStatus, ensure_indexes
+)
+
+ROWS = 20000
+SALESMEN = 200
+
+def _seed(engine):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    users = [{
+        "id": str(uuid.uuid4()), "employee_id": f"PLAN{i:05d}", "name": f"Sales {i}",
+        "email": f"plan{i}@example.com", "password_hash": "x",
+        "role": UserRole.SALES_TOKO if i % 10 else UserRole.SUPERVISOR_TOKO,
+        "area_type": AreaType.URBAN, "phone_personal": "0811", "fraud_score": rng.random()
+    } for i in range(SALESMEN)]
+    customers = [{
+        "id": str(uuid.uuid4()), "customer_code": f"PC{i:05d}", "name": f"Toko {i}", "type": "toko",
+        "address": "Kediri", "phone_owner": "0811", "area_code": f"A{i % 40}"
+    } for i in range(2000)]
+    user_ids = [u["id"] for u in users]
+    customer_ids = [c["id"] for c in customers]
+
+    def when():
+        return now - timedelta(minutes=rng.randrange(60 * 24 * 90))
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), users)
+        conn.execute(insert(Customer), customers)
+        conn.execute(insert(Order), [{
+            "id": str(uuid.uuid4()), "order_number": f"ORD{i:08d}", "customer_id": rng.choice(customer_ids),
+            "salesman_id": rng.choice(user_ids), "total_amount": 1000.0, "final_amount": 1000.0,
+            "created_at": when()
+        } for i in range(ROWS)])
+        conn.execute(insert(Payment), [{
+            "id": str(uuid.uuid4()), "nota_id": str(uuid.uuid4()), "customer_id": rng.choice(customer_ids),
+            "salesman_id": rng.choice(user_ids), "amount": 1000.0, "payment_method": "cash",
+            "gps_latitude": 0.0, "gps_longitude": 0.0, "status": PaymentStatus.PENDING,
+            "late_deposit_hours": rng.choice([0] * 9 + [24]),
+            "deposited_at": None if rng.random() < 0.1 else now, "created_at": when()
+        } for _ in range(ROWS)])
+        conn.execute(insert(SalesVisit), [{
+            "id": str(uuid.uuid4()), "salesman_id": rng.choice(user_ids), "customer_id": rng.choice(customer_ids),
+            "visit_type": "regular", "check_in": when()
+        } for _ in range(ROWS)])
+        conn.execute(insert(FraudDetectionLog), [{
+            "id": str(uuid.uuid4()), "entity_type": "visit", "entity_id": str(uuid.uuid4()),
+            "user_id": rng.choice(user_ids), "fraud_type": rng.choice(["invalid_qr_scan", "late_deposit", "new_device"]),
+            "fraud_score": rng.random(), "detection_method": "seed", "detected_at": when()
+        } for _ in range(ROWS)])
+        conn.execute(text("ANALYZE"))
+    return user_ids, customer_ids
+
+def _plan(engine, stmt):
+    sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+def _assert_indexed(name, plan, table):
+    print(f"{name}:")
+    for step in plan:
+        print(f"    {step}")
+    steps = [step for step in plan if f" {table}" in f" {step}"]
+    assert steps, f"{name}: table {table} not in plan"
+    for step in steps:
+        assert "USING" in step and "INDEX" in step, f"{name}: full table scan -> {step}"
+
+def test_hot_queries_use_indexes():
+    print("=== Testing Query Plans ===\n")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "plans.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    # Tabel tanpa index dulu, lalu migrasi ensure_indexes seperti DB lama
+    tables = [User.__table__, Customer.__table__, Order.__table__, Payment.__table__,
+              SalesVisit.__table__, FraudDetectionLog.__table__]
+    saved = {table.name: set(table.indexes) for table in tables}
+    try:
+        for table in tables:
+            table.indexes = {index for index in table.indexes if index.unique}
+        Base.metadata.create_all(bind=engine, tables=tables)
+    finally:
+        for table in tables:
+            table.indexes = saved[table.name]
+    created = ensure_indexes(engine)
+    assert "ix_payments_salesman_created" in created
+    assert ensure_indexes(engine) == []  # idempotent
+
+    user_ids, customer_ids = _seed(engine)
+    since = datetime.utcnow() - timedelta(days=7)
+
+    _assert_indexed("payments by salesman + created_at", _plan(engine,
+        select(Payment.id, Payment.amount).where(Payment.salesman_id == user_ids[3], Payment.created_at >= since)
+    ), "payments")
+
+    _assert_indexed("pending deposits", _plan(engine,
+        select(Payment.id).where(Payment.late_deposit_hours > 0, Payment.deposited_at == None)
+        .order_by(Payment.late_deposit_hours.desc()).limit(50)
+    ), "payments")
+
+    _assert_indexed("visits by salesman + check_in", _plan(engine,
+        select(SalesVisit.id).where(SalesVisit.salesman_id == user_ids[3], SalesVisit.check_in >= since)
+    ), "sales_visits")
+
+    _assert_indexed("orders by created_at", _plan(engine,
+        select(Order.id, Order.total_amount).where(Order.created_at >= since)
+    ), "orders")
+
+    _assert_indexed("orders by customer", _plan(engine,
+        select(Order.id).where(Order.customer_id == customer_ids[5])
+    ), "orders")
+
+    feed_plan = _plan(engine,
+        select(FraudDetectionLog.id).order_by(FraudDetectionLog.detected_at.desc(), FraudDetectionLog.id.desc()).limit(51)
+    )
+    _assert_indexed("fraud feed page", feed_plan, "fraud_detection_logs")
+    assert not any("TEMP B-TREE" in step for step in feed_plan), "fraud feed sorts in memory"
+
+    _assert_indexed("fraud feed by user", _plan(engine,
+        select(FraudDetectionLog.id).where(FraudDetectionLog.user_id == user_ids[3], FraudDetectionLog.detected_at >= since)
+    ), "fraud_detection_logs")
+
+    _assert_indexed("high risk users", _plan(engine,
+        select(User.id).where(User.fraud_score > 0.7).order_by(User.fraud_score.desc()).limit(50)
+    ), "users")
+
+    _assert_indexed("users by role", _plan(engine,
+        select(User.id).where(User.role == UserRole.SUPERVISOR_TOKO)
+    ), "users")
+
+    engine.dispose()
+    print("\n✅ Semua query hot path memakai index")
+
+if __name__ == "__main__":
+    test_hot_queries_use_indexes()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test SalesRollupService.summarize terhadap agregat tabel mentah
+Window yang mulai/berakhir di tengah hari dan yang melewati pergantian hari
+harus sama dengan SUM/COUNT langsung dari orders, sales_visits dan payments
+(rollup per jam: batas window dibulatkan ke jam).
+"""
+
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import (
+    Base, User, Customer, Nota, Order, SalesVisit, Payment, PaymentStatus, UserRole, AreaType, build_engine
+)
+from app.services.rollup_service import sales_rollups, salesman_scope, METRICS
+
+START = datetime(2024, 5, 1)
+DAYS = 4
+
+def _seed(Session):
+    rng = random.Random(31)
+    with Session() as db:
+        salesmen = [User(employee_id=f"RS{i:03d}", name=f"Sales {i}", email=f"rs{i}@example.com", password_hash="x",
+                         role=UserRole.SALES_TOKO, area_type=AreaType.URBAN, phone_personal="0811",
+                         area_detail={"location": ["KDR"]}) for i in range(3)]
+        customer = Customer(customer_code="RC0001", name="Toko", type="toko", address="Jl. Raya",
+                            phone_owner="0811", area_code="KDR")
+        db.add_all([*salesmen, customer])
+        db.flush()
+        nota = Nota(nota_number="NT-RS-1", customer_id=customer.id, salesman_id=salesmen[0].id, amount=1,
+                    total_amount=1, qr_code="qr", due_date=START + timedelta(days=30))
+        db.add(nota)
+        db.flush()
+
+        # Setiap baris mentah juga dicatat ke rollup, seperti jalur tulis live
+        for i in range(600):
+            salesman = salesmen[i % 3]
+            scope = salesman_scope(salesman)
+            at = START + timedelta(minutes=rng.randrange(DAYS * 24 * 60), seconds=rng.randrange(60))
+            amount = float(rng.randrange(1, 100) * 1000)
+            kind = i % 4
+            if kind == 0:
+                db.add(Order(order_number=f"ORD-RS-{i:04d}", customer_id=customer.id, salesman_id=salesman.id,
+                             total_amount=amount, final_amount=amount, created_at=at))
+                sales_rollups.record_order(db, scope, amount, at)
+            elif kind in (1, 2):
+                db.add(SalesVisit(salesman_id=salesman.id, customer_id=customer.id, visit_type="regular", check_in=at))
+                sales_rollups.record_visit(db, scope, at)
+            else:
+                completed = i % 8 == 3
+                db.add(Payment(nota_id=nota.id, customer_id=customer.id, salesman_id=salesman.id, amount=amount,
+                               payment_method="cash", gps_latitude=-7.8, gps_longitude=112.0, created_at=at,
+                               status=PaymentStatus.COMPLETED if completed else PaymentStatus.PENDING))
+                if completed:
+                    sales_rollups.record_payment(db, scope, amount, at)
+        db.commit()
+        return [s.id for s in salesmen]
+
+def _raw(db, start, end, salesman_ids=None):
+    """Agregat langsung dari tabel mentah, window dibulatkan ke jam [jam(start), jam(end) + 1 jam)"""
+    low = start.replace(minute=0, second=0, microsecond=0)
+    high = end.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+    def scoped(query, model, column):
+        query = query.filter(column >= low, column < high)
+        return query.filter(model.salesman_id.in_(salesman_ids)) if salesman_ids is not None else query
+
+    orders = scoped(db.query(func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0)),
+                    Order, Order.created_at).one()
+    visits = scoped(db.query(func.count(SalesVisit.id)), SalesVisit, SalesVisit.check_in).scalar()
+    payments = scoped(db.query(func.count(Payment.id), func.coalesce(func.sum(Payment.amount), 0))
+                      .filter(Payment.status == PaymentStatus.COMPLETED), Payment, Payment.created_at).one()
+    return dict(zip(METRICS, (orders[0], orders[1], visits, payments[0], payments[1])))
+
+def test_summarize_matches_raw_tables():
+    print("=== Testing Rollup Windows ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'rollups.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    salesman_ids = _seed(Session)
+
+    day = timedelta(days=1)
+    windows = {
+        "tengah hari": (START + day + timedelta(hours=9, minutes=30), START + day + timedelta(hours=15, minutes=10)),
+        "lewat tengah malam": (START + timedelta(hours=22, minutes=15), START + day + timedelta(hours=3, minutes=45)),
+        "dua hari parsial": (START + timedelta(hours=9, minutes=20), START + day + timedelta(hours=14, minutes=5)),
+        "hari penuh di tengah": (START + timedelta(hours=9, minutes=20), START + 2 * day + timedelta(hours=14, minutes=5)),
+        "mulai tengah malam": (START + day, START + 3 * day + timedelta(hours=6)),
+        "berakhir tengah malam": (START + timedelta(hours=18), START + 2 * day),
+        "semua": (START, START + DAYS * day),
+    }
+    try:
+        with Session() as db:
+            for label, (start, end) in windows.items():
+                for scope in (None, salesman_ids[:2]):
+                    expected = _raw(db, start, end, scope)
+                    assert expected["orders_count"] and expected["visits_count"], label
+                    assert sales_rollups.summarize(db, start, end, salesman_ids=scope) == expected, (label, scope)
+                print(f"{label:<22} {start:%m-%d %H:%M} - {end:%m-%d %H:%M}: cocok")
+
+            # Backfill dari tabel mentah menghasilkan angka yang sama
+            sales_rollups.rebuild(db, START)
+            for label, (start, end) in windows.items():
+                assert sales_rollups.summarize(db, start, end) == _raw(db, start, end), label
+    finally:
+        engine.dispose()
+    print("\n✅ summarize sama dengan agregat tabel mentah untuk setiap window")
+
+if __name__ == "__main__":
+    test_summarize_matches_raw_tables()
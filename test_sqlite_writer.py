@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test SQLite single writer (app.core.sqlite) di backend team4
+Pragma bersama tidak menyalakan foreign_keys; handler async menunggu writer
+tanpa memblok event loop. Engine SQLAlchemy ERP (tanpa writer) tetap aman
+untuk check-in dan order paralel dengan WAL + busy_timeout.
+"""
+
+import asyncio
+import importlib.util
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from app.core.sqlite import FOREIGN_KEYS, SQLITE_PRAGMAS, SQLiteWriter, connect
+from app.models.database import (
+    Base, User, Customer, Product, Order, SalesVisit, SalesRollup, UserRole, AreaType, build_engine
+)
+from app.services.order_service import order_ingestion, price_list_cache, OrderInput, OrderItemInput
+from app.services.rollup_service import sales_rollups, salesman_scope
+from app.services.sequence_service import sequence_allocator
+
+def _load_team4(db_path):
+    spec = importlib.util.spec_from_file_location(
+        "team4_main", project_root / "packages" / "team4-hr-system" / "backend" / "main.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.DB_PATH = db_path
+    module.db_writer = SQLiteWriter(db_path)
+    # passlib + bcrypt>=4.1 gagal saat self-test; hash admin default tidak dipakai di test ini
+    module.pwd_context = CryptContext(schemes=["sha256_crypt"])
+    module.init_db()
+    return module
+
+def test_writer_pragmas_and_async():
+    print("=== Testing SQLite Writer ===\n")
+    db_path = os.path.join(tempfile.mkdtemp(), "hr_system.db")
+    team4 = _load_team4(db_path)
+    try:
+        # Check-in karyawan yang belum terdaftar tetap diterima seperti sebelum WAL
+        client = TestClient(team4.app)
+        response = client.post("/api/attendance/check-in", json={"employeeId": "BELUM-ADA"})
+        assert response.status_code == 200, response.text
+        assert client.post("/api/attendance/check-out", json={"employeeId": "BELUM-ADA"}).status_code == 200
+        assert connect(db_path).execute("PRAGMA foreign_keys").fetchone()[0] == 0
+
+        # foreign_keys hanya jika pemanggil meminta
+        strict = SQLiteWriter(db_path, pragmas={**SQLITE_PRAGMAS, **FOREIGN_KEYS})
+        try:
+            strict.run(lambda conn: conn.execute(
+                "INSERT INTO attendance (employeeId, date, checkIn, status) VALUES ('X', '2024-01-01', '08:00:00', 'Present')"))
+            raise AssertionError("foreign key tidak ditegakkan")
+        except sqlite3.IntegrityError:
+            pass
+        finally:
+            strict.close()
+
+        # Writer sibuk: event loop tetap jalan selama run_async menunggu
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            started = time.perf_counter()
+            result = await team4.db_writer.run_async(lambda conn: time.sleep(0.3) or "ok")
+            elapsed = time.perf_counter() - started
+            task.cancel()
+            return result, ticks, elapsed
+
+        result, ticks, elapsed = asyncio.run(scenario())
+        print(f"run_async {elapsed * 1000:.0f} ms, event loop tick {ticks}x selama menunggu")
+        assert result == "ok" and ticks >= 10
+    finally:
+        team4.db_writer.close()
+    print("\n✅ Pragma tanpa foreign_keys, writer di-await dari handler async")
+
+def test_erp_engine_concurrent_writes():
+    print("=== Testing ERP Engine Concurrent Writes ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'erp.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        salesmen = [User(employee_id=f"CW{i:03d}", name=f"Sales {i}", email=f"cw{i}@example.com", password_hash="x",
+                         role=UserRole.SALES_TOKO, area_type=AreaType.URBAN, phone_personal="0811") for i in range(8)]
+        customer = Customer(customer_code="CW0001", name="Toko", type="toko", address="Jl. Raya",
+                            phone_owner="0811", area_code="KDR", credit_limit=10_000_000)
+        product = Product(product_code="CW001", name="Produk", category="umum", unit="pcs",
+                          base_price=1000, selling_price=1500, stock_quantity=1000)
+        db.add_all([*salesmen, customer, product])
+        db.commit()
+        salesman_ids, customer_id, product_id = [s.id for s in salesmen], customer.id, product.id
+
+        # pysqlite: SELECT tidak membuka transaksi, BEGIN baru dikirim sebelum DML pertama
+        db.query(Customer).first()
+        assert not db.connection().connection.dbapi_connection.in_transaction
+
+    def check_in(db, salesman):
+        # Sama dengan /api/sales/checkin: baca customer, insert kunjungan, upsert rollup
+        customer = db.query(Customer).filter(Customer.id == customer_id).first()
+        visit = SalesVisit(salesman_id=salesman.id, customer_id=customer.id, visit_type="regular",
+                           check_in=datetime.utcnow())
+        db.add(visit)
+        sales_rollups.record_visit(db, salesman_scope(salesman), visit.check_in)
+        db.commit()
+
+    def order(db, salesman):
+        order_ingestion.create_order(db, salesman, OrderInput(
+            customer_id=customer_id, items=[OrderItemInput(product_id=product_id, quantity=2)]))
+
+    errors = []
+
+    def worker(i):
+        with Session() as db:
+            salesman = db.get(User, salesman_ids[i % len(salesman_ids)])
+            try:
+                (check_in if i % 2 else order)(db, salesman)
+            except Exception as e:
+                errors.append(repr(e))
+
+    original_factory = sequence_allocator.session_factory
+    sequence_allocator.session_factory = Session
+    price_list_cache.invalidate()
+    try:
+        started = time.perf_counter()
+        # create_order memakai dua koneksi (request + sequence_allocator); pool SQLite 5 + overflow 10
+        with ThreadPoolExecutor(6) as executor:
+            list(executor.map(worker, range(400)))
+        print(f"400 transaksi tulis, 6 thread: {(time.perf_counter() - started) * 1000:.0f} ms")
+        assert errors == [], errors[:3]
+
+        with Session() as db:
+            assert db.query(SalesVisit).count() == db.query(Order).count() == 200
+            assert db.get(Customer, customer_id).credit_used == 200 * 3000
+            day = db.query(func.sum(SalesRollup.visits_count), func.sum(SalesRollup.orders_count)).filter(
+                SalesRollup.granularity == "day").one()
+            assert tuple(day) == (200, 200)
+    finally:
+        sequence_allocator.session_factory = original_factory
+        price_list_cache.invalidate()
+        engine.dispose()
+    print("✅ Check-in dan order paralel tanpa 'database is locked' atau update hilang")
+
+if __name__ == "__main__":
+    test_writer_pragmas_and_async()
+    test_erp_engine_concurrent_writes()
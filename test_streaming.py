@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test streaming JSON (app.core.streaming) untuk endpoint list besar
+Output sama dengan list biasa, peak memory tidak ikut naik dengan jumlah baris.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+
+from app.core.sqlite import connect
+from app.core.streaming import json_array
+
+def _load_team5(db_path):
+    spec = importlib.util.spec_from_file_location(
+        "team5_main", project_root / "packages" / "team5-ecommerce" / "backend" / "main.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.DB_PATH = db_path
+    module.init_db()
+    return module
+
+def _seed(db_path, count):
+    conn = connect(db_path)
+    conn.executemany(
+        "INSERT INTO products (name, description, price, category, stock) VALUES (?, ?, ?, ?, ?)",
+        [(f"Produk {i:06d}", "Deskripsi produk " * 4, 1000 + i, "umum" if i % 2 else "minuman", i % 90)
+         for i in range(count)]
+    )
+    conn.commit()
+    conn.close()
+
+def _peak(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def test_streamed_list_endpoints():
+    print("=== Testing Streaming JSON ===\n")
+    db_path = os.path.join(tempfile.mkdtemp(), "ecommerce.db")
+    team5 = _load_team5(db_path)
+    _seed(db_path, 50000)
+    client = TestClient(team5.app)
+
+    # Bentuk response sama dengan versi lama (array top-level)
+    conn = connect(db_path)
+    expected = [dict(row) for row in conn.execute("SELECT * FROM products WHERE category = ? ORDER BY name", ("umum",))]
+    started = time.perf_counter()
+    response = client.get("/api/products", params={"category": "umum"})
+    print(f"GET /api/products ({len(expected)} baris): {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"{len(response.content) / 1024:.0f} KB")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == expected
+
+    lines = client.get("/api/products", params={"search": "Produk 00001"},
+                       headers={"Accept": "application/x-ndjson"}).text.splitlines()
+    assert [json.loads(line)["name"] for line in lines] == [f"Produk {i:06d}" for i in range(10, 20)]
+
+    # Objek dengan head/tail dan hasil kosong tetap JSON valid
+    wrapped = "".join(json_array(iter([{"a": 1}, {"a": 2}]), key="items", head={"page": 1},
+                                 tail=lambda count: {"count": count}, chunk_size=1))
+    assert json.loads(wrapped) == {"page": 1, "items": [{"a": 1}, {"a": 2}], "count": 2}
+    assert json.loads("".join(json_array(iter([]), key="items"))) == {"items": []}
+
+    # Peak memory: fetchmany + chunk vs fetchall + list dict
+    for rows in (10000, 50000):
+        query = f"SELECT * FROM products LIMIT {rows}"
+        streamed = _peak(lambda: sum(len(part) for part in json_array(conn.execute(query))))
+        buffered = _peak(lambda: len(json.dumps([dict(row) for row in conn.execute(query).fetchall()])))
+        print(f"{rows:>6} baris: peak stream {streamed / 1024:.0f} KB, fetchall {buffered / 1024:.0f} KB")
+        assert streamed < buffered / 5
+    conn.close()
+    print("\n✅ Response list di-stream per chunk, memory datar")
+
+if __name__ == "__main__":
+    test_streamed_list_endpoints()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Test upload offline attendance /api/sync/upload
+Retry batch yang sama tidak menggandakan check-in, action gagal tidak membatalkan yang lain.
+Batch catch-up diterapkan urut waktu device; edit customer di-merge per field.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+import attendance_service
+from app.models.database import (
+    Base, User, Customer, Product, Order, OrderItem, SalesVisit, SalesRollup, ProcessedSyncAction,
+    UserRole, AreaType, build_engine
+)
+from app.services.geofence_service import geofence_index
+from app.services.sequence_service import sequence_allocator
+
+VISITS = 200
+
+def _seed(Session):
+    with Session() as db:
+        salesman = User(employee_id="UPL001", name="Sales Upload", email="upload@example.com", password_hash="x",
+                        role=UserRole.SALES_TOKO, area_type=AreaType.URBAN, phone_personal="0811")
+        db.add(salesman)
+        db.add_all(Customer(customer_code=f"UC{i:04d}", name=f"Toko {i}", type="toko", address="Jl. Raya",
+                            phone_owner="0811", area_code="KDR") for i in range(VISITS))
+        db.commit()
+        return salesman.id, [c.id for c in db.query(Customer).order_by(Customer.customer_code)]
+
+def _batch(salesman_id, customer_ids):
+    actions = []
+    for i, customer_id in enumerate(customer_ids):
+        actions.append({"action_type": "check_in", "timestamp": f"2024-05-01T08:{i % 60:02d}:00",
+                        "idempotency_key": f"dev1-in-{i}",
+                        "data": {"salesman_id": salesman_id, "customer_id": customer_id, "latitude": -7.8}})
+        actions.append({"action_type": "check_out", "timestamp": f"2024-05-01T09:{i % 60:02d}:00",
+                        "idempotency_key": f"dev1-out-{i}", "data": {"visit_key": f"dev1-in-{i}"}})
+    return actions
+
+def test_idempotent_batch_upload():
+    print("=== Testing Offline Upload ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'upload.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    salesman_id, customer_ids = _seed(Session)
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    attendance_service.app.dependency_overrides[attendance_service.get_db] = override_db
+    try:
+        client = TestClient(attendance_service.app)
+        actions = _batch(salesman_id, customer_ids)
+        # Satu action rusak (customer tidak ada) di tengah batch
+        actions.insert(10, {"action_type": "check_in", "timestamp": "2024-05-01T08:00:00",
+                            "idempotency_key": "dev1-bad", "data": {"salesman_id": salesman_id, "customer_id": "x"}})
+
+        statements.clear()
+        started = time.perf_counter()
+        response = client.post("/api/sync/upload", json=actions)
+        elapsed = (time.perf_counter() - started) * 1000
+        assert response.status_code == 200, response.text
+        body = response.json()
+        print(f"Upload {len(actions)} action: {elapsed:.0f} ms, {len(statements)} statement SQL")
+        assert body["success_count"] == 2 * VISITS and body["failed_count"] == 1
+        assert body["results"][10] == {"key": "dev1-bad", "status": "failed", "error": "customer not found"}
+        assert body["results"][11]["visit_id"] == body["results"][12]["visit_id"]
+        # Tidak ada SELECT per action: referensi dimuat sekali per tabel
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) <= 10, len(selects)
+
+        # Retry batch yang sama (mis. response hilang di jalan): tidak ada check-in ganda
+        retry = client.post("/api/sync/upload", json=actions).json()
+        assert retry["success_count"] == 0 and retry["duplicate_count"] == 2 * VISITS
+        assert [r.get("visit_id") for r in retry["results"]] == [r.get("visit_id") for r in body["results"]]
+
+        # Check-out terpisah dari check-in (batch berikutnya) lewat visit_key
+        late = client.post("/api/sync/upload", json=[
+            {"action_type": "check_in", "timestamp": "2024-05-02T08:00:00", "idempotency_key": "dev1-late-in",
+             "data": {"salesman_id": salesman_id, "customer_id": customer_ids[0]}}]).json()
+        out = client.post("/api/sync/upload", json=[
+            {"action_type": "check_out", "timestamp": "2024-05-02T08:45:00", "idempotency_key": "dev1-late-out",
+             "data": {"visit_key": "dev1-late-in"}}]).json()
+        assert out["results"][0]["visit_id"] == late["results"][0]["visit_id"]
+
+        # Device lama tanpa idempotency_key: key dari hash isi action
+        legacy = {"action_type": "check_in", "timestamp": "2024-05-03T08:00:00",
+                  "data": {"salesman_id": salesman_id, "customer_id": customer_ids[1]}}
+        first = client.post("/api/sync/upload", json=[legacy]).json()
+        again = client.post("/api/sync/upload", json=[legacy]).json()
+        assert first["success_count"] == 1 and again["duplicate_count"] == 1
+
+        # Check-in online juga masuk rollup kunjungan
+        online = client.post("/api/attendance/checkin", json={"salesman_id": salesman_id, "customer_id": customer_ids[2],
+                                                               "latitude": -7.8, "longitude": 112.0})
+        assert online.status_code == 200, online.text
+
+        with Session() as db:
+            assert db.query(SalesVisit).count() == VISITS + 3
+            assert db.query(SalesVisit).filter(SalesVisit.duration_minutes == 60).count() == VISITS
+            late_visit = db.get(SalesVisit, late["results"][0]["visit_id"])
+            assert late_visit.duration_minutes == 45
+            assert db.query(ProcessedSyncAction).count() == 2 * VISITS + 3
+            # Rollup per hari waktu device (duplikat tidak dihitung ulang) + check-in online hari ini
+            visits_per_day = dict(db.query(SalesRollup.bucket, SalesRollup.visits_count)
+                                  .filter(SalesRollup.granularity == "day"))
+            assert visits_per_day.pop(datetime(2024, 5, 1)) == VISITS
+            assert visits_per_day.pop(datetime(2024, 5, 2)) == visits_per_day.pop(datetime(2024, 5, 3)) == 1
+            assert list(visits_per_day.values()) == [1]
+    finally:
+        attendance_service.app.dependency_overrides.clear()
+        engine.dispose()
+    print("\n✅ Upload idempoten, satu transaksi per batch")
+
+def test_catch_up_merge():
+    print("=== Testing Offline Merge ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'merge.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    salesman_id, customer_ids = _seed(Session)
+    with Session() as db:
+        db.query(Customer).update({Customer.credit_limit: 10_000_000})
+        db.get(Customer, customer_ids[1]).latitude, db.get(Customer, customer_ids[1]).longitude = -7.8, 112.0
+        db.add_all(Product(product_code=f"UP{i:03d}", name=f"Produk {i}", category="umum", unit="pcs",
+                           base_price=1000, selling_price=1500, stock_quantity=100) for i in range(20))
+        db.commit()
+        product_ids = [p.id for p in db.query(Product).order_by(Product.product_code)]
+        old_phone, old_address = db.get(Customer, customer_ids[0]).phone_owner, db.get(Customer, customer_ids[0]).address
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    original_factory = sequence_allocator.session_factory, geofence_index.session_factory
+    sequence_allocator.session_factory = geofence_index.session_factory = Session
+    attendance_service.app.dependency_overrides[attendance_service.get_db] = override_db
+    try:
+        client = TestClient(attendance_service.app)
+
+        # Device offline 3 hari: check-in, order, check-out per kunjungan; urutan kirim acak
+        actions = []
+        for i, customer_id in enumerate(customer_ids):
+            day, minute = 1 + i % 3, i % 50
+            actions.append({"action_type": "check_in", "timestamp": f"2024-05-0{day}T08:{minute:02d}:00",
+                            "idempotency_key": f"dev2-in-{i}", "data": {"salesman_id": salesman_id, "customer_id": customer_id}})
+            actions.append({"action_type": "order", "timestamp": f"2024-05-0{day}T08:{minute:02d}:30",
+                            "idempotency_key": f"dev2-order-{i}",
+                            "data": {"salesman_id": salesman_id, "customer_id": customer_id, "client_ref": f"local-{i}",
+                                     "items": [{"product_id": product_ids[i % 20], "quantity": 2},
+                                               {"product_id": product_ids[(i + 1) % 20], "quantity": 1}]}})
+            actions.append({"action_type": "check_out", "timestamp": f"2024-05-0{day}T09:{minute:02d}:00",
+                            "idempotency_key": f"dev2-out-{i}", "data": {"visit_key": f"dev2-in-{i}"}})
+        random.Random(7).shuffle(actions)
+
+        statements.clear()
+        started = time.perf_counter()
+        body = client.post("/api/sync/upload", json=actions).json()
+        elapsed = (time.perf_counter() - started) * 1000
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        print(f"Catch-up {len(actions)} action (acak): {elapsed:.0f} ms, {len(selects)} SELECT")
+        assert body["success_count"] == len(actions), [r for r in body["results"] if r["status"] != "success"][:3]
+        assert len(selects) <= 15, len(selects)
+
+        retry = client.post("/api/sync/upload", json=actions).json()
+        assert retry["duplicate_count"] == len(actions)
+
+        # Check-in offline divalidasi geofence seperti check-in online
+        geo = [{"action_type": "check_in", "timestamp": "2024-05-04T08:00:00", "idempotency_key": f"dev2-geo-{i}",
+                "data": {"salesman_id": salesman_id, "customer_id": customer_ids[1], "latitude": lat, "longitude": 112.0}}
+               for i, lat in enumerate((-7.8003, -7.81))]
+        near, far = client.post("/api/sync/upload", json=geo).json()["results"]
+        assert near["location_valid"] and near["distance_m"] < 100
+        assert not far["location_valid"] and far["distance_m"] > 1000
+
+        # Customer dipindah oleh worker lain (index proses ini belum tahu): jarak dari baris customer
+        assert geofence_index.location_of(customer_ids[1]) == (-7.8, 112.0)
+        with Session() as db:
+            db.query(Customer).filter(Customer.id == customer_ids[1]).update({Customer.latitude: -7.81})
+            db.commit()
+        moved = dict(geo[1], idempotency_key="dev2-geo-moved")
+        assert client.post("/api/sync/upload", json=[moved]).json()["results"][0]["location_valid"]
+        assert geofence_index.location_of(customer_ids[1]) == (-7.8, 112.0)
+
+        # Dua device mengedit customer yang sama; device B (edit lebih lama) tiba terakhir
+        device_a = [{"action_type": "update_customer", "timestamp": "2024-05-03T10:00:00", "idempotency_key": "a-edit",
+                     "data": {"customer_id": customer_ids[0], "changes": {"phone_owner": "0812-A"},
+                              "base": {"phone_owner": old_phone}}}]
+        device_b = [{"action_type": "update_customer", "timestamp": "2024-05-03T09:00:00", "idempotency_key": "b-edit",
+                     "data": {"customer_id": customer_ids[0],
+                              "changes": {"phone_owner": "0812-B", "address": "Jl. Baru 1"},
+                              "base": {"phone_owner": old_phone, "address": old_address}}}]
+        client.post("/api/sync/upload", json=device_a, headers={"X-Device-Id": "A"})
+        merged = client.post("/api/sync/upload", json=device_b, headers={"X-Device-Id": "B"}).json()
+        assert merged["results"][0]["applied"] == ["address"] and merged["results"][0]["conflicts"] == ["phone_owner"]
+        assert merged["conflict_count"] == 1
+
+        # Device C mengedit field lain (phone_store) dengan waktu lebih lama dari edit A: tetap diterapkan
+        device_c = [{"action_type": "update_customer", "timestamp": "2024-05-03T08:00:00", "idempotency_key": "c-edit",
+                     "data": {"customer_id": customer_ids[0], "changes": {"phone_store": "0354-C"},
+                              "base": {"phone_store": None}}}]
+        other = client.post("/api/sync/upload", json=device_c, headers={"X-Device-Id": "C"}).json()
+        assert other["results"][0]["applied"] == ["phone_store"] and other["conflict_count"] == 0
+
+        # Edit server ke email tercatat sebagai clock field: edit device yang lebih lama kalah
+        with Session() as db:
+            db.get(Customer, customer_ids[0]).email = "server@example.com"
+            db.commit()
+        device_d = [{"action_type": "update_customer", "timestamp": "2024-05-04T08:00:00", "idempotency_key": "d-edit",
+                     "data": {"customer_id": customer_ids[0], "changes": {"email": "d@example.com"},
+                              "base": {"email": None}}}]
+        stale = client.post("/api/sync/upload", json=device_d, headers={"X-Device-Id": "D"}).json()
+        assert stale["results"][0]["conflicts"] == ["email"]
+
+        with Session() as db:
+            assert db.query(SalesVisit).filter(SalesVisit.duration_minutes == 60).count() == VISITS
+            assert db.query(Order).count() == VISITS and db.query(OrderItem).count() == 2 * VISITS
+            assert db.get(SalesVisit, far["visit_id"]).location_fraud_attempt
+            assert not db.get(SalesVisit, near["visit_id"]).location_fraud_attempt
+            customer = db.get(Customer, customer_ids[0])
+            assert (customer.phone_owner, customer.address) == ("0812-A", "Jl. Baru 1")
+            assert (customer.phone_store, customer.email) == ("0354-C", "server@example.com")
+            # created_at order = waktu device, bukan waktu upload
+            first_order = db.get(Order, body["results"][[a["idempotency_key"] for a in actions].index("dev2-order-0")]["order_id"])
+            assert first_order.created_at == datetime(2024, 5, 1, 8, 0, 30)
+    finally:
+        sequence_allocator.session_factory, geofence_index.session_factory = original_factory
+        geofence_index._built_version = -1
+        attendance_service.app.dependency_overrides.clear()
+        engine.dispose()
+    print("\n✅ Batch catch-up urut waktu device, edit customer di-merge per field")
+
+if __name__ == "__main__":
+    test_idempotent_batch_upload()
+    test_catch_up_merge()
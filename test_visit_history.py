@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test riwayat absensi /api/attendance/history dengan archive dan cursor paging
+Kunjungan lama dipindah ke sales_visits_archive; riwayat 365 hari dibaca per halaman.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "backend"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+import attendance_service
+from app.models.database import (
+    Base, User, Customer, SalesVisit, SalesVisitArchive, UserRole, AreaType, build_engine, new_id
+)
+from app.services.visit_archive_service import visit_archive
+
+VISITS_PER_DAY = 40
+DAYS = 365
+
+def _seed(Session):
+    with Session() as db:
+        salesmen = [User(employee_id=f"HS{i:03d}", name=f"Sales {i}", email=f"hs{i}@example.com", password_hash="x",
+                         role=UserRole.SALES_TOKO, area_type=AreaType.URBAN, phone_personal="0811") for i in range(2)]
+        customer = Customer(customer_code="HC0001", name="Toko", type="toko", address="Jl. Raya",
+                            phone_owner="0811", area_code="KDR")
+        db.add_all([*salesmen, customer])
+        db.flush()
+        now = datetime.now()
+        rows = []
+        for day in range(DAYS):
+            for i in range(VISITS_PER_DAY):
+                check_in = now - timedelta(days=day, minutes=i * 10 + 5)
+                rows.append({"id": new_id(), "salesman_id": salesmen[i % 2].id, "customer_id": customer.id,
+                             "visit_type": "regular", "check_in": check_in, "check_out": check_in + timedelta(minutes=30),
+                             "duration_minutes": 30, "notes": f"Kunjungan {day}-{i}"})
+        db.execute(insert(SalesVisit), rows)
+        db.commit()
+        return salesmen[0].id
+
+def test_archived_history_paging():
+    print("=== Testing Attendance History ===\n")
+    engine = build_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'history.db')}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    salesman_id = _seed(Session)
+    expected = DAYS * VISITS_PER_DAY // 2
+
+    def override_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    original_session = attendance_service.SessionLocal
+    attendance_service.SessionLocal = Session
+    attendance_service.app.dependency_overrides[attendance_service.get_db] = override_db
+    try:
+        client = TestClient(attendance_service.app)
+
+        with Session() as db:
+            started = time.perf_counter()
+            moved = visit_archive.archive(db, datetime.utcnow() - timedelta(days=90))
+            print(f"Archive: {moved} kunjungan dipindah, {(time.perf_counter() - started) * 1000:.0f} ms")
+            assert db.query(SalesVisit).count() + db.query(SalesVisitArchive).count() == DAYS * VISITS_PER_DAY
+            assert moved > 0 and db.query(SalesVisit).count() < DAYS * VISITS_PER_DAY // 3
+
+        # Cursor paging melewati batas hot/archive tanpa duplikat atau baris hilang
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"days": DAYS + 1, "limit": 500, **({"cursor": cursor} if cursor else {})}
+            body = client.get(f"/api/attendance/history/{salesman_id}", params=params).json()
+            seen.extend((v["check_in"], v["visit_id"]) for v in body["visits"])
+            pages += 1
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == expected and len(set(seen)) == expected, len(seen)
+        assert seen == sorted(seen, reverse=True)
+        print(f"Cursor paging: {pages} halaman, {len(seen)} kunjungan")
+
+        # Tanpa limit: seluruh rentang di-stream, bentuk response sama dengan versi lama
+        started = time.perf_counter()
+        response = client.get(f"/api/attendance/history/{salesman_id}", params={"days": DAYS + 1})
+        body = response.json()
+        print(f"Stream {DAYS} hari: {(time.perf_counter() - started) * 1000:.0f} ms, {len(response.content) / 1024:.0f} KB")
+        assert body["total_visits"] == expected == len(body["visits"])
+        assert body["visits"][0]["check_in"] > body["visits"][-1]["check_in"]
+        # Session stream (bukan get_db) ditutup setelah baris terakhir terkirim
+        assert engine.pool.checkedout() == 0
+        assert client.get("/api/data/products").json() == {"products": [], "count": 0}
+        assert client.get(f"/api/data/customers/{salesman_id}").json()["count"] == 1
+        assert engine.pool.checkedout() == 0
+        assert client.get(f"/api/attendance/history/{salesman_id}", params={"cursor": "rusak"}).status_code == 400
+
+        # Memory: iterasi keyset vs semua baris ORM sekaligus
+        with Session() as db:
+            since = datetime.now() - timedelta(days=DAYS + 1)
+            tracemalloc.start()
+            sum(1 for _ in visit_archive.iter_history(db, salesman_id, since))
+            paged_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            tracemalloc.start()
+            loaded = db.query(SalesVisitArchive).filter(SalesVisitArchive.salesman_id == salesman_id).all()
+            loaded += db.query(SalesVisit).filter(SalesVisit.salesman_id == salesman_id).all()
+            orm_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f"Peak memory: keyset {paged_peak / 1024:.0f} KB, ORM .all() {orm_peak / 1024:.0f} KB")
+        assert paged_peak < orm_peak / 4
+    finally:
+        attendance_service.app.dependency_overrides.clear()
+        attendance_service.SessionLocal = original_session
+        engine.dispose()
+    print("\n✅ Riwayat panjang dibaca per halaman dari hot + archive")
+
+if __name__ == "__main__":
+    test_archived_history_paging()